@@ -8,6 +8,7 @@ import logging
 import argparse
 import os
 from dotenv import load_dotenv
+from utils.migrations import migrate
 
 # Load environment variables
 load_dotenv()
@@ -29,47 +30,13 @@ if not VENICE_API_KEY:
     exit(1)
 
 def alter_database_table():
-    """Alter the database to add the 'verified_1960', 'verified_crypto', and 'classification' columns if they don't exist."""
-    conn = sqlite3.connect("doj_cases.db")
-    cursor = conn.cursor()
-
-    # Start a transaction
-    cursor.execute("PRAGMA foreign_keys=off;")
-
-    # Check if the columns 'verified_1960', 'verified_crypto', and 'classification' exist
-    cursor.execute("PRAGMA table_info(cases);")
-    existing_columns = [col[1] for col in cursor.fetchall()]
-
-    # Add 'verified_1960' and 'verified_crypto' columns if they don't exist
-    if 'verified_1960' not in existing_columns:
-        cursor.execute("ALTER TABLE cases ADD COLUMN verified_1960 BOOLEAN DEFAULT FALSE;")
-    if 'verified_crypto' not in existing_columns:
-        cursor.execute("ALTER TABLE cases ADD COLUMN verified_crypto BOOLEAN DEFAULT FALSE;")
-    if 'classification' not in existing_columns:
-        cursor.execute("ALTER TABLE cases ADD COLUMN classification TEXT;")
-
-    # Create the new table with the updated schema
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS cases_temp AS
-        SELECT id, title, date, body, url, teaser, number, component, topic, changed, created,
-               mentions_1960, mentions_crypto,
-               COALESCE(verified_1960, FALSE) as verified_1960,
-               COALESCE(verified_crypto, FALSE) as verified_crypto,
-               classification
-        FROM cases;
-    """)
-
-    # Drop the old table
-    cursor.execute("DROP TABLE IF EXISTS cases;")
-
-    # Rename the new table to the original table name
-    cursor.execute("ALTER TABLE cases_temp RENAME TO cases;")
-
-    # Re-enable foreign key constraints
-    cursor.execute("PRAGMA foreign_keys=on;")
-
-    conn.commit()
-    conn.close()
+    """
+    Bring the database schema up to date (verified_1960, verified_crypto and
+    classification columns included; see utils/migrations.py). Rows from
+    before the flags existed are defaulted to FALSE in batches, without the
+    old full table copy.
+    """
+    migrate("doj_cases.db")
 
 alter_database_table()
 
@@ -82,7 +49,7 @@ def get_sample_cases(limit=PROCESSING_LIMIT):
     conn = sqlite3.connect("doj_cases.db")
     cursor = conn.cursor()
     cursor.execute("""
-        SELECT id, title, body
+        SELECT id, title, COALESCE(body_text, body) AS body
         FROM cases
         WHERE mentions_1960 = 1
           AND (classification IS NULL OR classification = '' OR classification = 'unknown')
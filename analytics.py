@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Analytics over a Parquet export of the Project1960 database.
+Exports `cases` and the enrichment tables to year-partitioned Parquet,
+rewriting only the partitions that changed since the last export, and
+runs DuckDB SQL or built-in pandas reports over the files instead of the
+live database (utils/analytics.py).
+"""
+import argparse
+import sys
+import pandas as pd
+from utils.analytics import EXPORT_TABLES, REPORTS, export_tables, run_query, run_report
+from utils.config import Config
+from utils.logging_config import setup_logging
+from utils.migrations import migrate
+
+def export(db_path=None, directory=None, tables=None, full=False):
+    """Bring the change tracking up to date and export the changed partitions."""
+    migrate(db_path or Config.DATABASE_NAME)
+    results = export_tables(db_path, directory, tables=tables, full=full)
+    if not results:
+        print("Export is up to date.")
+    for table, (partitions, rows) in results.items():
+        print(f"{table}: {rows} rows in {partitions} partition(s)")
+
+def show(frame, csv=False):
+    if csv:
+        frame.to_csv(sys.stdout, index=False)
+    else:
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(frame.to_string(index=False))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export the Project1960 database to Parquet and query it.')
+    parser.add_argument('command', choices=['export', 'query', 'report'],
+                        help='export: write the changed partitions; query: run DuckDB SQL over the export; '
+                             'report: run a built-in report')
+    parser.add_argument('argument', nargs='?',
+                        help=f"query: the SQL; report: one of {', '.join(REPORTS)}")
+    parser.add_argument('--db', type=str, default=None, help='Database file (default: DATABASE_NAME)')
+    parser.add_argument('--dir', type=str, default=None, help='Export directory (default: ANALYTICS_DIR)')
+    parser.add_argument('--tables', nargs='+', choices=EXPORT_TABLES, help='export: only these tables')
+    parser.add_argument('--full', action='store_true', help='export: rewrite every partition')
+    parser.add_argument('--engine', choices=['auto', 'duckdb', 'pandas'], default='auto',
+                        help='report: DuckDB, pandas, or DuckDB when it is installed (default)')
+    parser.add_argument('--csv', action='store_true', help='query/report: print CSV instead of a table')
+    args = parser.parse_args()
+
+    if args.command == 'query' and not args.argument:
+        parser.error("query needs the SQL to run.")
+    if args.command == 'report' and args.argument not in REPORTS:
+        parser.error(f"report needs one of: {', '.join(REPORTS)}.")
+
+    setup_logging()
+    try:
+        if args.command == 'export':
+            export(args.db, args.dir, tables=args.tables, full=args.full)
+        elif args.command == 'query':
+            show(run_query(args.argument, args.dir), args.csv)
+        else:
+            show(run_report(args.argument, args.dir, engine=args.engine), args.csv)
+    except RuntimeError as e:
+        # A missing optional dependency
+        print(f"Error: {e}")
+        sys.exit(1)
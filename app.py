@@ -4,6 +4,10 @@ import json
 from datetime import datetime
 import os
 from dotenv import load_dotenv
+from utils.case_storage import case_rows_table, load_case_body
+from utils.database import apply_storage_profile, start_wal_checkpointer
+from utils.search import search_available, search_cases
+from utils.stats import ENRICHMENT_TABLES, count_stats, enrichment_counter, read_stats
 
 # Load environment variables
 load_dotenv()
@@ -19,9 +23,14 @@ PORT = int(os.getenv("FLASK_PORT", "5000"))
 app.config['DEBUG'] = DEBUG_MODE
 
 def get_db_connection():
-    """Create a database connection."""
-    conn = sqlite3.connect(DATABASE_NAME)
+    """
+    Create a database connection with the shared storage profile (WAL, so
+    page loads never wait for an enrichment or verification run to commit).
+    The first connection also starts the background WAL checkpointer.
+    """
+    conn = apply_storage_profile(sqlite3.connect(DATABASE_NAME))
     conn.row_factory = sqlite3.Row
+    start_wal_checkpointer(DATABASE_NAME)
     return conn
 
 def get_enrichment_data(case_id):
@@ -39,49 +48,49 @@ def get_enrichment_data(case_id):
     
     # Get participants
     try:
-        participants = conn.execute('SELECT * FROM participants WHERE case_id = ? ORDER BY participant_id', (case_id,)).fetchall()
+        participants = conn.execute('SELECT * FROM participants WHERE case_id = ? ORDER BY rowid', (case_id,)).fetchall()
         enrichment['participants'] = [dict(p) for p in participants]
     except sqlite3.OperationalError:
         enrichment['participants'] = []
     
     # Get case agencies
     try:
-        agencies = conn.execute('SELECT * FROM case_agencies WHERE case_id = ? ORDER BY agency_id', (case_id,)).fetchall()
+        agencies = conn.execute('SELECT * FROM case_agencies WHERE case_id = ? ORDER BY rowid', (case_id,)).fetchall()
         enrichment['agencies'] = [dict(a) for a in agencies]
     except sqlite3.OperationalError:
         enrichment['agencies'] = []
     
     # Get charges
     try:
-        charges = conn.execute('SELECT * FROM charges WHERE case_id = ? ORDER BY charge_id', (case_id,)).fetchall()
+        charges = conn.execute('SELECT * FROM charges WHERE case_id = ? ORDER BY rowid', (case_id,)).fetchall()
         enrichment['charges'] = [dict(c) for c in charges]
     except sqlite3.OperationalError:
         enrichment['charges'] = []
     
     # Get financial actions
     try:
-        financial_actions = conn.execute('SELECT * FROM financial_actions WHERE case_id = ? ORDER BY fin_id', (case_id,)).fetchall()
+        financial_actions = conn.execute('SELECT * FROM financial_actions WHERE case_id = ? ORDER BY rowid', (case_id,)).fetchall()
         enrichment['financial_actions'] = [dict(f) for f in financial_actions]
     except sqlite3.OperationalError:
         enrichment['financial_actions'] = []
     
     # Get victims
     try:
-        victims = conn.execute('SELECT * FROM victims WHERE case_id = ? ORDER BY victim_id', (case_id,)).fetchall()
+        victims = conn.execute('SELECT * FROM victims WHERE case_id = ? ORDER BY rowid', (case_id,)).fetchall()
         enrichment['victims'] = [dict(v) for v in victims]
     except sqlite3.OperationalError:
         enrichment['victims'] = []
     
     # Get quotes
     try:
-        quotes = conn.execute('SELECT * FROM quotes WHERE case_id = ? ORDER BY quote_id', (case_id,)).fetchall()
+        quotes = conn.execute('SELECT * FROM quotes WHERE case_id = ? ORDER BY rowid', (case_id,)).fetchall()
         enrichment['quotes'] = [dict(q) for q in quotes]
     except sqlite3.OperationalError:
         enrichment['quotes'] = []
     
     # Get themes
     try:
-        themes = conn.execute('SELECT * FROM themes WHERE case_id = ? ORDER BY theme_id', (case_id,)).fetchall()
+        themes = conn.execute('SELECT * FROM themes WHERE case_id = ? ORDER BY rowid', (case_id,)).fetchall()
         enrichment['themes'] = [dict(t) for t in themes]
     except sqlite3.OperationalError:
         enrichment['themes'] = []
@@ -92,45 +101,35 @@ def get_enrichment_data(case_id):
 def get_stats():
     """Get database statistics including enrichment progress."""
     conn = get_db_connection()
+    # Trigger-maintained counters (see utils/stats.py); a database that has
+    # not been migrated yet is counted directly
+    counters = read_stats(conn) or count_stats(conn.cursor())
+    conn.close()
     stats = {}
     
     # General Stats
-    stats['total_cases'] = conn.execute('SELECT COUNT(*) FROM cases').fetchone()[0]
-    stats['mentions_1960'] = conn.execute('SELECT COUNT(*) FROM cases WHERE mentions_1960 = 1').fetchone()[0]
-    stats['mentions_crypto'] = conn.execute('SELECT COUNT(*) FROM cases WHERE mentions_crypto = 1').fetchone()[0]
+    stats['total_cases'] = counters.get('cases', 0)
+    stats['mentions_1960'] = counters.get('mentions_1960', 0)
+    stats['mentions_crypto'] = counters.get('mentions_crypto', 0)
     
     # 1960 Verification Stats (based on the cohort that mentions 1960)
-    cohort_1960 = 'WHERE mentions_1960 = 1'
-    stats['verified_yes'] = conn.execute(f'SELECT COUNT(*) FROM cases {cohort_1960} AND verified_1960 = 1').fetchone()[0]
-    stats['verified_no'] = conn.execute(f'SELECT COUNT(*) FROM cases {cohort_1960} AND verified_1960 = 0').fetchone()[0]
+    stats['verified_yes'] = counters.get('verified_1960_yes', 0)
+    stats['verified_no'] = counters.get('verified_1960_no', 0)
     
     # Calculate unprocessed for the 1960 cohort
     processed_1960 = stats['verified_yes'] + stats['verified_no']
     stats['unprocessed_1960'] = stats['mentions_1960'] - processed_1960
 
-    # Enrichment Progress Stats
-    enrichment_tables = [
-        'case_metadata', 'participants', 'case_agencies', 'charges', 
-        'financial_actions', 'victims', 'quotes', 'themes'
-    ]
-    
-    stats['enrichment'] = {}
-    for table in enrichment_tables:
-        try:
-            # For all enrichment tables, we should count the number of unique cases
-            # that have been processed, not the total number of rows, especially for
-            # one-to-many relationships (like participants, charges, etc.).
-            count = conn.execute(f'SELECT COUNT(DISTINCT case_id) FROM {table}').fetchone()[0]
-            stats['enrichment'][table] = count
-        except sqlite3.OperationalError:
-            stats['enrichment'][table] = 0
-
-    conn.close()
+    # Enrichment Progress Stats: the number of unique cases processed into
+    # each table, not the number of rows
+    stats['enrichment'] = {
+        table: counters.get(enrichment_counter(table), 0) for table in ENRICHMENT_TABLES
+    }
     return stats
 
 def ensure_activity_log_table():
     """Ensure the enrichment_activity_log table exists."""
-    conn = sqlite3.connect(DATABASE_NAME)
+    conn = get_db_connection()
     cursor = conn.cursor()
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS enrichment_activity_log (
@@ -174,6 +173,20 @@ def index():
     stats = get_stats()
     return render_template('index.html', stats=stats)
 
+# Columns shown by the /cases list
+LIST_COLUMNS = "id, title, date, url, component, classification, mentions_1960, mentions_crypto, verified_1960"
+
+def case_filters(classification, mentions_1960, mentions_crypto):
+    """Column filters from the /cases and search query parameters."""
+    filters = {}
+    if classification:
+        filters['classification'] = classification
+    if mentions_1960:
+        filters['mentions_1960'] = int(mentions_1960)
+    if mentions_crypto:
+        filters['mentions_crypto'] = int(mentions_crypto)
+    return filters
+
 @app.route('/cases')
 def cases():
     """Cases listing page with filtering and pagination."""
@@ -188,37 +201,37 @@ def cases():
     search = request.args.get('search', '')
     
     conn = get_db_connection()
-    
-    # Build query with filters
-    query = "SELECT * FROM cases WHERE 1=1"
-    params = []
-    
-    if classification:
-        query += " AND classification = ?"
-        params.append(classification)
-    
-    if mentions_1960:
-        query += " AND mentions_1960 = ?"
-        params.append(int(mentions_1960))
-    
-    if mentions_crypto:
-        query += " AND mentions_crypto = ?"
-        params.append(int(mentions_crypto))
-    
-    if search:
-        query += " AND (title LIKE ? OR body LIKE ?)"
-        search_term = f"%{search}%"
-        params.extend([search_term, search_term])
-    
-    # Get total count for pagination
-    count_query = query.replace("SELECT *", "SELECT COUNT(*)")
-    total = conn.execute(count_query, params).fetchone()[0]
-    
-    # Get paginated results
-    query += " ORDER BY date DESC LIMIT ? OFFSET ?"
-    params.extend([per_page, offset])
-    
-    cases = conn.execute(query, params).fetchall()
+    filters = case_filters(classification, mentions_1960, mentions_crypto)
+    
+    if search and search_available(conn):
+        # Full-text index, best match first, with highlighted snippets
+        total, cases = search_cases(conn, search, filters, limit=per_page, offset=offset)
+    else:
+        # Build query with filters. The list only shows the small columns,
+        # so unless a LIKE search needs the bodies it reads the narrow
+        # case rows alone (see utils/case_storage.py)
+        source = 'cases' if search else case_rows_table(conn)
+        query = f"SELECT {LIST_COLUMNS} FROM {source} WHERE 1=1"
+        params = []
+        
+        for column, value in filters.items():
+            query += f" AND {column} = ?"
+            params.append(value)
+        
+        if search:
+            query += " AND (title LIKE ? OR COALESCE(body_text, body) LIKE ?)"
+            search_term = f"%{search}%"
+            params.extend([search_term, search_term])
+        
+        # Get total count for pagination
+        count_query = query.replace(f"SELECT {LIST_COLUMNS}", "SELECT COUNT(*)")
+        total = conn.execute(count_query, params).fetchone()[0]
+        
+        # Get paginated results
+        query += " ORDER BY date DESC LIMIT ? OFFSET ?"
+        params.extend([per_page, offset])
+        
+        cases = conn.execute(query, params).fetchall()
     conn.close()
     
     total_pages = (total + per_page - 1) // per_page
@@ -238,6 +251,9 @@ def case_detail(case_id):
     """Individual case detail page with enrichment data."""
     conn = get_db_connection()
     case = conn.execute('SELECT * FROM cases WHERE id = ?', (case_id,)).fetchone()
+    if case is not None and case['body'] is None:
+        # Compressed bodies read as NULL through the cases view
+        case = dict(case, body=load_case_body(conn, case_id))
     conn.close()
     
     if case is None:
@@ -254,7 +270,7 @@ def enrichment_dashboard():
     # Ensure the activity log table exists
     ensure_activity_log_table()
     
-    conn = sqlite3.connect('doj_cases.db')
+    conn = get_db_connection()
     cursor = conn.cursor()
     # Fetch recent activity log (last 50 entries)
     cursor.execute('''
@@ -277,11 +293,35 @@ def api_stats():
 def api_cases():
     """API endpoint for cases data."""
     conn = get_db_connection()
-    cases = conn.execute('SELECT id, title, date, classification, verified_1960, mentions_1960, mentions_crypto FROM cases ORDER BY date DESC LIMIT 100').fetchall()
+    # Only small columns, so skip the bodies behind the cases view
+    source = case_rows_table(conn)
+    cases = conn.execute(f'SELECT id, title, date, classification, verified_1960, mentions_1960, mentions_crypto FROM {source} ORDER BY date DESC LIMIT 100').fetchall()
     conn.close()
     
     return jsonify([dict(case) for case in cases])
 
+@app.route('/api/search')
+def api_search():
+    """
+    Full-text search API. `q` supports plain words (all must match),
+    "quoted phrases", prefix* terms and OR; results are ranked best first
+    and snippets mark the matches with <mark> tags.
+    """
+    q = request.args.get('q', '')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    filters = case_filters(request.args.get('classification', ''), request.args.get('mentions_1960', ''),
+                           request.args.get('mentions_crypto', ''))
+    
+    conn = get_db_connection()
+    if not search_available(conn):
+        conn.close()
+        return jsonify({'error': 'Search index not built; run python migrate_schemas.py'}), 503
+    total, results = search_cases(conn, q, filters, limit=limit, offset=offset)
+    conn.close()
+    
+    return jsonify({'query': q, 'total': total, 'limit': limit, 'offset': offset, 'results': results})
+
 @app.route('/api/enrichment/<case_id>')
 def api_enrichment(case_id):
     """API endpoint for enrichment data."""
@@ -292,19 +332,12 @@ def api_enrichment(case_id):
 def about():
     """About page explaining the project's purpose, methodology, and roadmap."""
     # Get statistics for the current status section
-    conn = get_db_connection()
-    stats = {}
-    
-    # Total cases
-    stats['total_cases'] = conn.execute('SELECT COUNT(*) FROM cases').fetchone()[0]
-    
-    # Cases with 18 USC 1960 mentions
-    stats['cases_1960'] = conn.execute('SELECT COUNT(*) FROM cases WHERE mentions_1960 = 1').fetchone()[0]
-    
-    # Cases with crypto mentions
-    stats['cases_crypto'] = conn.execute('SELECT COUNT(*) FROM cases WHERE mentions_crypto = 1').fetchone()[0]
-    
-    conn.close()
+    counters = get_stats()
+    stats = {
+        'total_cases': counters['total_cases'],
+        'cases_1960': counters['mentions_1960'],
+        'cases_crypto': counters['mentions_crypto'],
+    }
     
     return render_template('about.html', stats=stats)
 
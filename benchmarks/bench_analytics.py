@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Parquet analytics export (utils/analytics.py) on a synthetic
+corpus with charges, financial actions and case metadata.
+
+It reports the time of a full export, of an incremental export after a
+day's worth of new enrichment, and the median time of the built-in
+reports run three ways: in SQLite against the live database, with DuckDB
+over the Parquet files, and with pandas over the Parquet files.
+
+Usage:
+    python benchmarks/bench_analytics.py
+    python benchmarks/bench_analytics.py --cases 50000 --repeat 5 --json
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import analytics
+from utils.analytics import export_tables, run_report
+from utils.database import DatabaseManager, close_connections
+from utils.migrations import migrate
+
+STATUTES = ["18 U.S.C. 1960", "18 U.S.C. 1956", "18 U.S.C. 1343", "18 U.S.C. 371", "21 U.S.C. 846", "31 U.S.C. 5313"]
+DISTRICTS = [f"District {i}" for i in range(94)]
+ACTIONS = ["Forfeiture", "Criminal forfeiture", "Restitution", "Fine", "Seizure"]
+
+# The reports as SQLite runs them; SQLite has no regexp_replace, so amounts only lose '$' and ','
+SQLITE_REPORTS = {
+    'charges-by-statute-year': """
+        SELECT strftime('%Y', c.date, 'unixepoch') AS year, statute, COUNT(*), COUNT(DISTINCT case_id)
+        FROM charges JOIN cases c ON c.id = charges.case_id WHERE statute IS NOT NULL
+        GROUP BY year, statute ORDER BY year, COUNT(*) DESC
+    """,
+    'forfeitures-by-district': """
+        SELECT COALESCE(m.district_office, 'Unknown'), COUNT(DISTINCT f.case_id), COUNT(*),
+               SUM(CAST(REPLACE(REPLACE(f.amount, '$', ''), ',', '') AS REAL))
+        FROM financial_actions f LEFT JOIN case_metadata m ON m.case_id = f.case_id
+        WHERE lower(f.action_type) LIKE '%forfeit%'
+        GROUP BY 1 ORDER BY 4 DESC
+    """,
+}
+
+def build_database(path, cases):
+    migrate(path)
+    rng = random.Random(1960)
+    manager = DatabaseManager(path)
+    start = 1262304000  # 2010-01-01
+    manager.execute_many(
+        "INSERT INTO cases (id, title, date) VALUES (?, ?, ?)",
+        [(f"case-{i}", f"Case {i}", str(start + i * (15 * 365 * 86400 // cases))) for i in range(cases)]
+    )
+    manager.execute_many(
+        "INSERT INTO case_metadata (case_id, district_office) VALUES (?, ?)",
+        [(f"case-{i}", rng.choice(DISTRICTS)) for i in range(cases)]
+    )
+    manager.execute_many(
+        "INSERT INTO charges (case_id, statute, charge_description) VALUES (?, ?, ?)",
+        [(f"case-{i}", rng.choice(STATUTES), "Conspiracy") for i in range(cases) for _ in range(rng.randint(1, 4))]
+    )
+    manager.execute_many(
+        "INSERT INTO financial_actions (case_id, action_type, amount) VALUES (?, ?, ?)",
+        [(f"case-{i}", rng.choice(ACTIONS), f"${rng.randint(1000, 5000000):,}")
+         for i in range(cases) for _ in range(rng.randint(0, 2))]
+    )
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 1)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Parquet export and reports against SQLite')
+    parser.add_argument('--cases', type=int, default=20000, help='Synthetic cases in the database')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per report (the median is reported)')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+    if analytics.pyarrow is None:
+        parser.error("This benchmark needs pyarrow (pip install pyarrow duckdb).")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'doj_cases.db')
+        out = os.path.join(tmp, 'analytics')
+        build_database(db_path, args.cases)
+        export = {"full_ms": timed(lambda: export_tables(db_path, out, full=True), 1)}
+        # A day of enrichment: charges for the 20 newest cases
+        DatabaseManager(db_path).execute_many(
+            "INSERT INTO charges (case_id, statute) VALUES (?, ?)",
+            [(f"case-{args.cases - 1 - i}", "18 U.S.C. 1960") for i in range(20)]
+        )
+        export["incremental_ms"] = timed(lambda: export_tables(db_path, out), 1)
+        close_connections()
+
+        reports = []
+        conn = sqlite3.connect(db_path)
+        for name, sql in SQLITE_REPORTS.items():
+            result = {"report": name, "sqlite_ms": timed(lambda: conn.execute(sql).fetchall(), args.repeat),
+                      "pandas_ms": timed(lambda: run_report(name, out, engine='pandas'), args.repeat)}
+            if analytics.duckdb is not None:
+                result["duckdb_ms"] = timed(lambda: run_report(name, out, engine='duckdb'), args.repeat)
+            reports.append(result)
+        conn.close()
+
+    if args.json:
+        print(json.dumps({"cases": args.cases, "export": export, "reports": reports}, indent=2))
+        return 0
+    print(f"{args.cases} cases: full export {export['full_ms']} ms, "
+          f"incremental export {export['incremental_ms']} ms")
+    print(f"{'report':<26}{'sqlite':>10}{'duckdb':>10}{'pandas':>10}   (median ms of {args.repeat})")
+    for result in reports:
+        print(f"{result['report']:<26}{result['sqlite_ms']:>10}{result.get('duckdb_ms', '-'):>10}"
+              f"{result['pandas_ms']:>10}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
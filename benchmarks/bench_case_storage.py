@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark the case storage layouts (utils/case_storage.py) on a synthetic
+corpus: bodies inline in `cases` (schema version 10), bodies split into
+case_bodies (version 11), and split with zlib-compressed raw bodies.
+
+For each layout it reports the database file size after VACUUM and the
+median time of the queries the list pages and the dashboard run: the
+newest-first /cases page, a filtered count, and the API's 100 newest cases.
+
+Usage:
+    python benchmarks/bench_case_storage.py
+    python benchmarks/bench_case_storage.py --cases 50000 --repeat 5 --json
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.case_storage import case_rows_table, compress_case_bodies, vacuum
+from utils.database import close_connections
+from utils.migrations import migrate
+
+WORDS = ("federal court defendant sentenced attorney district plea guilty indictment bitcoin "
+         "laundering unlicensed money transmitting business conspiracy wire fraud proceeds").split()
+
+LAYOUTS = [("inline", 10, None), ("split", None, None), ("split+zlib", None, "zlib")]
+
+def build_database(path, cases, target, codec):
+    """A database at schema `target` holding `cases` releases of a few KB each."""
+    migrate(path, target=target)
+    close_connections()
+    rng = random.Random(1960)
+
+    def release(i):
+        paragraphs = ["<p>" + " ".join(rng.choices(WORDS, k=60)) + "</p>" for _ in range(12)]
+        text = " ".join(p[3:-4] for p in paragraphs)
+        return (f"case-{i}", " ".join(rng.choices(WORDS, k=8)), f"20{10 + i % 15:02d}-{1 + i % 12:02d}-{1 + i % 28:02d}",
+                "<div class=\"field\">" + "\n".join(paragraphs) + "</div>", text,
+                rng.random() < 0.2, rng.choice(['yes', 'no', None]))
+
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO cases (id, title, date, body, body_text, mentions_1960, classification) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (release(i) for i in range(cases))
+    )
+    conn.commit()
+    conn.close()
+    if codec:
+        compress_case_bodies(path, codec)
+        close_connections()
+    return vacuum(path)[1]
+
+def list_queries(conn):
+    # What app.py runs: the narrow rows when bodies are split, else `cases`
+    table = case_rows_table(conn)
+    return {
+        "cases_page": (f"SELECT id, title, date, classification FROM {table} ORDER BY date DESC LIMIT 20 OFFSET 200", ()),
+        "filtered_count": (f"SELECT COUNT(*) FROM {table} WHERE classification = ?", ('yes',)),
+        "api_cases": (f"SELECT id, title, date, classification, verified_1960, mentions_1960, mentions_crypto "
+                      f"FROM {table} ORDER BY date DESC LIMIT 100", ()),
+    }
+
+def time_query(conn, sql, params, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 2)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark inline, split and compressed case storage')
+    parser.add_argument('--cases', type=int, default=20000, help='Synthetic cases in the database')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query (the median is reported)')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, target, codec in LAYOUTS:
+            path = os.path.join(tmp, f"{name}.db")
+            size = build_database(path, args.cases, target, codec)
+            # A cold-ish connection per layout; the page cache is what is being compared
+            conn = sqlite3.connect(path)
+            timings = {query: time_query(conn, sql, params, args.repeat)
+                       for query, (sql, params) in list_queries(conn).items()}
+            conn.close()
+            results.append({"layout": name, "file_mb": round(size / 1e6, 1), **timings})
+
+    if args.json:
+        print(json.dumps({"cases": args.cases, "layouts": results}, indent=2))
+        return 0
+    print(f"{args.cases} cases, median of {args.repeat} runs (ms)")
+    print(f"{'layout':<12}{'file MB':>10}{'/cases page':>14}{'count':>10}{'api_cases':>12}")
+    for result in results:
+        print(f"{result['layout']:<12}{result['file_mb']:>10}{result['cases_page']:>14}"
+              f"{result['filtered_count']:>10}{result['api_cases']:>12}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
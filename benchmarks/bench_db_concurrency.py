@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Benchmark dashboard reads against a concurrent enrichment writer, with the
+old default rollback journal and with the storage profile (WAL,
+synchronous=NORMAL, page cache, mmap, busy timeout).
+
+A writer process stores enrichment results the way
+modules/enrichment/storage.py does (one transaction per case: DELETE, a
+few INSERTs and an activity log entry) as fast as it can, while reader
+processes run the dashboard's statistics and activity log queries. Each mode
+reports read latency percentiles, reads/s, writes/s and the number of
+"database is locked" errors seen by either side.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py
+    python benchmarks/bench_db_concurrency.py --cases 20000 --readers 4 --seconds 10 --json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.enrichment.schemas import get_all_schemas
+from utils.database import apply_storage_profile
+
+# Busy timeout of a plain sqlite3.connect(), which the app and cron jobs used
+DEFAULT_TIMEOUT = 5.0
+
+DASHBOARD_QUERIES = [
+    "SELECT COUNT(*) FROM cases",
+    "SELECT COUNT(*) FROM cases WHERE mentions_1960 = 1",
+    "SELECT COUNT(DISTINCT case_id) FROM participants",
+    "SELECT timestamp, case_id, table_name, status, notes FROM enrichment_activity_log "
+    "ORDER BY timestamp DESC LIMIT 50",
+]
+
+def build_database(path, cases):
+    """Create a cases table and the enrichment tables with `cases` synthetic rows."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE cases (id TEXT PRIMARY KEY, title TEXT, body TEXT, mentions_1960 BOOLEAN)")
+    conn.execute("""
+        CREATE TABLE enrichment_activity_log (
+            log_id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, case_id TEXT,
+            table_name TEXT, status TEXT, notes TEXT
+        )
+    """)
+    conn.execute(get_all_schemas()['participants'])
+    body = "federal court wire fraud conspiracy " * 60
+    conn.executemany(
+        "INSERT INTO cases (id, title, body, mentions_1960) VALUES (?, ?, ?, ?)",
+        ((f"case-{i}", f"Case {i}", body, i % 7 == 0) for i in range(cases))
+    )
+    conn.commit()
+    conn.close()
+
+def connect(path, profile):
+    conn = sqlite3.connect(path, timeout=DEFAULT_TIMEOUT, isolation_level=None)
+    if profile == 'wal':
+        apply_storage_profile(conn, busy_timeout_ms=int(DEFAULT_TIMEOUT * 1000))
+    else:
+        conn.execute("PRAGMA journal_mode = DELETE")
+    return conn
+
+def _writer(path, profile, cases, participants, deadline, results):
+    """Store enrichment results for one case per transaction until the deadline."""
+    conn = connect(path, profile)
+    writes = 0
+    locked = 0
+    case = 0
+    while time.monotonic() < deadline:
+        case_id = f"case-{case % cases}"
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM participants WHERE case_id = ?", (case_id,))
+            conn.executemany(
+                "INSERT INTO participants (case_id, name, role, title, organization) VALUES (?, ?, ?, ?, ?)",
+                [(case_id, f"Person {n}", "defendant", "CEO", "Shell Co") for n in range(participants)]
+            )
+            conn.execute(
+                "INSERT INTO enrichment_activity_log (timestamp, case_id, table_name, status, notes) "
+                "VALUES (datetime('now'), ?, 'participants', 'success', 'benchmark')",
+                (case_id,)
+            )
+            conn.execute("COMMIT")
+            writes += 1
+        except sqlite3.OperationalError:
+            locked += 1
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+        case += 1
+    conn.close()
+    results.put(("writer", writes, locked, []))
+
+def _reader(path, profile, deadline, results):
+    """Run the dashboard queries back to back until the deadline, timing each page load."""
+    conn = connect(path, profile)
+    latencies = []
+    locked = 0
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            for query in DASHBOARD_QUERIES:
+                conn.execute(query).fetchall()
+        except sqlite3.OperationalError:
+            locked += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+    results.put(("reader", len(latencies), locked, latencies))
+
+def run(profile, args):
+    """Run one mode on a fresh database and return its measurements."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        build_database(path, args.cases)
+        connect(path, profile).close()
+
+        results = multiprocessing.Queue()
+        deadline = time.monotonic() + args.seconds
+        processes = [multiprocessing.Process(target=_writer, args=(path, profile, args.cases, args.participants,
+                                                                   deadline, results))]
+        processes += [multiprocessing.Process(target=_reader, args=(path, profile, deadline, results))
+                      for _ in range(args.readers)]
+        for process in processes:
+            process.start()
+        reports = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    writes = sum(count for role, count, _, _ in reports if role == "writer")
+    reads = sum(count for role, count, _, _ in reports if role == "reader")
+    latencies = sorted(latency for role, _, _, values in reports if role == "reader" for latency in values)
+
+    def percentile(p):
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2) if latencies else None
+
+    return {
+        "profile": profile,
+        "reads": reads,
+        "reads_per_sec": round(reads / args.seconds, 1),
+        "writes_per_sec": round(writes / args.seconds, 1),
+        "read_p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "read_p95_ms": percentile(0.95),
+        "read_max_ms": round(latencies[-1] * 1000, 2) if latencies else None,
+        "reader_locked": sum(locked for role, _, locked, _ in reports if role == "reader"),
+        "writer_locked": sum(locked for role, _, locked, _ in reports if role == "writer"),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dashboard reads against a concurrent enrichment writer')
+    parser.add_argument('--cases', type=int, default=5000, help='Synthetic cases in the database')
+    parser.add_argument('--participants', type=int, default=5, help='Participant rows written per case')
+    parser.add_argument('--readers', type=int, default=2, help='Concurrent dashboard reader processes')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each mode')
+    parser.add_argument('--profile', choices=['rollback', 'wal', 'both'], default='both', help='Which mode(s) to run')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    profiles = ['rollback', 'wal'] if args.profile == 'both' else [args.profile]
+    results = [run(profile, args) for profile in profiles]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    print(f"{args.cases} cases, 1 writer ({args.participants} participants per case), "
+          f"{args.readers} readers, {args.seconds:.0f}s per mode")
+    print(f"{'profile':<10}{'reads/s':>10}{'writes/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'locked':>10}")
+    for result in results:
+        print(f"{result['profile']:<10}{result['reads_per_sec']:>10}{result['writes_per_sec']:>10}"
+              f"{result['read_p50_ms']!s:>10}{result['read_p95_ms']!s:>10}{result['read_max_ms']!s:>10}"
+              f"{result['reader_locked'] + result['writer_locked']:>10}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
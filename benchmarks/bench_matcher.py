@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compiled term matcher against the legacy rapidfuzz checks.
+
+Runs both implementations over a recorded corpus and reports throughput and
+recall. Any document the legacy functions flag but the matcher misses is
+listed and makes the script exit non-zero.
+
+Usage:
+    python benchmarks/bench_matcher.py --db doj_cases.db
+    python benchmarks/bench_matcher.py --corpus pages.jsonl.gz
+    python benchmarks/bench_matcher.py --synthetic 2000
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import re
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rapidfuzz import process, fuzz
+import scraper
+from modules.scraper.watchlist import build_matcher
+
+##################################
+# Legacy implementation (scraper.py before the compiled matcher)
+##################################
+def legacy_check_1960(text):
+    if re.search(scraper.LAW_REGEX, text, re.IGNORECASE):
+        return True
+    match = process.extractOne(text, scraper.LAW_VARIATIONS, scorer=fuzz.partial_ratio)
+    return bool(match and match[1] > 80)
+
+def legacy_check_crypto(text):
+    match = process.extractOne(text, scraper.CRYPTO_TERMS, scorer=fuzz.partial_ratio)
+    return bool(match and match[1] > 80)
+
+##################################
+# Corpus loading
+##################################
+def load_corpus_file(path):
+    """Load bodies from a JSON/JSONL file (optionally gzipped) of API items or pages."""
+    opener = gzip.open if path.endswith('.gz') else open
+    docs = []
+    with opener(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            # Archive records wrap the API response under 'data'
+            if isinstance(record, dict) and isinstance(record.get('data'), dict):
+                record = record['data']
+            items = record.get('results', [record]) if isinstance(record, dict) else record
+            for item in items:
+                docs.append((item.get('uuid'), item.get('body') or ''))
+    return docs
+
+def load_corpus_db(path):
+    """Load bodies from the cases table."""
+    conn = sqlite3.connect(path)
+    docs = conn.execute("SELECT id, body FROM cases").fetchall()
+    conn.close()
+    return [(case_id, body or '') for case_id, body in docs]
+
+FILLER = (
+    "the defendant pleaded guilty today in federal court to charges of wire fraud and "
+    "conspiracy according to court documents the scheme involved shell companies bank "
+    "accounts and false invoices sentencing is scheduled before the district judge who "
+    "will consider the guidelines the investigation was conducted by agents of the bureau"
+).split()
+
+INJECTIONS = [
+    "18 U.S.C. 1960", "§ 1960", "18 USC 1960", "unlicensed money transmitting", "unlicensed money transmiting",
+    "unlicenced money transmitting", "Bitcoin", "Bitcion", "bitcoin", "Ethereum", "Etherium",
+    "cryptocurrency", "crypto-currency", "Cryptocurrency", "encrypted", "crpyto", "§1960",
+]
+
+def synthetic_corpus(count, seed=1960):
+    """Generate release-like bodies with exact, misspelled and decoy terms."""
+    rng = random.Random(seed)
+    docs = []
+    for i in range(count):
+        words = [rng.choice(FILLER) for _ in range(rng.randint(300, 1200))]
+        for _ in range(rng.choice([0, 0, 0, 1, 2])):
+            words.insert(rng.randrange(len(words)), rng.choice(INJECTIONS))
+        docs.append((f"synthetic-{i}", "<p>" + " ".join(words) + "</p>"))
+    return docs
+
+##################################
+# Benchmark
+##################################
+def run(docs):
+    legacy = []
+    start = time.perf_counter()
+    for _, body in docs:
+        legacy.append((legacy_check_1960(body), legacy_check_crypto(body)))
+    legacy_seconds = time.perf_counter() - start
+
+    compiled = []
+    start = time.perf_counter()
+    for _, body in docs:
+        matched = scraper.MATCHER.match(body)
+        compiled.append(("1960" in matched, "crypto" in matched))
+    compiled_seconds = time.perf_counter() - start
+
+    print(f"Documents: {len(docs)}")
+    print(f"Legacy rapidfuzz:  {legacy_seconds:8.3f}s ({len(docs) / legacy_seconds:10.1f} docs/s)")
+    print(f"Compiled matcher:  {compiled_seconds:8.3f}s ({len(docs) / compiled_seconds:10.1f} docs/s)")
+    print(f"Speedup: {legacy_seconds / compiled_seconds:.1f}x")
+
+    misses = 0
+    for column, label in enumerate(["1960", "crypto"]):
+        legacy_hits = sum(1 for row in legacy if row[column])
+        compiled_hits = sum(1 for row in compiled if row[column])
+        missed = [docs[i][0] for i, (old, new) in enumerate(zip(legacy, compiled)) if old[column] and not new[column]]
+        gained = sum(1 for old, new in zip(legacy, compiled) if new[column] and not old[column])
+        recall = 100.0 * (legacy_hits - len(missed)) / legacy_hits if legacy_hits else 100.0
+        print(f"\n[{label}] legacy matches: {legacy_hits}, compiled matches: {compiled_hits}")
+        print(f"[{label}] recall vs legacy: {recall:.2f}% (missed {len(missed)}, additional {gained})")
+        for case_id in missed[:20]:
+            print(f"  missed: {case_id}")
+        misses += len(missed)
+    return misses
+
+def run_watchlist_scaling(docs):
+    """Compare the legacy two labels with the full active watchlist."""
+    legacy_labels = {label: scraper.WATCHLIST[label] for label in ("1960", "crypto") if label in scraper.WATCHLIST}
+    print("\nWatchlist scaling:")
+    for name, watchlist in (("legacy labels", legacy_labels), ("full watchlist", scraper.WATCHLIST)):
+        matcher = build_matcher(watchlist)
+        start = time.perf_counter()
+        for _, body in docs:
+            matcher.match(body)
+        seconds = time.perf_counter() - start
+        print(f"  {name:15s} ({len(watchlist):2d} labels): {len(docs) / seconds:10.1f} docs/s")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the compiled matcher against the legacy rapidfuzz checks')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--db', type=str, help='Read bodies from the cases table of this SQLite database')
+    source.add_argument('--corpus', type=str, help='Read bodies from a JSON/JSONL(.gz) file of API items or pages')
+    source.add_argument('--synthetic', type=int, help='Generate this many synthetic bodies')
+    parser.add_argument('--limit', type=int, default=None, help='Only use the first N documents')
+    args = parser.parse_args()
+
+    if args.db:
+        docs = load_corpus_db(args.db)
+    elif args.corpus:
+        docs = load_corpus_file(args.corpus)
+    else:
+        docs = synthetic_corpus(args.synthetic)
+    if args.limit:
+        docs = docs[:args.limit]
+    if not docs:
+        print("Corpus is empty.")
+        return 1
+
+    misses = run(docs)
+    run_watchlist_scaling(docs)
+    return 1 if misses else 0
+
+if __name__ == "__main__":
+    exit(main())
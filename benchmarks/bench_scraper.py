@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Benchmark scraper.fetch_all end to end against the local fake DOJ API.
+
+The fake API (benchmarks/fake_doj_api.py) runs in a separate process, so the
+reported CPU time is the scraper's own. The crawl writes to a throwaway
+database and reports pages/s, items/s, CPU time, time spent in database
+writes and the pipeline's per-stage counters. No network access is needed.
+
+Usage:
+    python benchmarks/bench_scraper.py --items 5000 --latency 0.05 --concurrency 4
+    python benchmarks/bench_scraper.py --corpus archive --pagesize 200 --no-stream
+    python benchmarks/bench_scraper.py --error-429 0.05 --retry-after 0 --json
+    python benchmarks/bench_scraper.py --min-items-per-sec 500   # exit 1 if slower
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+import scraper
+from benchmarks.fake_doj_api import STATS_PATH, add_server_arguments, server_from_args
+
+def _serve(args, conn):
+    """Server process: build the fake API and report its URL to the parent."""
+    api = server_from_args(args)
+    conn.send(api.url)
+    api.serve_forever()
+
+def children_cpu_seconds():
+    """CPU time of reaped child processes (matcher pool workers)."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def run(args, url):
+    """Crawl the fake API into a temporary database and return the measurements."""
+    counters = {"pages": 0, "items": 0, "write_seconds": 0.0}
+    fetch_page = scraper.fetch_page
+    write_tagged = scraper.write_tagged
+
+    def counting_fetch_page(*a, **kw):
+        results = fetch_page(*a, **kw)
+        if results:
+            counters["pages"] += 1
+            counters["items"] += len(results)
+        return results
+
+    def timed_write_tagged(*a, **kw):
+        start = time.perf_counter()
+        try:
+            return write_tagged(*a, **kw)
+        finally:
+            counters["write_seconds"] += time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        scraper.DATABASE_NAME = os.path.join(tmp, "bench.db")
+        scraper.DOJ_API_URL = url
+        scraper.FETCH_TIMEOUT = args.client_timeout
+        scraper.configure_fetch(page_size=args.pagesize, stream=not args.no_stream)
+        scraper.fetch_page = counting_fetch_page
+        scraper.write_tagged = timed_write_tagged
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output if not args.verbose else sys.stdout):
+            scraper.setup_database()
+            if args.archive:
+                scraper.use_archive(os.path.join(tmp, "archive"))
+            children_before = children_cpu_seconds()
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            try:
+                scraper.fetch_all(wait_sec=0, concurrency=args.concurrency, max_rps=args.rate,
+                                  match_workers=args.match_workers)
+            finally:
+                scraper.fetch_page = fetch_page
+                scraper.write_tagged = write_tagged
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start + children_cpu_seconds() - children_before
+
+        conn = sqlite3.connect(scraper.DATABASE_NAME)
+        stored = conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0]
+        conn.close()
+        if scraper.ARCHIVE is not None:
+            scraper.ARCHIVE.close()
+            scraper.ARCHIVE = None
+
+    text = output.getvalue()
+    stages = text[text.index("Pipeline stages:"):].splitlines()[1:5] if "Pipeline stages:" in text else []
+    return {
+        "wall_seconds": round(wall, 3),
+        "cpu_seconds": round(cpu, 3),
+        "write_seconds": round(counters["write_seconds"], 3),
+        "pages": counters["pages"],
+        "items": counters["items"],
+        "pages_per_sec": round(counters["pages"] / wall, 2) if wall else 0.0,
+        "items_per_sec": round(counters["items"] / wall, 2) if wall else 0.0,
+        "stored": stored,
+        "stages": [line for line in stages if line.strip()],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark scraper.fetch_all against the local fake DOJ API')
+    add_server_arguments(parser)
+    parser.add_argument('--concurrency', type=int, default=1, help='Scraper --concurrency')
+    parser.add_argument('--match-workers', type=int, default=1, help='Scraper --match-workers')
+    parser.add_argument('--rate', type=float, default=None, help='Scraper --rate (default: unlimited)')
+    parser.add_argument('--pagesize', type=int, default=scraper.PAGE_SIZE, help='Scraper --pagesize')
+    parser.add_argument('--no-stream', action='store_true', help='Scraper --no-stream')
+    parser.add_argument('--archive', action='store_true', help='Archive raw pages to a temporary directory')
+    parser.add_argument('--client-timeout', type=float, default=2.0, help='Scraper request timeout in seconds')
+    parser.add_argument('--min-items-per-sec', type=float, default=None, help='Exit 1 if throughput is below this')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    parser.add_argument('--verbose', action='store_true', help='Show the scraper output')
+    args = parser.parse_args()
+
+    parent_conn, child_conn = multiprocessing.Pipe()
+    server = multiprocessing.Process(target=_serve, args=(args, child_conn), daemon=True)
+    server.start()
+    try:
+        url = parent_conn.recv()
+        result = run(args, url)
+        stats_url = url.split("/api/")[0] + STATS_PATH
+        result["server"] = requests.get(stats_url, timeout=5).json()
+    finally:
+        server.terminate()
+        server.join()
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        server_stats = result["server"]
+        print(f"Server: {server_stats['requests']} requests ({server_stats['ok']} ok, {server_stats['not_modified']} not modified, "
+              f"{server_stats['429']} x 429, {server_stats['500']} x 500, {server_stats['timeouts']} timeouts), "
+              f"{server_stats['bytes'] / 1e6:.1f} MB sent")
+        print(f"Scraper: concurrency {args.concurrency}, match workers {args.match_workers}, "
+              f"rate {args.rate or 'unlimited'}, page size {args.pagesize}, {'buffered' if args.no_stream else 'streamed'}")
+        print(f"Wall time:     {result['wall_seconds']:8.2f}s")
+        print(f"Pages:         {result['pages']:8d} ({result['pages_per_sec']:.1f} pages/s)")
+        print(f"Items:         {result['items']:8d} ({result['items_per_sec']:.1f} items/s)")
+        print(f"CPU time:      {result['cpu_seconds']:8.2f}s ({result['cpu_seconds'] / result['wall_seconds']:.0%} of wall)")
+        print(f"DB write time: {result['write_seconds']:8.2f}s ({result['write_seconds'] / result['wall_seconds']:.0%} of wall)")
+        print(f"Stored matches: {result['stored']}")
+        if result["stages"]:
+            print("Pipeline stages:")
+            print("\n".join(result["stages"]))
+
+    if args.min_items_per_sec is not None and result["items_per_sec"] < args.min_items_per_sec:
+        print(f"Throughput {result['items_per_sec']} items/s is below {args.min_items_per_sec}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark case search: the old `LIKE '%term%'` scan against the FTS5 index
+(utils/search.py) on a synthetic corpus.
+
+Each query runs the way /cases runs it: a count plus the first page of 20
+results. The LIKE variant orders by date, the FTS variant by BM25 rank and
+also builds the highlighted snippets.
+
+Usage:
+    python benchmarks/bench_search.py
+    python benchmarks/bench_search.py --cases 100000 --repeat 5 --json
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import close_connections
+from utils.migrations import migrate
+from utils.search import search_cases
+
+# Common press release words appear in most releases; topical terms in the
+# given fraction of them. The rest of each body is Zipf-distributed filler.
+COMMON_WORDS = "federal court defendant sentenced attorney district plea guilty indictment".split()
+TOPICAL_WORDS = {
+    "wire fraud conspiracy": 0.30, "money laundering proceeds": 0.15, "bitcoin cryptocurrency": 0.05,
+    "unlicensed money transmitting business": 0.02, "ransomware": 0.01, "darknet market": 0.01,
+    "mixer": 0.005, "tumbler": 0.002,
+}
+FILLER_WORDS = 50000
+
+QUERIES = ['bitcoin', 'tumbler', '"money transmitting"', 'launder*', 'ransomware darknet', 'mixer OR tumbler', 'fraud']
+
+def build_database(path, cases):
+    """Create a migrated database with `cases` synthetic releases."""
+    migrate(path)
+    close_connections()
+    rng = random.Random(1960)
+    filler = [f"w{n}" for n in range(FILLER_WORDS)]
+    cum_weights = list(itertools.accumulate(1 / (n + 1) for n in range(FILLER_WORDS)))
+
+    def release():
+        words = rng.choices(COMMON_WORDS, k=20) + rng.choices(filler, cum_weights=cum_weights, k=300)
+        words += [phrase for phrase, share in TOPICAL_WORDS.items() if rng.random() < share]
+        rng.shuffle(words)
+        return " ".join(words[:8]), " ".join(words)
+
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT INTO cases (id, title, date, body, body_text) VALUES (?, ?, ?, ?, ?)",
+        ((f"case-{i}", title, f"20{10 + i % 15:02d}-{1 + i % 12:02d}-{1 + i % 28:02d}", None, body)
+         for i in range(cases) for title, body in [release()])
+    )
+    conn.commit()
+    conn.close()
+
+def like_search(conn, text):
+    term = "%" + text.strip('"*') + "%"
+    where = "WHERE title LIKE ? OR COALESCE(body_text, body) LIKE ?"
+    total = conn.execute(f"SELECT COUNT(*) FROM cases {where}", (term, term)).fetchone()[0]
+    conn.execute(f"SELECT * FROM cases {where} ORDER BY date DESC LIMIT 20", (term, term)).fetchall()
+    return total
+
+def fts_search(conn, text):
+    return search_cases(conn, text, limit=20)[0]
+
+def time_query(search, conn, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        total = search(conn, text)
+        timings.append(time.perf_counter() - start)
+    return total, round(statistics.median(timings) * 1000, 2)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark LIKE search against the FTS5 search index')
+    parser.add_argument('--cases', type=int, default=20000, help='Synthetic cases in the database')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per query (the median is reported)')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        build_database(path, args.cases)
+        build_seconds = round(time.perf_counter() - start, 1)
+        conn = sqlite3.connect(path)
+        results = []
+        for query in QUERIES:
+            like_total, like_ms = time_query(like_search, conn, query, args.repeat)
+            fts_total, fts_ms = time_query(fts_search, conn, query, args.repeat)
+            results.append({"query": query, "like_ms": like_ms, "like_matches": like_total,
+                            "fts_ms": fts_ms, "fts_matches": fts_total})
+        conn.close()
+
+    if args.json:
+        print(json.dumps({"cases": args.cases, "build_seconds": build_seconds, "queries": results}, indent=2))
+        return 0
+    print(f"{args.cases} cases (built and indexed in {build_seconds}s), median of {args.repeat} runs")
+    print(f"{'query':<24}{'LIKE ms':>10}{'matches':>10}{'FTS ms':>10}{'matches':>10}")
+    for result in results:
+        print(f"{result['query']:<24}{result['like_ms']:>10}{result['like_matches']:>10}"
+              f"{result['fts_ms']:>10}{result['fts_matches']:>10}")
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
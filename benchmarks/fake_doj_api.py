@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the DOJ press release API (/api/v1/press_releases.json).
+
+Serves recorded pages (a raw page archive directory or a JSON/JSONL(.gz) file
+of API pages or items) or synthetic releases, paginated like the real API
+with `page` (zero-based) and `pagesize`, optionally sorted by a timestamp
+field (`sort`, `direction`).
+Latency, 429/500 responses and hung connections can be injected at fixed
+rates, and ETag/If-None-Match and gzip are supported so conditional requests
+and compressed transfers behave as in production.
+
+GET /__stats returns request counters as JSON.
+
+Usage:
+    python benchmarks/fake_doj_api.py --items 5000 --latency 0.05 --port 8060
+    python benchmarks/fake_doj_api.py --corpus archive --error-429 0.02
+    DOJ_API_URL=http://127.0.0.1:8060/api/v1/press_releases.json python scraper.py
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.scraper.archive import PageArchive
+
+API_PATH = "/api/v1/press_releases.json"
+STATS_PATH = "/__stats"
+
+##################################
+# Releases
+##################################
+FILLER = (
+    "the defendant pleaded guilty today in federal court to charges of wire fraud and "
+    "conspiracy according to court documents the scheme involved shell companies bank "
+    "accounts and false invoices sentencing is scheduled before the district judge who "
+    "will consider the guidelines the investigation was conducted by agents of the bureau"
+).split()
+
+MENTIONS = [
+    "operating an unlicensed money transmitting business in violation of 18 U.S.C. § 1960",
+    "laundered the proceeds through Bitcoin and other cryptocurrency",
+    "conspiracy to commit money laundering under 18 U.S.C. § 1956(h)",
+    "structured deposits to evade currency transaction report requirements",
+]
+
+def synthetic_items(count, seed=1960, match_rate=0.1, words=(300, 1200)):
+    """Generate release-like items; about `match_rate` of them mention a watched statute or term."""
+    rng = random.Random(seed)
+    newest = 1700000000
+    items = []
+    for i in range(count):
+        body = [rng.choice(FILLER) for _ in range(rng.randint(*words))]
+        if rng.random() < match_rate:
+            body.insert(rng.randrange(len(body)), rng.choice(MENTIONS))
+        date = newest - i * 3600
+        items.append({
+            "uuid": f"synthetic-{i:06d}",
+            "title": f"Defendant {i} sentenced in fraud scheme",
+            "date": str(date),
+            "changed": str(date + rng.randint(0, 86400)),
+            "created": str(date),
+            "body": "<p>" + " ".join(body) + "</p>",
+            "url": f"https://www.justice.gov/opa/pr/synthetic-{i}",
+            "teaser": None,
+            "number": f"{i % 100:02d}-{i}",
+            "component": [{"name": "Criminal Division"}],
+            "topic": [],
+        })
+    return items
+
+def load_items(path):
+    """Load recorded items from a page archive directory or a JSON/JSONL(.gz) file, newest first."""
+    if os.path.isdir(path):
+        archive = PageArchive(path)
+        try:
+            records = list(archive.iter_pages())
+        finally:
+            archive.close()
+    else:
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+
+    items = {}
+    for record in records:
+        # Archive records wrap the API response under 'data'
+        if isinstance(record, dict) and isinstance(record.get('data'), dict):
+            record = record['data']
+        for item in (record.get('results', [record]) if isinstance(record, dict) else record):
+            items[item.get('uuid')] = item
+    return sorted(items.values(), key=lambda item: int(item.get('date') or 0), reverse=True)
+
+##################################
+# Server
+##################################
+class FakeDojApi:
+    """Threaded HTTP server imitating the DOJ press release API."""
+
+    def __init__(self, items, latency=0.0, jitter=0.0, error_429=0.0, error_500=0.0, timeout_rate=0.0,
+                 timeout_delay=5.0, retry_after=None, max_page_size=500, compress=True, seed=1960,
+                 host='127.0.0.1', port=0):
+        """
+        Initialize the server (call start() to serve).
+
+        Args:
+            items: Releases to serve, in default (newest-first) order
+            latency: Seconds added to every response
+            jitter: Maximum extra random latency in seconds
+            error_429: Fraction of requests answered 429 Too Many Requests
+            error_500: Fraction of requests answered 500 Internal Server Error
+            timeout_rate: Fraction of requests that hang for `timeout_delay`
+                seconds and are then dropped without a response
+            retry_after: Retry-After seconds sent with 429/500 (None: no header)
+            max_page_size: Largest `pagesize` honoured
+            compress: Gzip responses for clients that accept it
+            seed: Seed for the latency and error draws
+        """
+        self.items = list(items)
+        self._sorted = {}
+        self.latency = latency
+        self.jitter = jitter
+        self.error_429 = error_429
+        self.error_500 = error_500
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay
+        self.retry_after = retry_after
+        self.max_page_size = max_page_size
+        self.compress = compress
+        self.stats = {"requests": 0, "ok": 0, "not_modified": 0, "429": 0, "500": 0, "timeouts": 0,
+                      "items": 0, "bytes": 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        """API URL to point the scraper at."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PATH}"
+
+    def start(self):
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-doj-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve in the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def stop(self):
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _draw(self):
+        """Pick the outcome of a request: (fault or None, delay)."""
+        with self._lock:
+            roll = self._rng.random()
+            delay = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        for fault, rate in (("timeout", self.timeout_rate), ("429", self.error_429), ("500", self.error_500)):
+            if roll < rate:
+                return fault, delay
+            roll -= rate
+        return None, delay
+
+    def _sorted_by(self, field):
+        """Items sorted newest-first by a timestamp field, cached per field."""
+        with self._lock:
+            if field not in self._sorted:
+                self._sorted[field] = sorted(self.items, key=lambda item: int(item.get(field) or 0), reverse=True)
+            return self._sorted[field]
+
+    def page(self, query):
+        """Build the API response body for a parsed query string."""
+        page = int(query.get('page', ['0'])[0])
+        page_size = min(int(query.get('pagesize', ['50'])[0]), self.max_page_size)
+        sort = query.get('sort', [''])[0]
+        items = self._sorted_by(sort) if sort else self.items
+        if query.get('direction', ['DESC'])[0].upper() == 'ASC':
+            items = items[::-1]
+        results = items[page * page_size:(page + 1) * page_size]
+        return {
+            "metadata": {"resultset": {"count": len(self.items), "pagesize": page_size, "page": page}},
+            "results": results,
+        }
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body=b"", headers=None):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                api._count("bytes", len(body))
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path == STATS_PATH:
+                    with api._lock:
+                        body = json.dumps(api.stats).encode('utf-8')
+                    self._send(200, body, {"Content-Type": "application/json"})
+                    return
+                if parts.path != API_PATH:
+                    self._send(404, b"not found")
+                    return
+
+                api._count("requests")
+                fault, delay = api._draw()
+                if fault == "timeout":
+                    api._count("timeouts")
+                    time.sleep(api.timeout_delay)
+                    self.close_connection = True
+                    return
+                if delay:
+                    time.sleep(delay)
+                if fault:
+                    api._count(fault)
+                    headers = {} if api.retry_after is None else {"Retry-After": str(api.retry_after)}
+                    self._send(int(fault), b"injected error", headers)
+                    return
+
+                try:
+                    data = api.page(parse_qs(parts.query))
+                except ValueError:
+                    self._send(400, b"bad query")
+                    return
+                body = json.dumps(data).encode('utf-8')
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    api._count("not_modified")
+                    self._send(304, headers={"ETag": etag})
+                    return
+
+                headers = {"Content-Type": "application/json", "ETag": etag}
+                if api.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, compresslevel=5)
+                    headers["Content-Encoding"] = "gzip"
+                api._count("ok")
+                api._count("items", len(data["results"]))
+                self._send(200, body, headers)
+
+        return Handler
+
+def add_server_arguments(parser):
+    """Add the options shared by this script and the scraper benchmark."""
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--corpus', type=str, help='Serve recorded releases from a page archive directory or JSON/JSONL(.gz) file')
+    source.add_argument('--items', type=int, default=2000, help='Serve this many synthetic releases')
+    parser.add_argument('--match-rate', type=float, default=0.1, help='Fraction of synthetic releases that mention a watched term')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Maximum extra random latency in seconds')
+    parser.add_argument('--error-429', type=float, default=0.0, help='Fraction of requests answered 429')
+    parser.add_argument('--error-500', type=float, default=0.0, help='Fraction of requests answered 500')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='Fraction of requests that hang and are dropped')
+    parser.add_argument('--timeout-delay', type=float, default=5.0, help='Seconds a hung request lasts before it is dropped')
+    parser.add_argument('--retry-after', type=float, default=None, help='Retry-After seconds sent with injected errors')
+    parser.add_argument('--no-gzip', action='store_true', help='Never compress responses')
+    parser.add_argument('--seed', type=int, default=1960, help='Seed for synthetic releases, latency and errors')
+
+def server_from_args(args, host='127.0.0.1', port=0):
+    """Build a FakeDojApi from parsed add_server_arguments options."""
+    items = load_items(args.corpus) if args.corpus else synthetic_items(args.items, seed=args.seed,
+                                                                        match_rate=args.match_rate)
+    return FakeDojApi(items, latency=args.latency, jitter=args.jitter, error_429=args.error_429,
+                      error_500=args.error_500, timeout_rate=args.timeout_rate, timeout_delay=args.timeout_delay,
+                      retry_after=args.retry_after, compress=not args.no_gzip, seed=args.seed,
+                      host=host, port=port)
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve a local stand-in for the DOJ press release API')
+    add_server_arguments(parser)
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8060, help='Port to listen on')
+    args = parser.parse_args()
+
+    api = server_from_args(args, host=args.host, port=args.port)
+    print(f"Serving {len(api.items)} releases at {api.url}")
+    try:
+        api.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -3,8 +3,39 @@ import sqlite3
 import argparse
 import pandas as pd
 from orchestrators.enrichment_orchestrator import EnrichmentOrchestrator
+from utils.migrations import migrate
+from utils.case_storage import CODECS, compress_case_bodies, vacuum as vacuum_database
+from utils.database import DatabaseManager
+from utils.search import rebuild_search_index
+from utils.stats import reconcile_stats
+
+def check_database(query=None, rebuild=False, reconcile=False, rebuild_search=False,
+                   compress=None, vacuum=False):
+    if compress or vacuum:
+        if compress:
+            print(f"Storing case bodies as {compress}...")
+            print(f"{compress_case_bodies(codec=compress)} case bodies rewritten.")
+        if vacuum:
+            print("Vacuuming the database file...")
+            before, after = vacuum_database()
+            print(f"Database file: {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB")
+        return
+
+    if rebuild_search:
+        print("Rebuilding the full-text search index...")
+        with DatabaseManager().transaction() as cursor:
+            rebuild_search_index(cursor)
+        print("Search index rebuilt.")
+        return
+
+    if reconcile:
+        print("Recounting dashboard statistics...")
+        drift = reconcile_stats()
+        for name, (stored, actual) in drift.items():
+            print(f"  {name}: stored {stored}, actual {actual}")
+        print(f"Stats reconciled ({len(drift)} counter(s) corrected).")
+        return
 
-def check_database(query=None, rebuild=False):
     if rebuild:
         print("Rebuilding all enrichment tables...")
         try:
@@ -20,9 +51,10 @@ def check_database(query=None, rebuild=False):
                 print(f"Dropping table: {table_name}")
                 db_manager.execute_query(f"DROP TABLE IF EXISTS {table_name};")
             
-            # Recreate tables
+            # Recreate tables and their indexes; every migration is safe to re-run
             print("Re-running schema setup...")
-            orchestrator.setup_enrichment_tables()
+            db_manager.execute_query("DELETE FROM schema_version")
+            migrate(db_manager.db_path)
             print("Database rebuild complete.")
         except Exception as e:
             print(f"Error during rebuild: {e}")
@@ -69,9 +101,20 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Check the status of the Project1960 database.')
     parser.add_argument('--query', type=str, help='Execute a raw SQL query against the database.')
     parser.add_argument('--rebuild', action='store_true', help='Drop and rebuild all enrichment tables.')
+    parser.add_argument('--reconcile-stats', action='store_true',
+                        help='Recount the dashboard statistics and correct any drifted counters.')
+    parser.add_argument('--rebuild-search', action='store_true',
+                        help='Rebuild the full-text search index from the cases table.')
+    parser.add_argument('--compress-bodies', choices=CODECS,
+                        help="Store raw HTML case bodies with this codec ('none' decompresses them).")
+    parser.add_argument('--vacuum', action='store_true',
+                        help='Rebuild the database file to return freed space (after --compress-bodies if both are given).')
     args = parser.parse_args()
 
-    if args.rebuild and args.query:
-        parser.error("Cannot use --rebuild and --query at the same time.")
+    storage = bool(args.compress_bodies or args.vacuum)
+    if sum([args.rebuild, bool(args.query), args.reconcile_stats, args.rebuild_search, storage]) > 1:
+        parser.error("Use only one of --rebuild, --query, --reconcile-stats, --rebuild-search "
+                     "and --compress-bodies/--vacuum.")
     
-    check_database(query=args.query, rebuild=args.rebuild) 
\ No newline at end of file
+    check_database(query=args.query, rebuild=args.rebuild, reconcile=args.reconcile_stats,
+                   rebuild_search=args.rebuild_search, compress=args.compress_bodies, vacuum=args.vacuum) 
\ No newline at end of file
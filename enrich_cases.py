@@ -7,6 +7,8 @@ import logging
 import argparse
 import os
 from dotenv import load_dotenv
+from utils.migrations import migrate
+from modules.enrichment.storage import record_enrichment_status
 
 # --- Configuration ---
 load_dotenv()
@@ -173,6 +175,8 @@ def setup_enrichment_tables():
     finally:
         if conn:
             conn.close()
+    # Columns and indexes added since (see utils/migrations.py)
+    migrate(DATABASE_NAME)
 
 def get_cases_to_enrich(table_name, limit):
     """Fetches verified cases that have not yet been enriched for the given table."""
@@ -187,9 +191,13 @@ def get_cases_to_enrich(table_name, limit):
     except sqlite3.Error as e:
         logger.warning(f"Could not create table '{table_name}': {e}")
     
+    # Prefer the plain text: compressed raw bodies read as NULL through the cases view
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(cases)")}
+    body = "COALESCE(c.body_text, c.body)" if 'body_text' in columns else "c.body"
+    
     # Now try the enrichment query
     query = f"""
-        SELECT c.id, c.title, c.body, c.url
+        SELECT c.id, c.title, {body} AS body, c.url
         FROM cases c
         LEFT JOIN {table_name} et ON c.id = et.case_id
         WHERE c.verified_1960 = 1 AND et.case_id IS NULL
@@ -204,8 +212,8 @@ def get_cases_to_enrich(table_name, limit):
     except sqlite3.OperationalError as e:
         # If the table doesn't exist, fall back to a simpler query
         logger.warning(f"Table '{table_name}' doesn't exist, using fallback query: {e}")
-        fallback_query = """
-            SELECT c.id, c.title, c.body, c.url
+        fallback_query = f"""
+            SELECT c.id, c.title, {body} AS body, c.url
             FROM cases c
             WHERE c.verified_1960 = 1
             LIMIT ?
@@ -736,10 +744,13 @@ def log_enrichment_activity(case_id, table_name, status, notes, max_retries=3):
             conn = sqlite3.connect(DATABASE_NAME, timeout=10.0, isolation_level=None)
             cursor = conn.cursor()
             timestamp = datetime.now(UTC).isoformat()
+            cursor.execute("BEGIN IMMEDIATE")
             cursor.execute(
                 "INSERT INTO enrichment_activity_log (timestamp, case_id, table_name, status, notes) VALUES (?, ?, ?, ?, ?)",
                 (timestamp, case_id, table_name, status, notes)
             )
+            record_enrichment_status(cursor, case_id, table_name, status, timestamp)
+            cursor.execute("COMMIT")
             conn.close()
             return True
         except Exception as e:
@@ -136,6 +136,20 @@ SCHEMA_DEFINITIONS = {
     """
 }
 
+# Latest enrichment outcome per case and table, kept up to date by
+# storage.record_enrichment_status alongside every activity log entry
+ENRICHMENT_STATUS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS enrichment_status (
+  case_id            TEXT NOT NULL,
+  table_name         TEXT NOT NULL,
+  status             TEXT NOT NULL,
+  attempts           INTEGER NOT NULL DEFAULT 0,
+  last_attempt_at    TEXT,
+  last_success_at    TEXT,
+  PRIMARY KEY (case_id, table_name)
+);
+"""
+
 def get_schema(table_name: str) -> str:
     """Get the CREATE TABLE statement for a specific table."""
     if table_name not in SCHEMA_DEFINITIONS:
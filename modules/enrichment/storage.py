@@ -3,6 +3,7 @@ Data storage operations for enrichment data.
 """
 import json
 import logging
+import sqlite3
 from typing import Any, Dict, List, Optional
 from utils.database import DatabaseManager
 from utils.logging_config import get_logger
@@ -46,74 +47,58 @@ def store_extracted_data(case_id: str, table_name: str, normalized_data: Any, ur
             log_enrichment_activity(case_id, table_name, 'error', error_msg)
             return False
         
-    try:
-        db_manager = DatabaseManager()
+    store = _STORE_FUNCTIONS.get(table_name)
+    if store is None:
+        logger.error(f"Unknown table name: {table_name}")
+        log_enrichment_activity(case_id, table_name, 'error', f'Unknown table: {table_name}')
+        return False
         
-        if table_name == 'case_metadata':
-            return _store_case_metadata(db_manager, case_id, normalized_data, url)
-        elif table_name == 'participants':
-            return _store_participants(db_manager, case_id, normalized_data)
-        elif table_name == 'case_agencies':
-            return _store_case_agencies(db_manager, case_id, normalized_data)
-        elif table_name == 'charges':
-            return _store_charges(db_manager, case_id, normalized_data)
-        elif table_name == 'financial_actions':
-            return _store_financial_actions(db_manager, case_id, normalized_data)
-        elif table_name == 'victims':
-            return _store_victims(db_manager, case_id, normalized_data)
-        elif table_name == 'quotes':
-            return _store_quotes(db_manager, case_id, normalized_data)
-        elif table_name == 'themes':
-            return _store_themes(db_manager, case_id, normalized_data)
-        else:
-            logger.error(f"Unknown table name: {table_name}")
-            log_enrichment_activity(case_id, table_name, 'error', f'Unknown table: {table_name}')
-            return False
+    try:
+        # The DELETE, the INSERTs and the success log entry commit together,
+        # so a failed write leaves the previous rows in place
+        with DatabaseManager().transaction() as cursor:
+            if table_name == 'case_metadata':
+                return store(cursor, case_id, normalized_data, url)
+            return store(cursor, case_id, normalized_data)
             
     except Exception as e:
         logger.error(f"Failed to store data for case {case_id} in table {table_name}: {e}")
         log_enrichment_activity(case_id, table_name, 'error', str(e))
         return False
 
-def _store_case_metadata(db_manager: DatabaseManager, case_id: str, data_obj: Dict[str, Any], url: str) -> bool:
+def _store_case_metadata(cursor: sqlite3.Cursor, case_id: str, data_obj: Dict[str, Any], url: str) -> bool:
     """Store case metadata."""
-    try:
-        if not isinstance(data_obj, dict):
-            logger.error(f"case_metadata expects a dict, got {type(data_obj)}: {repr(data_obj)}")
-            log_enrichment_activity(case_id, 'case_metadata', 'error', f'Expected dict, got {type(data_obj)}')
-            return False
-            
-        data_obj['press_release_url'] = url
-        columns = ['case_id', 'district_office', 'usa_name', 'event_type', 'judge_name', 'judge_title', 'case_number', 'max_penalty_text', 'sentence_summary', 'money_amounts', 'crypto_assets', 'statutes_json', 'timeline_json', 'press_release_url', 'extras_json']
-        values = [case_id]
-        
-        for col in columns[1:]:
-            value = data_obj.get(col)
-            # Handle fields that should be comma-separated strings - convert lists if needed
-            if col in ['money_amounts', 'crypto_assets'] and isinstance(value, list):
-                value = ', '.join(str(item) for item in value)
-            # Handle JSON fields
-            elif col in ['statutes_json', 'timeline_json', 'extras_json'] and value is not None:
-                if isinstance(value, (dict, list)):
-                    value = json.dumps(value)
-            values.append(value)
-            
-        query = f"INSERT OR REPLACE INTO case_metadata ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
-        db_manager.execute_query(query, tuple(values))
+    if not isinstance(data_obj, dict):
+        logger.error(f"case_metadata expects a dict, got {type(data_obj)}: {repr(data_obj)}")
+        log_enrichment_activity(case_id, 'case_metadata', 'error', f'Expected dict, got {type(data_obj)}', cursor)
+        return False
         
-        logger.info(f"Successfully stored case metadata for case {case_id}")
-        log_enrichment_activity(case_id, 'case_metadata', 'success', 'Data stored successfully')
-        return True
+    data_obj['press_release_url'] = url
+    columns = ['case_id', 'district_office', 'usa_name', 'event_type', 'judge_name', 'judge_title', 'case_number', 'max_penalty_text', 'sentence_summary', 'money_amounts', 'crypto_assets', 'statutes_json', 'timeline_json', 'press_release_url', 'extras_json']
+    values = [case_id]
+    
+    for col in columns[1:]:
+        value = data_obj.get(col)
+        # Handle fields that should be comma-separated strings - convert lists if needed
+        if col in ['money_amounts', 'crypto_assets'] and isinstance(value, list):
+            value = ', '.join(str(item) for item in value)
+        # Handle JSON fields
+        elif col in ['statutes_json', 'timeline_json', 'extras_json'] and value is not None:
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value)
+        values.append(value)
         
-    except Exception as e:
-        logger.error(f"Failed to store case metadata for case {case_id}: {e}")
-        log_enrichment_activity(case_id, 'case_metadata', 'error', str(e))
-        return False
+    query = f"INSERT OR REPLACE INTO case_metadata ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
+    cursor.execute(query, tuple(values))
+    
+    logger.info(f"Successfully stored case metadata for case {case_id}")
+    log_enrichment_activity(case_id, 'case_metadata', 'success', 'Data stored successfully', cursor)
+    return True
 
-def _store_participants(db_manager: DatabaseManager, case_id: str, data: List[Dict[str, Any]]) -> bool:
+def _store_participants(cursor: sqlite3.Cursor, case_id: str, data: List[Dict[str, Any]]) -> bool:
     """Store participants data."""
     # Clear existing data for this case
-    db_manager.execute_query("DELETE FROM participants WHERE case_id = ?", (case_id,))
+    cursor.execute("DELETE FROM participants WHERE case_id = ?", (case_id,))
     
     stored_count = 0
     for item in data:
@@ -125,17 +110,17 @@ def _store_participants(db_manager: DatabaseManager, case_id: str, data: List[Di
         values = [case_id] + [item.get(col) for col in columns[1:]]
         
         query = f"INSERT INTO participants ({','.join(columns)}) VALUES ({','.join(['?'] * len(columns))})"
-        db_manager.execute_query(query, tuple(values))
+        cursor.execute(query, tuple(values))
         stored_count += 1
         
     logger.info(f"Successfully stored {stored_count} participants for case {case_id}.")
-    log_enrichment_activity(case_id, 'participants', 'success', f'Stored {stored_count} participants')
+    log_enrichment_activity(case_id, 'participants', 'success', f'Stored {stored_count} participants', cursor)
     return True
 
-def _store_case_agencies(db_manager: DatabaseManager, case_id: str, data: List[Dict[str, Any]]) -> bool:
+def _store_case_agencies(cursor: sqlite3.Cursor, case_id: str, data: List[Dict[str, Any]]) -> bool:
     """Store case agencies data."""
     # Clear existing data for this case
-    db_manager.execute_query("DELETE FROM case_agencies WHERE case_id = ?", (case_id,))
+    cursor.execute("DELETE FROM case_agencies WHERE case_id = ?", (case_id,))
     
     stored_count = 0
     skipped = 0
@@ -157,17 +142,17 @@ def _store_case_agencies(db_manager: DatabaseManager, case_id: str, data: List[D
             values.append(value)
             
         query = f"INSERT INTO case_agencies ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
-        db_manager.execute_query(query, tuple(values))
+        cursor.execute(query, tuple(values))
         stored_count += 1
         
     logger.info(f"Successfully stored {stored_count} agencies for case {case_id}. Skipped {skipped} non-dict items.")
-    log_enrichment_activity(case_id, 'case_agencies', 'success', f'Stored {stored_count} agencies')
+    log_enrichment_activity(case_id, 'case_agencies', 'success', f'Stored {stored_count} agencies', cursor)
     return True
 
-def _store_charges(db_manager: DatabaseManager, case_id: str, data: List[Dict[str, Any]]) -> bool:
+def _store_charges(cursor: sqlite3.Cursor, case_id: str, data: List[Dict[str, Any]]) -> bool:
     """Store charges data."""
     # Clear existing data for this case
-    db_manager.execute_query("DELETE FROM charges WHERE case_id = ?", (case_id,))
+    cursor.execute("DELETE FROM charges WHERE case_id = ?", (case_id,))
     
     stored_count = 0
     skipped = 0
@@ -185,17 +170,17 @@ def _store_charges(db_manager: DatabaseManager, case_id: str, data: List[Dict[st
             values.append(charge.get(col))
             
         query = f"INSERT INTO charges ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
-        db_manager.execute_query(query, tuple(values))
+        cursor.execute(query, tuple(values))
         stored_count += 1
         
     logger.info(f"Successfully stored {stored_count} charges for case {case_id}. Skipped {skipped} non-dict items.")
-    log_enrichment_activity(case_id, 'charges', 'success', f'Stored {stored_count} charges')
+    log_enrichment_activity(case_id, 'charges', 'success', f'Stored {stored_count} charges', cursor)
     return True
 
-def _store_financial_actions(db_manager: DatabaseManager, case_id: str, data: List[Dict[str, Any]]) -> bool:
+def _store_financial_actions(cursor: sqlite3.Cursor, case_id: str, data: List[Dict[str, Any]]) -> bool:
     """Store financial actions data."""
     # Clear existing data for this case
-    db_manager.execute_query("DELETE FROM financial_actions WHERE case_id = ?", (case_id,))
+    cursor.execute("DELETE FROM financial_actions WHERE case_id = ?", (case_id,))
     
     stored_count = 0
     skipped = 0
@@ -213,17 +198,17 @@ def _store_financial_actions(db_manager: DatabaseManager, case_id: str, data: Li
             values.append(action.get(col))
             
         query = f"INSERT INTO financial_actions ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
-        db_manager.execute_query(query, tuple(values))
+        cursor.execute(query, tuple(values))
         stored_count += 1
         
     logger.info(f"Successfully stored {stored_count} financial actions for case {case_id}. Skipped {skipped} non-dict items.")
-    log_enrichment_activity(case_id, 'financial_actions', 'success', f'Stored {stored_count} financial actions')
+    log_enrichment_activity(case_id, 'financial_actions', 'success', f'Stored {stored_count} financial actions', cursor)
     return True
 
-def _store_victims(db_manager: DatabaseManager, case_id: str, data: List[Dict[str, Any]]) -> bool:
+def _store_victims(cursor: sqlite3.Cursor, case_id: str, data: List[Dict[str, Any]]) -> bool:
     """Store victims data."""
     # Clear existing data for this case
-    db_manager.execute_query("DELETE FROM victims WHERE case_id = ?", (case_id,))
+    cursor.execute("DELETE FROM victims WHERE case_id = ?", (case_id,))
     
     stored_count = 0
     skipped = 0
@@ -241,17 +226,17 @@ def _store_victims(db_manager: DatabaseManager, case_id: str, data: List[Dict[st
             values.append(victim.get(col))
             
         query = f"INSERT INTO victims ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
-        db_manager.execute_query(query, tuple(values))
+        cursor.execute(query, tuple(values))
         stored_count += 1
         
     logger.info(f"Successfully stored {stored_count} victims for case {case_id}. Skipped {skipped} non-dict items.")
-    log_enrichment_activity(case_id, 'victims', 'success', f'Stored {stored_count} victims')
+    log_enrichment_activity(case_id, 'victims', 'success', f'Stored {stored_count} victims', cursor)
     return True
 
-def _store_quotes(db_manager: DatabaseManager, case_id: str, data: List[Dict[str, Any]]) -> bool:
+def _store_quotes(cursor: sqlite3.Cursor, case_id: str, data: List[Dict[str, Any]]) -> bool:
     """Store quotes data."""
     # Clear existing data for this case
-    db_manager.execute_query("DELETE FROM quotes WHERE case_id = ?", (case_id,))
+    cursor.execute("DELETE FROM quotes WHERE case_id = ?", (case_id,))
     
     stored_count = 0
     skipped = 0
@@ -269,17 +254,17 @@ def _store_quotes(db_manager: DatabaseManager, case_id: str, data: List[Dict[str
             values.append(quote.get(col))
             
         query = f"INSERT INTO quotes ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
-        db_manager.execute_query(query, tuple(values))
+        cursor.execute(query, tuple(values))
         stored_count += 1
         
     logger.info(f"Successfully stored {stored_count} quotes for case {case_id}. Skipped {skipped} non-dict items.")
-    log_enrichment_activity(case_id, 'quotes', 'success', f'Stored {stored_count} quotes')
+    log_enrichment_activity(case_id, 'quotes', 'success', f'Stored {stored_count} quotes', cursor)
     return True
 
-def _store_themes(db_manager: DatabaseManager, case_id: str, data: List[Dict[str, Any]]) -> bool:
+def _store_themes(cursor: sqlite3.Cursor, case_id: str, data: List[Dict[str, Any]]) -> bool:
     """Store themes data."""
     # Clear existing data for this case
-    db_manager.execute_query("DELETE FROM themes WHERE case_id = ?", (case_id,))
+    cursor.execute("DELETE FROM themes WHERE case_id = ?", (case_id,))
     
     stored_count = 0
     skipped = 0
@@ -301,22 +286,69 @@ def _store_themes(db_manager: DatabaseManager, case_id: str, data: List[Dict[str
             values.append(value)
             
         query = f"INSERT INTO themes ({', '.join(columns)}) VALUES ({', '.join(['?'] * len(columns))})"
-        db_manager.execute_query(query, tuple(values))
+        cursor.execute(query, tuple(values))
         stored_count += 1
         
     logger.info(f"Successfully stored {stored_count} themes for case {case_id}. Skipped {skipped} non-dict items.")
-    log_enrichment_activity(case_id, 'themes', 'success', f'Stored {stored_count} themes')
+    log_enrichment_activity(case_id, 'themes', 'success', f'Stored {stored_count} themes', cursor)
     return True
 
-def log_enrichment_activity(case_id: str, table_name: str, status: str, notes: str) -> None:
-    """Log enrichment activity to the database."""
+def log_enrichment_activity(case_id: str, table_name: str, status: str, notes: str,
+                            cursor: Optional[sqlite3.Cursor] = None) -> None:
+    """
+    Log enrichment activity to the database and update the case's
+    enrichment_status row in the same transaction. With `cursor`, both are
+    written inside that cursor's transaction and commit with it; a failure
+    is raised so the caller's unit of work rolls back instead of committing
+    rows without their status. Without it, a failure is only logged.
+    """
+    import datetime
+
+    timestamp = datetime.datetime.now().isoformat()
+    query = "INSERT INTO enrichment_activity_log (timestamp, case_id, table_name, status, notes) VALUES (?, ?, ?, ?, ?)"
+    if cursor is not None:
+        cursor.execute(query, (timestamp, case_id, table_name, status, notes))
+        record_enrichment_status(cursor, case_id, table_name, status, timestamp)
+        return
+
     try:
-        import datetime
-        db_manager = DatabaseManager()
-        
-        timestamp = datetime.datetime.now().isoformat()
-        query = "INSERT INTO enrichment_activity_log (timestamp, case_id, table_name, status, notes) VALUES (?, ?, ?, ?, ?)"
-        db_manager.execute_query(query, (timestamp, case_id, table_name, status, notes))
+        with DatabaseManager().transaction() as cursor:
+            cursor.execute(query, (timestamp, case_id, table_name, status, notes))
+            record_enrichment_status(cursor, case_id, table_name, status, timestamp)
         
     except Exception as e:
-        logger.error(f"Failed to log enrichment activity: {e}") 
\ No newline at end of file
+        logger.error(f"Failed to log enrichment activity: {e}")
+
+ENRICHMENT_STATUS_UPSERT = """
+    INSERT INTO enrichment_status (case_id, table_name, status, attempts, last_attempt_at, last_success_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (case_id, table_name) DO UPDATE SET
+        status = excluded.status,
+        attempts = attempts + excluded.attempts,
+        last_attempt_at = COALESCE(excluded.last_attempt_at, last_attempt_at),
+        last_success_at = COALESCE(excluded.last_success_at, last_success_at)
+"""
+
+def record_enrichment_status(cursor: sqlite3.Cursor, case_id: str, table_name: str, status: str,
+                             timestamp: str) -> None:
+    """
+    Make `status` the current enrichment status of a case for a table.
+    A 'stale' status (the release body changed) is not an attempt.
+    """
+    attempted = status != 'stale'
+    cursor.execute(ENRICHMENT_STATUS_UPSERT, (
+        case_id, table_name, status, int(attempted),
+        timestamp if attempted else None,
+        timestamp if status == 'success' else None
+    ))
+
+_STORE_FUNCTIONS = {
+    'case_metadata': _store_case_metadata,
+    'participants': _store_participants,
+    'case_agencies': _store_case_agencies,
+    'charges': _store_charges,
+    'financial_actions': _store_financial_actions,
+    'victims': _store_victims,
+    'quotes': _store_quotes,
+    'themes': _store_themes,
+}
@@ -0,0 +1,3 @@
+"""
+Scraper module for collecting and filtering DOJ press releases for Project1960.
+"""
@@ -0,0 +1,211 @@
+"""
+Append-only archive of raw DOJ API pages.
+
+Every fetched page is appended, unmodified, to a gzip-compressed JSONL segment
+(one segment per month of fetch time). Each page is written as its own gzip
+member, so segments stay valid gzip files that can be read end to end with
+standard tools, and a single page can be decompressed from its byte offset.
+
+A small SQLite index next to the segments records where each page lives,
+which API page and query parameters it came from, and the range of release
+dates it contains. Pages are only indexed after their bytes are on disk, so a
+crash can leave unindexed trailing bytes but never an index entry without data.
+"""
+import gzip
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from utils.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+INDEX_NAME = "index.db"
+
+# zlib window bits selecting the gzip container, so each record is a gzip member
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+_LINE_BREAKS = bytes.maketrans(b"\r\n", b"  ")
+
+class PageArchive:
+    """Compressed append-only archive of raw API pages."""
+
+    def __init__(self, directory: str, segment_prefix: str = "pages"):
+        """
+        Open (or create) an archive directory.
+
+        Args:
+            directory: Directory holding the segments and the index
+            segment_prefix: Segment file name prefix. Processes archiving into
+                the same directory at once must each use their own prefix,
+                since an append offset is only known within one process.
+        """
+        self.directory = directory
+        self.segment_prefix = segment_prefix
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index = sqlite3.connect(os.path.join(directory, INDEX_NAME), timeout=30, check_same_thread=False)
+        with self._index:
+            self._index.execute('''
+                CREATE TABLE IF NOT EXISTS pages (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    segment TEXT NOT NULL,
+                    offset INTEGER NOT NULL,
+                    length INTEGER NOT NULL,
+                    page INTEGER,
+                    params TEXT,
+                    fetched_at TEXT NOT NULL,
+                    item_count INTEGER NOT NULL,
+                    min_date INTEGER,
+                    max_date INTEGER
+                )
+            ''')
+            self._index.execute('CREATE INDEX IF NOT EXISTS idx_pages_page ON pages (page)')
+            self._index.execute('CREATE INDEX IF NOT EXISTS idx_pages_dates ON pages (min_date, max_date)')
+
+    def append(self, page: Optional[int], data: Dict[str, Any], params: Optional[Dict[str, Any]] = None,
+               dates: Iterable[Optional[int]] = ()) -> None:
+        """
+        Append one raw API response to the archive.
+
+        Args:
+            page: API page number the response belongs to
+            data: Decoded API response, stored as-is
+            params: Query parameters used for the request
+            dates: Release dates (epoch seconds) of the items, for the index
+        """
+        record = self.open_record(page, params)
+        record.write(json.dumps(data, separators=(',', ':')).encode('utf-8'))
+        record.commit(len(data.get("results") or []), dates)
+
+    def open_record(self, page: Optional[int], params: Optional[Dict[str, Any]] = None) -> "ArchiveRecord":
+        """
+        Start archiving a raw API response whose bytes arrive incrementally.
+        Write the response body with ArchiveRecord.write and finish with
+        commit(); a record that is never committed leaves nothing behind.
+
+        Args:
+            page: API page number the response belongs to
+            params: Query parameters used for the request
+        """
+        return ArchiveRecord(self, page, params)
+
+    def _store(self, member: bytes, fetched_at: datetime, page: Optional[int], params: Optional[Dict[str, Any]],
+               item_count: int, dates: Iterable[Optional[int]]) -> None:
+        """Append a compressed record to its segment, then index it."""
+        known_dates = [d for d in dates if d is not None]
+        segment = f"{self.segment_prefix}-{fetched_at:%Y-%m}.jsonl.gz"
+
+        with self._lock:
+            with open(os.path.join(self.directory, segment), 'ab') as f:
+                offset = f.tell()
+                f.write(member)
+                f.flush()
+                os.fsync(f.fileno())
+            with self._index:
+                self._index.execute(
+                    '''INSERT INTO pages (segment, offset, length, page, params, fetched_at, item_count, min_date, max_date)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                    (segment, offset, len(member), page, json.dumps(params or {}, sort_keys=True),
+                     fetched_at.isoformat(), item_count,
+                     min(known_dates) if known_dates else None,
+                     max(known_dates) if known_dates else None)
+                )
+
+    def count(self) -> int:
+        """Number of archived pages."""
+        with self._lock:
+            return self._index.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def entries(self, since: Optional[int] = None, until: Optional[int] = None) -> List[Tuple[str, int, int]]:
+        """
+        Return (segment, offset, length) of archived pages in fetch order.
+
+        Args:
+            since: Only pages with a release dated at or after this epoch second
+            until: Only pages with a release dated at or before this epoch second
+        """
+        query = "SELECT segment, offset, length FROM pages"
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("max_date >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("min_date <= ?")
+            params.append(until)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY id"
+
+        with self._lock:
+            return self._index.execute(query, params).fetchall()
+
+    def iter_pages(self, since: Optional[int] = None, until: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield archived page records in the order they were fetched (see entries)."""
+        return read_pages(self.directory, self.entries(since=since, until=until))
+
+    def close(self) -> None:
+        """Close the index connection."""
+        with self._lock:
+            self._index.close()
+
+class ArchiveRecord:
+    """
+    One archived response being written. The raw JSON body is compressed as
+    it arrives, wrapped in the same {"page", "params", "fetched_at", "data"}
+    record that append() writes, so only the compressed bytes are held.
+    """
+
+    def __init__(self, archive: PageArchive, page: Optional[int], params: Optional[Dict[str, Any]] = None):
+        self._archive = archive
+        self.page = page
+        self.params = params or {}
+        self.fetched_at = datetime.now(timezone.utc)
+        self._compressor = zlib.compressobj(wbits=GZIP_WBITS)
+        self._parts: List[bytes] = []
+        header = json.dumps({"page": page, "params": self.params, "fetched_at": self.fetched_at.isoformat()},
+                            separators=(',', ':'))
+        self._compress(header[:-1].encode('utf-8') + b',"data":')
+
+    def _compress(self, data: bytes) -> None:
+        self._parts.append(self._compressor.compress(data))
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Add raw bytes of the JSON body. Newlines outside strings are plain
+        whitespace in JSON (inside strings they are escaped), so they are
+        blanked to keep the record on one JSONL line.
+        """
+        self._compress(chunk.translate(_LINE_BREAKS))
+
+    def commit(self, item_count: int, dates: Iterable[Optional[int]] = ()) -> None:
+        """
+        Finish the record and append it to the archive.
+
+        Args:
+            item_count: Number of results in the response
+            dates: Release dates (epoch seconds) of the items, for the index
+        """
+        self._compress(b'}\n')
+        self._parts.append(self._compressor.flush())
+        self._archive._store(b''.join(self._parts), self.fetched_at, self.page, self.params, item_count, dates)
+        self._parts = []
+
+def read_pages(directory: str, entries: Iterable[Tuple[str, int, int]]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the page records stored at the given (segment, offset, length)
+    entries. Needs no index connection, so it can run in worker processes.
+    """
+    handles = {}
+    try:
+        for segment, offset, length in entries:
+            f = handles.get(segment)
+            if f is None:
+                f = handles[segment] = open(os.path.join(directory, segment), 'rb')
+            f.seek(offset)
+            yield json.loads(gzip.decompress(f.read(length)))
+    finally:
+        for f in handles.values():
+            f.close()
@@ -0,0 +1,202 @@
+"""
+Compiled term matching for DOJ press releases.
+
+Every category (statute, crypto, ...) is compiled once into a matcher that
+checks a body in a fixed order of increasingly expensive passes:
+
+1. Literal terms, as substring checks on the lowercased body.
+2. Regular expression patterns. Each pattern is gated on the literal anchors
+   every match must contain (e.g. "1956" in a citation regex), so a pattern
+   only scans the body when one of its anchors is present.
+3. Fuzzy terms, scored with rapidfuzz partial_ratio using a score cutoff so
+   hopeless alignments are abandoned early. Each term is only scored on the
+   windows around occurrences of a two-character anchor (the start of its
+   longest word), and falls back to scoring the whole body when the anchor is
+   so common that the windows would cost more than one full scan.
+
+Each pass only considers categories that are still unresolved, so a body that
+mentions an exact term never reaches the fuzzy pass for that category, and a
+watchlist of many citation-style statutes mostly costs a handful of substring
+checks per body.
+"""
+import re
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from rapidfuzz import fuzz
+from utils.logging_config import get_logger
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse
+
+logger = get_logger(__name__)
+
+# Minimum partial_ratio score (exclusive) for a fuzzy term to count as a match
+FUZZY_THRESHOLD = 80
+
+# Stand-in for text outside a fuzzy window; never occurs in a lowercased body
+_WINDOW_PAD = '\x00'
+
+_REPEATS = {sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, 'POSSESSIVE_REPEAT', None)}
+
+def _sequence_anchors(items) -> Optional[FrozenSet[str]]:
+    """
+    Return a set of literals one of which every match of the parsed sequence
+    contains, preferring the set whose shortest literal is longest, or None.
+    """
+    best: Optional[FrozenSet[str]] = None
+
+    def consider(candidate):
+        nonlocal best
+        if candidate and all(candidate) and (best is None or min(map(len, candidate)) > min(map(len, best))):
+            best = candidate
+
+    run: List[str] = []
+    for op, av in items:
+        if op is sre_parse.LITERAL:
+            run.append(chr(av))
+            continue
+        consider(frozenset([''.join(run)]))
+        run = []
+        if op is sre_parse.SUBPATTERN:
+            consider(_sequence_anchors(av[-1]))
+        elif op is getattr(sre_parse, 'ATOMIC_GROUP', None):
+            consider(_sequence_anchors(av))
+        elif op is sre_parse.BRANCH:
+            branches = [_sequence_anchors(branch) for branch in av[1]]
+            if all(branches):
+                consider(frozenset().union(*branches))
+        elif op in _REPEATS and av[0] >= 1:
+            consider(_sequence_anchors(av[2]))
+    consider(frozenset([''.join(run)]))
+    return best
+
+def fuzzy_anchor(term: str) -> str:
+    """Return the first two characters of the longest word in a fuzzy term."""
+    return max(term.split() or [term], key=len)[:2]
+
+def anchored_partial_ratio(term: str, anchor: str, text: str, score_cutoff: float) -> float:
+    """
+    partial_ratio of a term against the windows of the text around its anchor.
+
+    Each occurrence of the anchor opens a window reaching one term length
+    before it and two after; overlapping windows are merged and padded so an
+    alignment cannot score higher at a window edge than it would in the full
+    text. When the anchor occurs often enough that scoring the windows would
+    cost more than one full scan, the whole text is scored instead.
+
+    Returns:
+        The best window score above the cutoff, or 0 when there is none
+    """
+    length = len(term)
+    size = len(text)
+    limit = size // (12 * length + 256)
+    starts: List[int] = []
+    position = text.find(anchor)
+    while position != -1:
+        if len(starts) >= limit:
+            return fuzz.partial_ratio(term, text, score_cutoff=score_cutoff)
+        starts.append(position)
+        position = text.find(anchor, position + 1)
+
+    windows: List[List[int]] = []
+    for position in starts:
+        start, end = max(0, position - length), position + 2 * length
+        if windows and start <= windows[-1][1]:
+            windows[-1][1] = end
+        else:
+            windows.append([start, end])
+    for start, end in windows:
+        window = text[start:end]
+        if start > 0:
+            window = _WINDOW_PAD * length + window
+        if end < size:
+            window += _WINDOW_PAD * length
+        score = fuzz.partial_ratio(term, window, score_cutoff=score_cutoff)
+        if score > score_cutoff:
+            return score
+    return 0
+
+def literal_anchors(pattern: str) -> Optional[FrozenSet[str]]:
+    """
+    Lowercased literals one of which every case-insensitive match of the
+    pattern contains, or None if the pattern has no such literal.
+    """
+    try:
+        anchors = _sequence_anchors(sre_parse.parse(pattern))
+    except Exception:
+        return None
+    return frozenset(anchor.lower() for anchor in anchors) if anchors else None
+
+class TermMatcher:
+    """Compiled multi-category matcher."""
+
+    def __init__(self, categories: Dict[str, Dict[str, Any]], fuzzy_threshold: float = FUZZY_THRESHOLD):
+        """
+        Compile the matcher.
+
+        Args:
+            categories: Mapping of category name to a spec with optional keys
+                'patterns' (regular expressions), 'terms' (exact literals) and
+                'fuzzy_terms' (literals also matched approximately)
+            fuzzy_threshold: partial_ratio score a fuzzy term must exceed
+        """
+        self.categories = list(categories)
+        self.fuzzy_threshold = fuzzy_threshold
+
+        # Literal terms, lowercased and shortest first (cheapest to find)
+        self._literals: List[Tuple[str, str]] = []
+        # (category, compiled pattern, anchors) for the gated regex pass
+        self._patterns: List[Tuple[str, Any, Optional[FrozenSet[str]]]] = []
+        # (category, term, anchor) for the fuzzy pass, checked in the order given
+        self._fuzzy_terms: List[Tuple[str, str, str]] = []
+
+        for category, spec in categories.items():
+            terms = {term.lower() for term in spec.get('terms', []) if term}
+            fuzzy_terms = [term.lower() for term in spec.get('fuzzy_terms', []) if term]
+            terms.update(fuzzy_terms)
+            self._literals.extend((category, term) for term in terms)
+            self._fuzzy_terms.extend((category, term, fuzzy_anchor(term)) for term in fuzzy_terms)
+            for pattern in spec.get('patterns', []):
+                self._patterns.append((category, re.compile(pattern, re.IGNORECASE), literal_anchors(pattern)))
+
+        self._literals.sort(key=lambda literal: len(literal[1]))
+
+    def match(self, text: Optional[str], categories: Optional[Iterable[str]] = None) -> Set[str]:
+        """
+        Return the set of categories that match the text.
+
+        Args:
+            text: Text to scan
+            categories: Restrict matching to these categories (default: all)
+        """
+        if not text:
+            return set()
+        wanted = set(categories) if categories is not None else set(self.categories)
+        found: Set[str] = set()
+        lowered = text.lower()
+
+        for category, term in self._literals:
+            if category in wanted and category not in found and term in lowered:
+                found.add(category)
+        if found == wanted:
+            return found
+
+        for category, regex, anchors in self._patterns:
+            if category not in wanted or category in found:
+                continue
+            if anchors is not None and not any(anchor in lowered for anchor in anchors):
+                continue
+            if regex.search(text):
+                found.add(category)
+        if found == wanted:
+            return found
+
+        for category, term, anchor in self._fuzzy_terms:
+            if category not in wanted or category in found:
+                continue
+            score = anchored_partial_ratio(term, anchor, lowered, self.fuzzy_threshold)
+            if score > self.fuzzy_threshold:
+                logger.debug(f"Fuzzy match for '{term}' ({score:.1f})")
+                found.add(category)
+        return found
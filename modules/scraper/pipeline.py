@@ -0,0 +1,109 @@
+"""
+Building blocks for the staged scraper pipeline.
+
+The crawl runs as fetch -> match -> write stages connected by bounded queues.
+A stage that outruns its consumer blocks on the full queue (backpressure), so
+memory stays bounded and every stage runs at the pace of the slowest one.
+StageStats records how each stage spends its time so the bottleneck is visible:
+the stage with the highest utilization is the one the others wait for.
+"""
+import queue
+import threading
+import time
+from typing import Any, Iterable, Optional
+
+# Marks the end of a queue's input
+END = object()
+
+class StageStats:
+    """Thread-safe throughput counters for one pipeline stage."""
+
+    def __init__(self, name: str, workers: int = 1, unit: str = "pages"):
+        """
+        Initialize the counters.
+
+        Args:
+            name: Stage name used in reports
+            workers: Number of threads/processes running the stage in parallel
+            unit: What `items` counts, for reports
+        """
+        self.name = name
+        self.workers = max(workers, 1)
+        self.unit = unit
+        self.items = 0
+        self.busy = 0.0         # Seconds spent doing the stage's work
+        self.blocked = 0.0      # Seconds waiting for room downstream
+        self.starved = 0.0      # Seconds waiting for input upstream
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+    def add(self, items: int = 0, busy: float = 0.0, blocked: float = 0.0, starved: float = 0.0) -> None:
+        """Add to the counters."""
+        with self._lock:
+            self.items += items
+            self.busy += busy
+            self.blocked += blocked
+            self.starved += starved
+
+    def utilization(self) -> float:
+        """Fraction of the stage's worker time spent busy since it started."""
+        elapsed = time.monotonic() - self._started
+        return self.busy / (elapsed * self.workers) if elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """One-line report of the stage's counters."""
+        with self._lock:
+            items, busy, blocked, starved = self.items, self.busy, self.blocked, self.starved
+        elapsed = time.monotonic() - self._started
+        rate = items / elapsed if elapsed > 0 else 0.0
+        capacity = items * self.workers / busy if busy > 0 else 0.0
+        return (f"{self.name:6s} {items:7d} {self.unit} {rate:8.1f}/s "
+                f"(capacity {capacity:8.1f}/s, {self.utilization():4.0%} busy, "
+                f"blocked {blocked:6.1f}s, starved {starved:6.1f}s, x{self.workers})")
+
+def report(stages: Iterable[StageStats]) -> str:
+    """Multi-line report of all stages, naming the bottleneck."""
+    stages = list(stages)
+    lines = [stage.summary() for stage in stages]
+    if stages:
+        bottleneck = max(stages, key=lambda stage: stage.utilization())
+        lines.append(f"Bottleneck: {bottleneck.name} ({bottleneck.utilization():.0%} busy)")
+    return "\n".join(lines)
+
+def put(q: "queue.Queue", item: Any, stats: StageStats, stop: threading.Event) -> bool:
+    """
+    Put an item on a bounded queue, blocking while it is full. Time spent
+    blocked is charged to `stats`. Returns False if the pipeline was stopped.
+    """
+    start = time.monotonic()
+    try:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    finally:
+        stats.add(blocked=time.monotonic() - start)
+
+def get(q: "queue.Queue", stats: StageStats, stop: threading.Event, timeout: Optional[float] = None) -> Any:
+    """
+    Take an item from a queue, blocking while it is empty. Time spent waiting
+    is charged to `stats`. Returns END if the pipeline was stopped, or None if
+    `timeout` elapsed first.
+    """
+    start = time.monotonic()
+    deadline = start + timeout if timeout is not None else None
+    try:
+        while not stop.is_set():
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                return None
+            try:
+                return q.get(timeout=wait)
+            except queue.Empty:
+                continue
+        return END
+    finally:
+        stats.add(starved=time.monotonic() - start)
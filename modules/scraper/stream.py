@@ -0,0 +1,163 @@
+"""
+Incremental decoding of DOJ API pages.
+
+A page response is a JSON object whose `results` array holds the press
+releases. PageStreamDecoder is fed the response text chunk by chunk and
+returns each result as soon as its closing brace has arrived, so a page is
+never materialized as a whole: the buffer holds at most one unfinished result
+plus the latest chunk. It uses the standard library's raw_decode for each
+value, so it accepts exactly the JSON that json.loads accepts.
+"""
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterable, Iterator, List
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+class PageStreamDecoder:
+    """Push decoder for the `results` array of an API page."""
+
+    def __init__(self, key: str = "results"):
+        """
+        Initialize the decoder.
+
+        Args:
+            key: Top-level key of the array to stream
+        """
+        self.key = key
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._current_key = None
+        self.items_seen = 0
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Add a chunk of response text.
+
+        Returns:
+            Results completed by this chunk, in order
+        """
+        if text:
+            self._buffer = self._buffer[self._pos:] + text
+            self._pos = 0
+        items = []
+        while self._step(items):
+            pass
+        return items
+
+    def close(self) -> None:
+        """
+        Signal the end of the response.
+
+        Raises:
+            ValueError: If the response ended before the top-level object did
+        """
+        self._skip_whitespace()
+        if self._state != "done" or self._pos != len(self._buffer):
+            raise ValueError(f"Truncated or malformed API page (decoder state: {self._state})")
+
+    def _skip_whitespace(self) -> None:
+        self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+
+    def _expect(self, *tokens: str) -> str:
+        """Consume one of the single-character tokens, '' if more input is needed."""
+        self._skip_whitespace()
+        if self._pos >= len(self._buffer):
+            return ""
+        char = self._buffer[self._pos]
+        if char not in tokens:
+            raise ValueError(f"Unexpected {char!r} at offset {self._pos} in API page (expected {' or '.join(tokens)})")
+        self._pos += 1
+        return char
+
+    def _decode_value(self):
+        """Decode one complete JSON value, or return (False, None) if it is still incomplete."""
+        self._skip_whitespace()
+        if self._pos >= len(self._buffer):
+            return False, None
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            # Incomplete until proven otherwise; close() reports truncation
+            return False, None
+        if end == len(self._buffer) and not isinstance(value, (dict, list, str)):
+            # A number or literal may continue in the next chunk
+            return False, None
+        self._pos = end
+        return True, value
+
+    def _step(self, items: List[Dict[str, Any]]) -> bool:
+        """Advance the state machine by one token. Returns False when more input is needed."""
+        state = self._state
+        if state == "start":
+            if not self._expect("{"):
+                return False
+            self._state = "key_or_end"
+        elif state in ("key_or_end", "key"):
+            self._skip_whitespace()
+            if state == "key_or_end" and self._buffer[self._pos:self._pos + 1] == "}":
+                self._pos += 1
+                self._state = "done"
+                return True
+            complete, key = self._decode_value()
+            if not complete:
+                return False
+            if not isinstance(key, str):
+                raise ValueError("Object key expected in API page")
+            self._current_key = key
+            self._state = "colon"
+        elif state == "colon":
+            if not self._expect(":"):
+                return False
+            self._state = "array_start" if self._current_key == self.key else "value"
+        elif state == "value":
+            complete, _ = self._decode_value()
+            if not complete:
+                return False
+            self._state = "after_value"
+        elif state == "array_start":
+            if not self._expect("["):
+                return False
+            self._state = "item_or_end"
+        elif state in ("item_or_end", "item"):
+            self._skip_whitespace()
+            if state == "item_or_end" and self._buffer[self._pos:self._pos + 1] == "]":
+                self._pos += 1
+                self._state = "after_value"
+                return True
+            complete, item = self._decode_value()
+            if not complete:
+                return False
+            self.items_seen += 1
+            items.append(item)
+            self._state = "after_item"
+        elif state == "after_item":
+            token = self._expect(",", "]")
+            if not token:
+                return False
+            self._state = "item" if token == "," else "after_value"
+        elif state == "after_value":
+            token = self._expect(",", "}")
+            if not token:
+                return False
+            self._state = "key" if token == "," else "done"
+        else:  # done
+            return False
+        return True
+
+def iter_results(chunks: Iterable[bytes], key: str = "results") -> Iterator[Dict[str, Any]]:
+    """
+    Yield the results of an API page from an iterable of UTF-8 byte chunks.
+
+    Raises:
+        ValueError: If the page is malformed or truncated
+    """
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    decoder = PageStreamDecoder(key)
+    for chunk in chunks:
+        yield from decoder.feed(text_decoder.decode(chunk))
+    yield from decoder.feed(text_decoder.decode(b'', final=True))
+    decoder.close()
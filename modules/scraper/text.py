@@ -0,0 +1,32 @@
+"""
+Plain-text rendering of DOJ press release bodies.
+
+The API delivers bodies as HTML. Ingest derives a compact plain-text copy
+once, and matching, search and the LLM prompts all read that copy instead of
+the markup. Script/style blocks and comments are dropped, block-level tags
+become line breaks, other tags are removed, entities are decoded and runs of
+whitespace are collapsed. The conversion is regex based, so it is cheap
+enough to run on every ingested item.
+"""
+import html
+import re
+
+_DROPPED_BLOCKS = re.compile(r'<(script|style|noscript)\b[^>]*>.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+_BLOCK_TAGS = re.compile(
+    r'</?(?:p|div|br|li|ul|ol|h[1-6]|tr|table|blockquote|section|article|header|footer|pre|hr)\b[^>]*>',
+    re.IGNORECASE
+)
+_TAGS = re.compile(r'<[^>]*>')
+_SPACES = re.compile(r'[^\S\n]+')
+_BLANK_LINES = re.compile(r'\s*\n\s*')
+
+def html_to_text(body: str) -> str:
+    """Render an HTML release body as normalized plain text, one paragraph per line."""
+    if not body:
+        return ""
+    text = _DROPPED_BLOCKS.sub(" ", body)
+    text = _BLOCK_TAGS.sub("\n", text)
+    text = _TAGS.sub("", text)
+    text = html.unescape(text)
+    text = _SPACES.sub(" ", text)
+    return _BLANK_LINES.sub("\n", text).strip()
@@ -0,0 +1,98 @@
+"""
+Statute and term watchlist for the scraper.
+
+Each watchlist entry is a label with the patterns and terms that tag a press
+release with it. The whole watchlist is compiled into one TermMatcher, so every
+label is evaluated in the same passes over a body. Citation-style statutes should
+use 'patterns' or 'terms'; 'fuzzy_terms' are scored individually with rapidfuzz
+and are the only part whose cost grows per term.
+
+A custom watchlist can be loaded from a JSON file with the same shape as
+DEFAULT_WATCHLIST (set WATCHLIST_FILE or pass --watchlist to the scraper).
+"""
+import json
+from typing import Any, Dict, Optional
+from modules.scraper.matching import TermMatcher
+
+# Legacy detection terms, kept as the 1960 and crypto entries
+LAW_VARIATIONS = ["18 USC 1960", "§ 1960", "unlicensed money transmitting"]
+CRYPTO_TERMS = ["Bitcoin", "Ethereum", "crypto", "cryptocurrency"]
+
+LAW_REGEX = r"(18[\s\.U.S.C]*1960|\§\s*1960|unlicensed money transmitting)"
+
+def _usc_citation(title: int, section: int) -> str:
+    """Regex for a U.S. Code citation, e.g. "18 U.S.C. § 1956" or "18 USC 1956(h)"."""
+    return (
+        rf"\b{title}\s*(?:U\.?\s*S\.?\s*C\.?|,?\s*United\s+States\s+Code,?)\s*"
+        rf"(?:§+|sections?|secs?\.)?\s*{section}\b"
+    )
+
+DEFAULT_WATCHLIST: Dict[str, Dict[str, Any]] = {
+    "1960": {
+        "description": "18 USC 1960 - unlicensed money transmitting business",
+        "patterns": [LAW_REGEX],
+        "fuzzy_terms": LAW_VARIATIONS,
+    },
+    "crypto": {
+        "description": "Cryptocurrency terms",
+        "fuzzy_terms": CRYPTO_TERMS,
+    },
+    "1956": {
+        "description": "18 USC 1956 - laundering of monetary instruments",
+        "patterns": [_usc_citation(18, 1956), r"§+\s*1956\b"],
+        "terms": ["laundering of monetary instruments"],
+    },
+    "1957": {
+        "description": "18 USC 1957 - monetary transactions in criminally derived property",
+        "patterns": [_usc_citation(18, 1957), r"§+\s*1957\b"],
+        "terms": ["monetary transactions in criminally derived property",
+                  "monetary transactions in property derived from specified unlawful activity"],
+    },
+    "5330": {
+        "description": "31 USC 5330 - registration of money transmitting businesses",
+        "patterns": [_usc_citation(31, 5330), r"§+\s*5330\b"],
+        "terms": ["failure to register a money transmitting business"],
+    },
+    "5313": {
+        "description": "31 USC 5313 - currency transaction reports",
+        "patterns": [_usc_citation(31, 5313), r"§+\s*5313\b"],
+        "terms": ["currency transaction report"],
+    },
+    "ieepa": {
+        "description": "International Emergency Economic Powers Act",
+        "patterns": [r"\bIEEPA\b", _usc_citation(50, 1705)],
+        "terms": ["international emergency economic powers act"],
+    },
+}
+
+WATCHLIST_KEYS = {"description", "patterns", "terms", "fuzzy_terms"}
+
+def load_watchlist(path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Load a watchlist from a JSON file, or return the default watchlist.
+
+    Raises:
+        ValueError: If the file is not a mapping of labels to entry specs
+    """
+    if not path:
+        return DEFAULT_WATCHLIST
+
+    with open(path, 'r', encoding='utf-8') as f:
+        watchlist = json.load(f)
+
+    if not isinstance(watchlist, dict) or not watchlist:
+        raise ValueError(f"Watchlist {path} must be a non-empty JSON object of label -> entry")
+    for label, spec in watchlist.items():
+        if not isinstance(spec, dict):
+            raise ValueError(f"Watchlist entry '{label}' must be an object")
+        unknown = set(spec) - WATCHLIST_KEYS
+        if unknown:
+            raise ValueError(f"Watchlist entry '{label}' has unknown keys: {', '.join(sorted(unknown))}")
+        for key in ("patterns", "terms", "fuzzy_terms"):
+            if not isinstance(spec.get(key, []), list):
+                raise ValueError(f"Watchlist entry '{label}': '{key}' must be a list")
+    return watchlist
+
+def build_matcher(watchlist: Dict[str, Dict[str, Any]]) -> TermMatcher:
+    """Compile a watchlist into a single matcher."""
+    return TermMatcher(watchlist)
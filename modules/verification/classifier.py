@@ -129,7 +129,8 @@ def store_classification(case_id: str, classification: str, dry_run: bool = Fals
         
         # Update the cases table with the classification
         query = "UPDATE cases SET classification = ? WHERE id = ?"
-        db_manager.execute_query(query, (classification, case_id))
+        with db_manager.transaction() as cursor:
+            cursor.execute(query, (classification, case_id))
         
         logger.info(f"Successfully stored classification '{classification}' for case {case_id}")
         return True
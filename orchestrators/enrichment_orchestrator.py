@@ -4,6 +4,7 @@ Enrichment process orchestration for Project1960.
 import logging
 from typing import List, Optional, Dict, Any
 from utils.database import DatabaseManager
+from utils.migrations import migrate
 from utils.api_client import VeniceAPIClient
 from utils.json_parser import clean_and_parse_json
 from utils.logging_config import get_logger
@@ -26,30 +27,29 @@ class EnrichmentOrchestrator:
         return get_all_schemas()
 
     def setup_enrichment_tables(self) -> None:
-        """Set up all enrichment tables in the database."""
+        """Bring the database schema up to date, including all enrichment tables."""
         logger.info("Setting up enrichment tables in the database...")
-        schemas = get_all_schemas()
-        self.db_manager.create_tables(schemas)
+        migrate(self.db_manager.db_path)
         
     def get_cases_for_enrichment(self, table_name: str, limit: int = 100, verified_1960_only: bool = False) -> List[tuple]:
         """
         Get cases that need enrichment for a specific table.
         Optionally filter for 1960-verified cases only.
         """
-        if not self.db_manager.table_exists('enrichment_activity_log'):
-            log_schema = self.get_all_schemas()['enrichment_activity_log']
-            self.db_manager.execute_query(log_schema)
+        if not self.db_manager.table_exists('enrichment_status'):
+            migrate(self.db_manager.db_path)
 
-        base_query = """
-            SELECT c.id, c.title, c.body, c.url
+        # Walks idx_cases_created (or idx_cases_classification_created) newest
+        # first and skips cases whose enrichment_status primary key lookup
+        # says 'success', stopping once `limit` cases are found. The cost
+        # does not depend on the size of the activity log.
+        base_query = f"""
+            SELECT c.id, c.title, {self.db_manager.case_text_column('c')}, c.url
             FROM cases c
-            LEFT JOIN (
-                SELECT case_id, table_name, status, timestamp,
-                       ROW_NUMBER() OVER (PARTITION BY case_id, table_name ORDER BY timestamp DESC) as rn
-                FROM enrichment_activity_log
-                WHERE table_name = ?
-            ) latest_status ON c.id = latest_status.case_id AND latest_status.rn = 1
-            WHERE (latest_status.status IS NULL OR latest_status.status != 'success')
+            WHERE NOT EXISTS (
+                SELECT 1 FROM enrichment_status s
+                WHERE s.case_id = c.id AND s.table_name = ? AND s.status = 'success'
+            )
         """
         params = [table_name]
         if verified_1960_only:
@@ -66,7 +66,7 @@ class EnrichmentOrchestrator:
     
     def get_case_by_id(self, case_number: str) -> List[tuple]:
         """Get a single case by its case number."""
-        query = "SELECT id, title, body, url FROM cases WHERE number = ?"
+        query = f"SELECT id, title, {self.db_manager.case_text_column()}, url FROM cases WHERE number = ?"
         try:
             result = self.db_manager.execute_query(query, (case_number,))
             if result:
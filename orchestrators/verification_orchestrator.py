@@ -4,6 +4,7 @@ Verification process orchestration for Project1960.
 import logging
 from typing import List, Optional, Dict, Any
 from utils.database import DatabaseManager
+from utils.migrations import migrate
 from utils.logging_config import get_logger
 from modules.verification.classifier import classify_case, store_classification
 
@@ -24,10 +25,10 @@ class VerificationOrchestrator:
             limit: Maximum number of cases to process
             
         Returns:
-            List of (case_id, title, body) tuples
+            List of (case_id, title, plain-text body) tuples
         """
-        query = """
-            SELECT id, title, body
+        query = f"""
+            SELECT id, title, {self.db_manager.case_text_column()}
             FROM cases
             WHERE mentions_1960 = 1
               AND (classification IS NULL OR classification = '' OR classification = 'unknown')
@@ -94,6 +95,8 @@ class VerificationOrchestrator:
             logger.info("Starting REAL processing mode - will make actual API calls")
         
         logger.info(f"Processing limit: {limit} cases")
+        if not dry_run:
+            migrate(self.db_manager.db_path)
         
         # Get cases to process
         cases = self.get_sample_cases(limit)
@@ -1,12 +1,33 @@
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import sqlite3
 import time
-import re
 import os
+import argparse
+import json
+import codecs
+import hashlib
+import unicodedata
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import closing
 from dotenv import load_dotenv
-from rapidfuzz import process, fuzz
 from datetime import datetime
+from utils.case_storage import BODY_COLUMNS, compress_case_bodies
+from utils.config import Config
+from utils.database import apply_storage_profile
+from utils.migrations import migrate
+from utils.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+from modules.scraper import pipeline
+from modules.scraper.archive import PageArchive, read_pages
+from modules.scraper.stream import PageStreamDecoder
+from modules.scraper.text import html_to_text
+from modules.scraper.watchlist import (
+    LAW_VARIATIONS, CRYPTO_TERMS, LAW_REGEX, load_watchlist, build_matcher
+)
 
 # Load environment variables
 load_dotenv()
@@ -15,41 +36,69 @@ load_dotenv()
 BASE_URL = "https://www.justice.gov/news"
 DATABASE_NAME = "doj_cases.db"
 
-DOJ_API_URL = "https://www.justice.gov/api/v1/press_releases.json"
+# Overridable so the scraper can run against benchmarks/fake_doj_api.py
+DOJ_API_URL = os.getenv("DOJ_API_URL", "https://www.justice.gov/api/v1/press_releases.json")
 
-# Local detection terms
-LAW_VARIATIONS = ["18 USC 1960", "§ 1960", "unlicensed money transmitting"]
-CRYPTO_TERMS = ["Bitcoin", "Ethereum", "crypto", "cryptocurrency"]
+# One keep-alive session shared by all fetch threads
+USER_AGENT = "Project1960-scraper (+https://github.com/actuallyrizzn/project1960)"
+_SESSION = None
+_SESSION_POOL_SIZE = 0
+_SESSION_LOCK = threading.Lock()
 
-LAW_REGEX = r"(18[\s\.U.S.C]*1960|\§\s*1960|unlicensed money transmitting)"
+# scraper_state keys holding ETag/Last-Modified for each page URL
+HTTP_CACHE_PREFIX = "http_cache:"
+
+# Results per API page. Pages are decoded as a stream (see fetch_page), so
+# memory per in-flight page stays bounded and larger pages are practical
+PAGE_SIZE = 50
+STREAM_PAGES = True
+STREAM_CHUNK_BYTES = 64 * 1024
+# Set on streamed items with the labels the decoder already matched; items
+# that match nothing are reduced to STREAM_STUB_FIELDS
+PREFILTER_LABELS_KEY = "_labels"
+# Set on items with their plain-text body once it has been derived
+BODY_TEXT_KEY = "_body_text"
+STREAM_STUB_FIELDS = ("uuid", "date", "changed", "created")
+
+# Attempts per page; failures back off exponentially (see AdaptiveRateLimiter)
+FETCH_MAX_RETRIES = 8
+# Seconds to wait for the server to connect or send more of a response
+FETCH_TIMEOUT = 30
+# scraper_state key with the throughput observed by the last run
+THROUGHPUT_STATE_KEY = "throughput"
+
+# Crawl pipeline: pages buffered between stages, pages per write transaction
+PIPELINE_QUEUE_PAGES = 8
+WRITE_BATCH_PAGES = 10
+
+# Incremental sync walks the API newest-first; the API pager is zero-based
+SYNC_SORT_PARAMS = {"sort": "changed", "direction": "DESC"}
+SYNC_FIRST_PAGE = 0
+
+# Optional JSON watchlist overriding the default statute/term labels
+WATCHLIST_FILE = os.getenv("WATCHLIST_FILE")
+
+# Raw API pages are appended here so filtering can be re-run offline
+ARCHIVE_DIR = os.getenv("SCRAPER_ARCHIVE_DIR", "archive")
+ARCHIVE = None
 
 ##################################
 # Database Setup
 ##################################
 def setup_database():
     print("Setting up the database...")
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cases (
-            id TEXT PRIMARY KEY,
-            title TEXT,
-            date TEXT,
-            body TEXT,
-            url TEXT,
-            teaser TEXT,
-            number TEXT,
-            component TEXT,
-            topic TEXT,
-            changed TEXT,
-            created TEXT,
-            mentions_1960 BOOLEAN,
-            mentions_crypto BOOLEAN
-        )
-    ''')
-    conn.commit()
-    conn.close()
-    print("Database setup complete.")
+    # Converts the file to WAL, which later connections inherit
+    apply_storage_profile(sqlite3.connect(DATABASE_NAME)).close()
+    version = migrate(DATABASE_NAME)
+    print(f"Database setup complete (schema version {version}).")
+
+def compress_new_bodies():
+    """Compress the bodies stored by this run when CASE_BODY_COMPRESSION is set."""
+    if Config.CASE_BODY_COMPRESSION == 'none':
+        return
+    compressed = compress_case_bodies(DATABASE_NAME)
+    if compressed:
+        print(f"Compressed {compressed} new case bodies ({Config.CASE_BODY_COMPRESSION}).")
 
 def get_most_recent_date():
     """Get the most recent date from the database to determine where to start scraping."""
@@ -77,39 +126,88 @@ def get_most_recent_date():
 ##################################
 # Local Matching
 ##################################
+# The whole watchlist is compiled into one matcher; exact terms and statute
+# regexes are checked first and the fuzzy variants keep the old
+# partial_ratio > 80 rule.
+WATCHLIST = load_watchlist(WATCHLIST_FILE)
+MATCHER = build_matcher(WATCHLIST)
+
+def use_watchlist(path):
+    """Replace the active watchlist with one loaded from a JSON file."""
+    global WATCHLIST, MATCHER
+    WATCHLIST = load_watchlist(path)
+    MATCHER = build_matcher(WATCHLIST)
+    print(f"Loaded watchlist {path} ({len(WATCHLIST)} labels)")
+
 def check_1960(text):
     """Returns True if text matches 18 USC 1960 or variations."""
-    if re.search(LAW_REGEX, text, re.IGNORECASE):
-        return True
-    match = process.extractOne(text, LAW_VARIATIONS, scorer=fuzz.partial_ratio)
-    if match and match[1] > 80:
-        return True
-    return False
+    return "1960" in MATCHER.match(text, ["1960"])
 
 def check_crypto(text):
     """Returns True if text mentions crypto-related terms."""
-    match = process.extractOne(text, CRYPTO_TERMS, scorer=fuzz.partial_ratio)
-    if match and match[1] > 80:
-        return True
-    return False
+    return "crypto" in MATCHER.match(text, ["crypto"])
 
 ##################################
-# Insert a Single Case
+# Case Rows
 ##################################
-def store_case(item):
-    """Inserts a single DOJ record into SQLite (ignore if ID exists).
-    Returns True if the case was stored, False otherwise."""
+CASE_COLUMNS = [
+    "id", "title", "date", "body", "url", "teaser", "number", "component",
+    "topic", "changed", "created", "mentions_1960", "mentions_crypto", "body_hash",
+    "body_text",
+]
 
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
+INSERT_CASE_SQL = f"""
+    INSERT OR IGNORE INTO cases ({', '.join(CASE_COLUMNS)})
+    VALUES ({', '.join(['?'] * len(CASE_COLUMNS))})
+"""
+
+# Refresh an existing case in place; parameters are the row minus its id, then the id
+UPDATE_CASE_SQL = f"""
+    UPDATE cases SET {', '.join(f'{col} = ?' for col in CASE_COLUMNS[1:])}
+    WHERE id = ?
+"""
+
+# A metadata-only edit leaves case_bodies alone, so a compressed body stays compressed
+METADATA_COLUMNS = [col for col in CASE_COLUMNS[1:] if col not in BODY_COLUMNS]
+UPDATE_METADATA_SQL = f"""
+    UPDATE cases SET {', '.join(f'{col} = ?' for col in METADATA_COLUMNS)}
+    WHERE id = ?
+"""
+
+BACKFILL_TEXT_SQL = "UPDATE cases SET body_text = ?, body_hash = ? WHERE id = ?"
+
+# A case whose body changed is classified again by the verifier
+REVERIFY_CASE_SQL = "UPDATE cases SET classification = NULL WHERE id = ?"
+
+INSERT_LABEL_SQL = "INSERT OR IGNORE INTO case_labels (case_id, label) VALUES (?, ?)"
+
+def body_hash(text):
+    """Hash of a release's plain-text body, insensitive to Unicode normalization and whitespace layout."""
+    normalized = " ".join(unicodedata.normalize("NFC", text or "").split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def item_body_text(item):
+    """Plain text of an API item's HTML body, derived once and cached on the item."""
+    text = item.get(BODY_TEXT_KEY)
+    if text is None:
+        text = item[BODY_TEXT_KEY] = html_to_text(item.get("body") or "")
+    return text
 
-    case_id = item.get("uuid")
-    title = item.get("title", "")
-    date_ = item.get("date", "")
+def build_case_row(item):
+    """Build a `cases` row tuple and its watchlist labels from a DOJ API item.
+    Returns (row, labels), or None if the item matches no watchlist label."""
     body = item.get("body", "")
-    url = item.get("url", "")
-    teaser = item.get("teaser", "")
-    number = item.get("number", "")
+
+    # Every watchlist label is evaluated by the same compiled matcher over
+    # the plain text, unless the streaming decoder already did (see prefilter_item)
+    if PREFILTER_LABELS_KEY in item:
+        labels = item[PREFILTER_LABELS_KEY]
+    else:
+        labels = sorted(MATCHER.match(item_body_text(item)))
+    if not labels:
+        return None
+    mentions_1960 = "1960" in labels
+    mentions_crypto = "crypto" in labels
 
     # Convert component list -> string
     component = ""
@@ -129,43 +227,250 @@ def store_case(item):
     else:
         topic = str(item.get("topic", ""))
 
-    changed = item.get("changed", "")
-    created = item.get("created", "")
+    row = (
+        item.get("uuid"), item.get("title", ""), item.get("date", ""), body,
+        item.get("url", ""), item.get("teaser", ""), item.get("number", ""),
+        component, topic, item.get("changed", ""), item.get("created", ""),
+        mentions_1960, mentions_crypto, body_hash(item_body_text(item)), item_body_text(item)
+    )
+    return row, labels
 
-    # Local checks
-    mentions_1960 = check_1960(body)
-    mentions_crypto = check_crypto(body)
+def write_case_labels(conn, tagged):
+    """Replace the stored labels of each (case_id, labels) pair."""
+    tagged = list(tagged)
+    if not tagged:
+        return
+    conn.executemany("DELETE FROM case_labels WHERE case_id = ?", [(case_id,) for case_id, _ in tagged])
+    conn.executemany(INSERT_LABEL_SQL, [(case_id, label) for case_id, labels in tagged for label in labels])
 
-    # Insert only if it matches at least one
-    if mentions_1960 or mentions_crypto:
-        cursor.execute('''
-            INSERT OR IGNORE INTO cases
-            (id, title, date, body, url, teaser, number, component, topic,
-             changed, created, mentions_1960, mentions_crypto)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            case_id, title, date_, body, url, teaser, number,
-            component, topic, changed, created,
-            mentions_1960, mentions_crypto
-        ))
-        
-        # Check if a row was actually inserted (not ignored due to duplicate)
-        if cursor.rowcount > 0:
-            print(f"Stored NEW match: {title[:60]}... | 1960={mentions_1960} crypto={mentions_crypto}")
-            stored = True
+def _report_row(row, labels, outcome):
+    """Print the outcome for a single matching row."""
+    print(f"{outcome} match: {row[1][:60]}... | labels={','.join(labels)}")
+
+##################################
+# Insert a Single Case
+##################################
+def store_case(conn, item):
+    """Inserts or refreshes a single DOJ record in SQLite (see write_tagged).
+    Returns True if the case was stored or updated, False otherwise."""
+    built = build_case_row(item)
+    if built is None:
+        return False
+
+    stored, _ = store_tagged(conn, [built])
+    return stored > 0
+
+##################################
+# Insert a Whole Page
+##################################
+def tag_results(results):
+    """
+    Run the watchlist matcher over a page of DOJ API items.
+    Returns (built, unmatched): (row, labels) pairs for matching items and
+    the ids of items that match no label.
+    """
+    built = []
+    unmatched = []
+    for item in results:
+        entry = build_case_row(item)
+        if entry is None:
+            unmatched.append(item.get("uuid"))
         else:
-            print(f"Skipped existing match: {title[:60]}... | 1960={mentions_1960} crypto={mentions_crypto}")
-            stored = False
-    else:
-        stored = False
+            built.append(entry)
+    return built, unmatched
 
-    conn.commit()
-    conn.close()
+def store_page(conn, results, checkpoint=None, relabel=False, http_cache=None):
+    """
+    Filter a page of DOJ API items in memory and write all matches in one
+    transaction (see write_tagged for how existing cases are refreshed).
+    When `checkpoint` is given, `last_page` is written in the same
+    transaction, so a page is either fully stored and recorded or not at
+    all. With `relabel`, the labels and mention flags of every item on the
+    page are recomputed, including existing cases that no longer match.
+    `http_cache` is a (key, value) scraper_state entry with the page's HTTP
+    validators, saved in the same transaction so a page is never reported
+    unchanged before it is stored.
+    Returns the number of new or updated cases.
+    """
+    built, unmatched = tag_results(results)
+    stored, _ = store_tagged(conn, built, unmatched, checkpoint=checkpoint, relabel=relabel,
+                             http_cache=http_cache)
     return stored
 
-def get_last_processed_page():
+def store_tagged(conn, built, unmatched=(), checkpoint=None, relabel=False, report=True, http_cache=None):
+    """
+    Write already tagged items (see tag_results) in one transaction.
+    With `relabel`, only existing cases whose labels or mention flags differ
+    from the new tags are rewritten. Returns (new or updated cases,
+    relabeled cases).
+    """
+    with conn:
+        stored, relabeled, outcomes = write_tagged(conn, built, unmatched, checkpoint=checkpoint,
+                                                   relabel=relabel, http_cache=http_cache)
+    if report:
+        for (row, labels), outcome in zip(built, outcomes):
+            _report_row(row, labels, outcome)
+    return stored, relabeled
+
+def _stored_versions(conn, case_ids):
+    """
+    Return {case_id: (changed, body_hash)} for the stored cases. Rows stored
+    before the plain-text body existed get it and their hash backfilled.
+    """
+    if not case_ids:
+        return {}
+    placeholders = ', '.join(['?'] * len(case_ids))
+    versions = {}
+    backfill = []
+    for case_id, changed, stored_hash, body in conn.execute(
+            f"SELECT id, changed, body_hash, CASE WHEN body_text IS NULL OR body_hash IS NULL THEN body END "
+            f"FROM cases WHERE id IN ({placeholders})", list(case_ids)):
+        if body is not None:
+            text = html_to_text(body)
+            stored_hash = body_hash(text)
+            backfill.append((text, stored_hash, case_id))
+        versions[case_id] = (changed, stored_hash)
+    if backfill:
+        conn.executemany(BACKFILL_TEXT_SQL, backfill)
+    return versions
+
+def _is_older(changed, stored_changed):
+    """True if `changed` is an earlier revision than `stored_changed`."""
+    new_ts, stored_ts = parse_timestamp(changed), parse_timestamp(stored_changed)
+    return new_ts is not None and stored_ts is not None and new_ts < stored_ts
+
+def flag_changed_content(conn, case_ids):
+    """
+    Queue cases whose body changed for re-verification (classification is
+    cleared) and re-enrichment (every enrichment table the case was
+    processed into gets a 'stale' activity row and status, so the
+    enrichment picker, which only skips a case whose status is 'success',
+    picks it up again).
+    """
+    params = [(case_id,) for case_id in case_ids]
+    if not params:
+        return
+    conn.executemany(REVERIFY_CASE_SQL, params)
+    tables = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' "
+        "AND name IN ('enrichment_activity_log', 'enrichment_status')")}
+    if 'enrichment_activity_log' in tables:
+        timestamp = datetime.now().isoformat()
+        conn.executemany(
+            """INSERT INTO enrichment_activity_log (timestamp, case_id, table_name, status, notes)
+               SELECT ?, case_id, table_name, 'stale', 'Release body changed'
+               FROM enrichment_activity_log WHERE case_id = ? GROUP BY table_name""",
+            [(timestamp, case_id) for case_id in case_ids]
+        )
+    if 'enrichment_status' in tables:
+        conn.executemany("UPDATE enrichment_status SET status = 'stale' WHERE case_id = ?", params)
+
+def write_tagged(conn, built, unmatched=(), checkpoint=None, relabel=False, http_cache=None):
+    """
+    Write already tagged items inside the caller's transaction.
+
+    Each item is compared with the stored case by its `changed` value and
+    body hash: new cases are inserted, identical ones are skipped without a
+    write, and cases DOJ edited are updated in place. An edit that changed
+    the body also queues the case for re-verification and re-enrichment
+    (see flag_changed_content); a metadata-only edit does not. An older
+    copy of a release (e.g. from the archive) never overwrites a newer one.
+    Returns (new or updated cases, relabeled cases, per-row outcomes).
+    """
+    unmatched = [case_id for case_id in unmatched if case_id]
+    relabeled = 0
+
+    existing = _stored_versions(conn, {row[0] for row, _ in built})
+
+    outcomes = []
+    seen = dict(existing)
+    new_rows, updated_rows, metadata_rows, content_changed = [], [], [], []
+    for row, labels in built:
+        case_id, changed, new_hash = row[0], row[9], row[13]
+        if case_id not in seen:
+            outcomes.append('Stored NEW')
+            new_rows.append(row)
+        else:
+            stored_changed, stored_hash = seen[case_id]
+            if (stored_changed == changed and stored_hash == new_hash) or _is_older(changed, stored_changed):
+                outcomes.append('Skipped existing')
+                continue
+            if stored_hash != new_hash:
+                outcomes.append('Updated CHANGED')
+                content_changed.append(case_id)
+                updated_rows.append(row[1:] + (case_id,))
+            else:
+                outcomes.append('Updated METADATA')
+                metadata_rows.append(tuple(value for col, value in zip(CASE_COLUMNS, row)
+                                           if col in METADATA_COLUMNS) + (case_id,))
+        # Duplicates within the same page only count once
+        seen[case_id] = (changed, new_hash)
+
+    if relabel:
+        # Compare against the stored tags before any rows are written
+        tags = {case_id: (False, False, ()) for case_id in unmatched}
+        tags.update({row[0]: (row[11], row[12], tuple(labels)) for row, labels in built})
+        changed_tags = _changed_tags(conn, tags)
+
+    if new_rows:
+        conn.executemany(INSERT_CASE_SQL, new_rows)
+    if updated_rows:
+        conn.executemany(UPDATE_CASE_SQL, updated_rows)
+        flag_changed_content(conn, content_changed)
+    if metadata_rows:
+        conn.executemany(UPDATE_METADATA_SQL, metadata_rows)
+    write_case_labels(conn, (
+        (row[0], labels) for (row, labels), outcome in zip(built, outcomes)
+        if outcome != 'Skipped existing'
+    ))
+    if relabel and changed_tags:
+        conn.executemany(
+            "UPDATE cases SET mentions_1960 = ?, mentions_crypto = ? WHERE id = ?",
+            [(mentions_1960, mentions_crypto, case_id)
+             for case_id, (mentions_1960, mentions_crypto, _) in changed_tags.items()]
+        )
+        write_case_labels(conn, ((case_id, labels) for case_id, (_, _, labels) in changed_tags.items()))
+        relabeled = len(changed_tags)
+    if checkpoint is not None:
+        conn.execute(
+            "INSERT OR REPLACE INTO scraper_state (key, value) VALUES (?, ?)",
+            ('last_page', str(checkpoint))
+        )
+    if http_cache is not None:
+        conn.execute("INSERT OR REPLACE INTO scraper_state (key, value) VALUES (?, ?)", http_cache)
+
+    stored = sum(1 for outcome in outcomes if outcome != 'Skipped existing')
+    return stored, relabeled, outcomes
+
+def _changed_tags(conn, tags):
+    """
+    Filter {case_id: (mentions_1960, mentions_crypto, labels)} down to the
+    existing cases whose stored flags or labels differ.
+    """
+    if not tags:
+        return {}
+    placeholders = ', '.join(['?'] * len(tags))
+    ids = list(tags)
+    stored = {
+        case_id: (bool(mentions_1960), bool(mentions_crypto), set())
+        for case_id, mentions_1960, mentions_crypto in conn.execute(
+            f"SELECT id, mentions_1960, mentions_crypto FROM cases WHERE id IN ({placeholders})", ids
+        )
+    }
+    for case_id, label in conn.execute(
+            f"SELECT case_id, label FROM case_labels WHERE case_id IN ({placeholders})", ids):
+        if case_id in stored:
+            stored[case_id][2].add(label)
+
+    return {
+        case_id: (mentions_1960, mentions_crypto, labels)
+        for case_id, (mentions_1960, mentions_crypto, labels) in tags.items()
+        if case_id in stored
+        and stored[case_id] != (bool(mentions_1960), bool(mentions_crypto), set(labels))
+    }
+
+def get_last_processed_page(conn):
     """Get the last page number that was successfully processed."""
-    conn = sqlite3.connect(DATABASE_NAME)
     cursor = conn.cursor()
     
     # Check if we have a last_page table
@@ -183,140 +488,1166 @@ def get_last_processed_page():
             )
         ''')
         conn.commit()
-        conn.close()
         return 0
     
     cursor.execute('SELECT value FROM scraper_state WHERE key = "last_page"')
     result = cursor.fetchone()
-    last_page = int(result[0]) if result and result[0] else 0
-    
-    conn.close()
-    return last_page
+    return int(result[0]) if result and result[0] else 0
 
-def save_last_processed_page(page):
+def save_last_processed_page(conn, page):
     """Save the last page number that was successfully processed."""
+    with conn:
+        conn.execute('''
+            INSERT OR REPLACE INTO scraper_state (key, value) 
+            VALUES (?, ?)
+        ''', ('last_page', str(page)))
+
+def rescale_crawl_checkpoint(conn, page_size):
+    """
+    Return the crawl checkpoint counted in pages of `page_size`. `last_page`
+    counts pages of the size recorded under `page_size` in scraper_state (50
+    before the size was configurable). When the size changed, the checkpoint
+    is moved to the last new-size page that was fully covered and saved, so
+    no release is skipped; a few are fetched again.
+    """
+    last_page = get_last_processed_page(conn)
+    rows = dict(conn.execute(
+        "SELECT key, value FROM scraper_state WHERE key IN ('last_page', 'page_size')"
+    ).fetchall())
+    previous_size = int(rows.get('page_size') or 50)
+    if 'last_page' not in rows or previous_size == page_size:
+        return last_page
+    rescaled = (last_page + 1) * previous_size // page_size - 1
+    with conn:
+        conn.executemany("INSERT OR REPLACE INTO scraper_state (key, value) VALUES (?, ?)",
+                         [('last_page', str(rescaled)), ('page_size', str(page_size))])
+    print(f"Page size changed from {previous_size} to {page_size}: checkpoint moved from page {last_page} to {rescaled}")
+    return rescaled
+
+def parse_timestamp(value):
+    """Convert a DOJ `date`/`changed` value (epoch seconds or ISO string) to an int."""
+    if value in (None, ""):
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return int(datetime.fromisoformat(str(value)).timestamp())
+    except ValueError:
+        return None
+
+def get_sync_watermark(conn):
+    """
+    Get the newest `changed` timestamp known to be fully synced.
+    Falls back to the newest stored `changed`/`date` value before the first sync.
+    """
+    row = conn.execute(
+        "SELECT value FROM scraper_state WHERE key = 'sync_watermark'"
+    ).fetchone()
+    if row and row[0]:
+        return int(row[0])
+
+    watermark = None
+    for changed, date_ in conn.execute("SELECT changed, date FROM cases"):
+        ts = parse_timestamp(changed) or parse_timestamp(date_)
+        if ts and (watermark is None or ts > watermark):
+            watermark = ts
+    return watermark
+
+##################################
+# Page Fetching
+##################################
+class FetchedPage(list):
+    """
+    Results of one API page. `not_modified` is set when the server answered
+    304 to a conditional request; `cache_entry` is the (scraper_state key,
+    value) pair of HTTP validators to save once the page has been stored.
+    """
+    not_modified = False
+    cache_entry = None
+
+def get_session(pool_size=1):
+    """Return the shared keep-alive session, sized for `pool_size` concurrent requests."""
+    global _SESSION, _SESSION_POOL_SIZE
+    with _SESSION_LOCK:
+        if _SESSION is None or pool_size > _SESSION_POOL_SIZE:
+            if _SESSION is not None:
+                _SESSION.close()
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(pool_size, 1))
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "Accept": "application/json",
+                "Accept-Encoding": "gzip, deflate",
+                "User-Agent": USER_AGENT,
+            })
+            _SESSION = session
+            _SESSION_POOL_SIZE = max(pool_size, 1)
+        return _SESSION
+
+def load_http_validators(conn):
+    """
+    Load the stored ETag/Last-Modified of every page URL, keyed by cache
+    key, so a crawl reads them once instead of once per page.
+    """
+    try:
+        rows = conn.execute("SELECT key, value FROM scraper_state WHERE key GLOB ?",
+                            (HTTP_CACHE_PREFIX + '*',)).fetchall()
+    except sqlite3.OperationalError:
+        return {}
+    validators = {}
+    for key, value in rows:
+        try:
+            validators[key] = json.loads(value) if value else {}
+        except ValueError:
+            pass
+    return validators
+
+def configure_fetch(page_size=None, stream=None):
+    """Set the API page size and whether pages are decoded as a stream."""
+    global PAGE_SIZE, STREAM_PAGES
+    if page_size is not None:
+        PAGE_SIZE = page_size
+    if stream is not None:
+        STREAM_PAGES = stream
+
+def prefilter_item(item):
+    """
+    Match a freshly decoded item while its body is still a single string.
+    Matching items are kept whole with their labels attached; the rest are
+    reduced to a stub with the fields pagination and sync need, so their
+    bodies can be freed before the rest of the page arrives.
+    """
+    labels = sorted(MATCHER.match(item_body_text(item)))
+    if labels:
+        item[PREFILTER_LABELS_KEY] = labels
+        return item
+    stub = {field: item[field] for field in STREAM_STUB_FIELDS if field in item}
+    stub[PREFILTER_LABELS_KEY] = []
+    return stub
+
+def decode_page_stream(response, page, params):
+    """
+    Decode a streamed 200 response item by item (see prefilter_item). The
+    raw bytes are compressed into the archive as they arrive, so neither the
+    body nor the decoded page is ever held whole.
+    Raises RequestException or ValueError if the body is cut short or malformed.
+    """
+    decoder = PageStreamDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    record = ARCHIVE.open_record(page, params) if ARCHIVE is not None else None
+    results = FetchedPage()
+    dates = []
+
+    def consume(items):
+        for item in items:
+            dates.append(parse_timestamp(item.get("date")))
+            results.append(prefilter_item(item))
+
+    for chunk in response.iter_content(STREAM_CHUNK_BYTES):
+        if record is not None:
+            record.write(chunk)
+        consume(decoder.feed(text_decoder.decode(chunk)))
+    consume(decoder.feed(text_decoder.decode(b'', final=True)))
+    decoder.close()
+
+    if record is not None and results:
+        try:
+            record.commit(len(results), dates)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: could not archive page {page}: {e}")
+    return results
+
+def fetch_page(page, limiter: AdaptiveRateLimiter, max_retries=FETCH_MAX_RETRIES, extra_params=None,
+               validators=None):
+    """
+    Fetch a single page of results from the DOJ API.
+    Returns a FetchedPage with the results (empty when past the last page,
+    or flagged `not_modified` when a conditional request got a 304),
+    or None if the page could not be fetched.
+
+    With STREAM_PAGES the body is decoded as it arrives and items that match
+    no watchlist label come back as stubs without a body (see prefilter_item).
+
+    429/5xx responses and transport errors, including a body cut short, are
+    retried: the limiter halves its rate and pauses for Retry-After or an
+    exponential backoff with jitter. Other error statuses are not retried.
+    The limiter is shared by every fetch of a run (see create_limiter).
+    With `validators` (see load_http_validators), a page fetched before is
+    requested conditionally; without them every request is unconditional.
+    """
+    params = {"pagesize": PAGE_SIZE, "page": page}
+    if extra_params:
+        params.update(extra_params)
+    url = requests.Request('GET', DOJ_API_URL, params=sorted(params.items())).prepare().url
+    cache_key = HTTP_CACHE_PREFIX + url
+
+    headers = {}
+    stored = (validators or {}).get(cache_key) or {}
+    if stored.get("etag"):
+        headers["If-None-Match"] = stored["etag"]
+    if stored.get("last_modified"):
+        headers["If-Modified-Since"] = stored["last_modified"]
+
+    session = get_session()
+
+    results = data = error_text = None
+    for attempt in range(1, max_retries + 1):
+        limiter.acquire()
+        try:
+            print(f"Fetching page {page} (attempt {attempt}/{max_retries})...")
+            response = session.get(url, headers=headers, timeout=FETCH_TIMEOUT, stream=STREAM_PAGES)
+            # Closing hands a streamed connection back to the pool whatever the status
+            with response:
+                if response.status_code == 200 and STREAM_PAGES:
+                    results = decode_page_stream(response, page, params)
+                elif response.status_code == 200:
+                    data = response.json()
+                    results = FetchedPage(data.get("results", []))
+                elif response.status_code != 304 and response.status_code != 429 and response.status_code < 500:
+                    error_text = response.text[:200]
+        except (requests.exceptions.RequestException, ValueError) as e:
+            pause = limiter.on_throttle()
+            print(f"Request error on page {page}: {e}; backing off {pause:.1f}s (attempt {attempt}/{max_retries})")
+            continue
+
+        if response.status_code == 429 or response.status_code >= 500:
+            pause = limiter.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+            rate = f"{limiter.current_rate:.2f} requests/sec" if limiter.current_rate else "unlimited"
+            print(f"HTTP {response.status_code} on page {page}; backing off {pause:.1f}s, rate now {rate} "
+                  f"(attempt {attempt}/{max_retries})")
+            continue
+
+        limiter.on_success()
+        break
+    else:
+        print(f"Failed to fetch page {page} after {max_retries} attempts")
+        return None
+
+    if response.status_code == 304:
+        print(f"Page {page} not modified since the last fetch.")
+        unchanged = FetchedPage()
+        unchanged.not_modified = True
+        return unchanged
+
+    if response.status_code != 200:
+        print(f"Error fetching page {page}: {response.status_code}")
+        print(f"Response content: {error_text}...")
+        return None
+
+    if ARCHIVE is not None and results and not STREAM_PAGES:
+        try:
+            ARCHIVE.append(page, data, params, dates=(parse_timestamp(item.get("date")) for item in results))
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: could not archive page {page}: {e}")
+
+    fresh = {}
+    if response.headers.get("ETag"):
+        fresh["etag"] = response.headers["ETag"]
+    if response.headers.get("Last-Modified"):
+        fresh["last_modified"] = response.headers["Last-Modified"]
+    if fresh:
+        results.cache_entry = (cache_key, json.dumps(fresh))
+    return results
+
+def create_limiter(max_rps):
+    """Build the adaptive limiter, starting from the rate the last run settled at."""
     conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT OR REPLACE INTO scraper_state (key, value) 
-        VALUES (?, ?)
-    ''', ('last_page', str(page)))
-    
-    conn.commit()
-    conn.close()
+    with closing(conn):
+        try:
+            row = conn.execute(
+                "SELECT value FROM scraper_state WHERE key = ?", (THROUGHPUT_STATE_KEY,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+    try:
+        state = json.loads(row[0]) if row and row[0] else {}
+    except ValueError:
+        state = {}
+    initial_rate = state.get("current_rps") if state.get("target_rps") == max_rps else None
+    return AdaptiveRateLimiter(max_rps, initial_rate=initial_rate)
+
+def save_throughput(conn, limiter):
+    """Record the throughput observed by this run in scraper_state."""
+    state = {
+        "observed_rps": round(limiter.observed_rate(), 3),
+        "current_rps": limiter.current_rate,
+        "target_rps": limiter.target_rate,
+        "requests": limiter.successes,
+        "throttled": limiter.throttled,
+        "recorded_at": datetime.now().isoformat(timespec='seconds'),
+    }
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO scraper_state (key, value) VALUES (?, ?)",
+            (THROUGHPUT_STATE_KEY, json.dumps(state))
+        )
+    rate = f"{limiter.current_rate:.2f}" if limiter.current_rate else "unlimited"
+    print(f"Observed throughput: {state['observed_rps']} requests/sec "
+          f"({limiter.throttled} throttled, rate settled at {rate})")
 
 ##################################
 # Full Crawl with Indefinite Pagination
 ##################################
-def fetch_all(wait_sec=2):
+def _timed_fetch(stats, page, limiter, validators):
+    """Fetch stage worker: fetch one page and charge the time to `stats`."""
+    start = time.monotonic()
+    try:
+        return fetch_page(page, limiter, validators=validators)
+    finally:
+        stats.add(items=1, busy=time.monotonic() - start)
+
+def _match_stage(match_queue, write_queue, stats, stop, errors, pool=None):
+    """Matcher stage: tag fetched pages and hand them to the writer."""
+    try:
+        while True:
+            entry = pipeline.get(match_queue, stats, stop)
+            if entry is pipeline.END:
+                return
+            page, results = entry
+            start = time.monotonic()
+            if pool is not None:
+                built, unmatched = pool.submit(tag_results, list(results)).result()
+            else:
+                built, unmatched = tag_results(results)
+            stats.add(items=1, busy=time.monotonic() - start)
+            if not pipeline.put(write_queue, (page, results, built, unmatched), stats, stop):
+                return
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+
+def _write_stage(conn, write_queue, stats, stop, errors, progress):
     """
-    Fetch results from the DOJ API (pagesize=50), page by page.
+    Writer stage: the only thread that touches the database. Drains up to
+    WRITE_BATCH_PAGES tagged pages per transaction and advances the
+    `last_page` checkpoint over the contiguous run of written pages in the
+    same transaction.
+    """
+    try:
+        done = False
+        while not done:
+            entry = pipeline.get(write_queue, stats, stop)
+            if entry is pipeline.END:
+                return
+            batch = [entry]
+            while len(batch) < WRITE_BATCH_PAGES:
+                try:
+                    entry = write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is pipeline.END:
+                    done = True
+                    break
+                batch.append(entry)
+
+            start = time.monotonic()
+            written = []
+            with conn:
+                for page, results, built, unmatched in batch:
+                    stored, _, outcomes = write_tagged(
+                        conn, built, unmatched, http_cache=getattr(results, 'cache_entry', None)
+                    )
+                    written.append((page, built, outcomes, stored))
+                    progress['completed'].add(page)
+
+                # Advance the checkpoint over contiguous completed pages only
+                previous_checkpoint = progress['checkpoint']
+                while progress['checkpoint'] + 1 in progress['completed']:
+                    progress['checkpoint'] += 1
+                    progress['completed'].discard(progress['checkpoint'])
+                if progress['checkpoint'] != previous_checkpoint:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO scraper_state (key, value) VALUES (?, ?)",
+                        [('last_page', str(progress['checkpoint'])), ('page_size', str(PAGE_SIZE))]
+                    )
+            stats.add(items=len(batch), busy=time.monotonic() - start)
+
+            for page, built, outcomes, stored in written:
+                for (row, labels), outcome in zip(built, outcomes):
+                    _report_row(row, labels, outcome)
+                progress['stored'] += stored
+                print(f"Stored {stored} new matches from page {page}")
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+
+def fetch_all(wait_sec=2, concurrency=1, max_rps=None, match_workers=1):
+    """
+    Fetch results from the DOJ API (PAGE_SIZE results per page), page by page.
     Start from the last processed page to avoid re-processing.
     Stop only when we hit an empty 'results' or a request error.
-    Each page is locally filtered for 1960/crypto mentions before storing.
+
+    The crawl runs as a staged pipeline connected by bounded queues:
+    up to `concurrency` fetcher threads (capped globally by `max_rps`,
+    default one request per `wait_sec`) feed `match_workers` matchers
+    (a process pool when more than one), which feed a single writer that
+    batches several pages per transaction. Streamed pages arrive already
+    matched (see prefilter_item), leaving the matchers only to build rows;
+    with --no-stream they do the matching. A full queue blocks the stage
+    before it, and per-stage counters show which stage is the bottleneck.
+    Pages may finish out of order; `last_page` only advances over the
+    contiguous run of written pages so a resumed crawl never skips one.
     """
+    # One connection for the whole crawl: read up front, then used only by the writer thread
+    conn = sqlite3.connect(DATABASE_NAME, check_same_thread=False)
     # Start from the last processed page + 1
-    start_page = get_last_processed_page() + 1
-    page = start_page
+    start_page = rescale_crawl_checkpoint(conn, PAGE_SIZE) + 1
+    validators = load_http_validators(conn)
+    if not max_rps and wait_sec:
+        max_rps = 1.0 / wait_sec
+    limiter = create_limiter(max_rps)
+    get_session(pool_size=concurrency)
+
     total_fetched = 0
-    total_stored = 0
+    total_not_modified = 0
     oldest_date = None
     newest_date = None
 
+    next_page = start_page
+    stop_page = None        # First page that was empty or failed
+    in_flight = {}
+
+    fetch_stats = pipeline.StageStats("fetch", workers=concurrency)
+    match_stats = pipeline.StageStats("match", workers=match_workers)
+    write_stats = pipeline.StageStats("write")
+    match_queue = queue.Queue(maxsize=PIPELINE_QUEUE_PAGES)
+    write_queue = queue.Queue(maxsize=PIPELINE_QUEUE_PAGES)
+    stop = threading.Event()
+    errors = []
+    progress = {'checkpoint': start_page - 1, 'completed': set(), 'stored': 0}
+
     print(f"Starting scrape from page {start_page} (last processed: {start_page - 1})...")
+    print(f"Concurrency: {concurrency}, match workers: {match_workers}, "
+          f"max rate: {max_rps or 'unlimited'} requests/sec, page size: {PAGE_SIZE}"
+          f"{' (streamed)' if STREAM_PAGES else ''}")
 
-    while True:
-        params = {"pagesize": 50, "page": page}
-        
-        # Add timeout and retry logic
-        max_retries = 3
-        retry_count = 0
-        
-        while retry_count < max_retries:
-            try:
-                print(f"Fetching page {page} (attempt {retry_count + 1}/{max_retries})...")
-                response = requests.get(DOJ_API_URL, params=params, timeout=30)
-                break  # Success, exit retry loop
-            except requests.exceptions.Timeout:
-                retry_count += 1
-                if retry_count < max_retries:
-                    print(f"Timeout on page {page}, retrying in 5 seconds... (attempt {retry_count + 1}/{max_retries})")
-                    time.sleep(5)
-                else:
-                    print(f"Failed to fetch page {page} after {max_retries} attempts due to timeout")
-                    print(f"Stopping crawl due to persistent timeout.")
-                    return
-            except requests.exceptions.RequestException as e:
-                retry_count += 1
-                if retry_count < max_retries:
-                    print(f"Request error on page {page}: {e}, retrying in 5 seconds... (attempt {retry_count + 1}/{max_retries})")
-                    time.sleep(5)
-                else:
-                    print(f"Failed to fetch page {page} after {max_retries} attempts: {e}")
-                    print(f"Stopping crawl due to persistent request error.")
-                    return
-        
-        if response.status_code != 200:
-            print(f"Error fetching page {page}: {response.status_code}")
-            print(f"Response content: {response.text[:200]}...")
-            print(f"Stopping crawl due to API error.")
-            break
-
-        data = response.json()
-        results = data.get("results", [])
-        if not results:
-            print(f"No more results at page {page}. Ending crawl.")
-            break
-
-        total_fetched += len(results)
-        print(f"Fetched {len(results)} results on page {page} (total fetched: {total_fetched})")
-
-        # Track oldest/newest dates
-        for item in results:
-            item_date = item.get("date", None)
-            if item_date:
-                if not oldest_date or item_date < oldest_date:
-                    oldest_date = item_date
-                if not newest_date or item_date > newest_date:
-                    newest_date = item_date
-
-        # Store cases if they match our criteria
-        page_stored = 0
-        for item in results:
-            if store_case(item):
-                page_stored += 1
-                total_stored += 1
-        print(f"Stored {page_stored} new matches from page {page}")
-        
-        # Save this page as successfully processed
-        save_last_processed_page(page)
-
-        page += 1
-        # Polite wait to avoid hitting the API too fast
-        time.sleep(wait_sec)
+    pool = (ProcessPoolExecutor(match_workers, initializer=_init_retag_worker, initargs=(WATCHLIST,))
+            if match_workers > 1 else None)
+    matchers = [
+        threading.Thread(target=_match_stage, name=f"match-{i}",
+                         args=(match_queue, write_queue, match_stats, stop, errors, pool))
+        for i in range(match_workers)
+    ]
+    writer = threading.Thread(target=_write_stage, name="write",
+                              args=(conn, write_queue, write_stats, stop, errors, progress))
+    for thread in matchers + [writer]:
+        thread.start()
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while not stop.is_set():
+                # Keep the request window full until the end of the data is known
+                while stop_page is None and len(in_flight) < concurrency:
+                    future = executor.submit(_timed_fetch, fetch_stats, next_page, limiter, validators)
+                    in_flight[future] = next_page
+                    next_page += 1
+
+                if not in_flight:
+                    break
 
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = in_flight.pop(future)
+                    results = future.result()
+
+                    if results is None:
+                        print(f"Stopping crawl due to persistent error on page {page}.")
+                        stop_page = page if stop_page is None else min(stop_page, page)
+                        continue
+                    not_modified = getattr(results, 'not_modified', False)
+                    if not results and not not_modified:
+                        print(f"No more results at page {page}. Ending crawl.")
+                        stop_page = page if stop_page is None else min(stop_page, page)
+                        continue
+
+                    if not_modified:
+                        # Already stored when its validators were saved; only the checkpoint moves
+                        total_not_modified += 1
+                    else:
+                        total_fetched += len(results)
+                        print(f"Fetched {len(results)} results on page {page} (total fetched: {total_fetched})")
+
+                    # Track oldest/newest dates
+                    for item in results:
+                        item_date = item.get("date", None)
+                        if item_date:
+                            if not oldest_date or item_date < oldest_date:
+                                oldest_date = item_date
+                            if not newest_date or item_date > newest_date:
+                                newest_date = item_date
+
+                    pipeline.put(match_queue, (page, results), fetch_stats, stop)
+
+        # Drain the pipeline: matchers first, then the writer
+        for _ in matchers:
+            pipeline.put(match_queue, pipeline.END, fetch_stats, stop)
+        for thread in matchers:
+            thread.join()
+        pipeline.put(write_queue, pipeline.END, match_stats, stop)
+        writer.join()
+    finally:
+        stop.set()
+        for thread in matchers + [writer]:
+            thread.join()
+        if pool is not None:
+            pool.shutdown()
+        with closing(conn):
+            save_throughput(conn, limiter)
+
+    if errors:
+        raise errors[0]
+
+    checkpoint = progress['checkpoint']
+    total_stored = progress['stored']
     print(f"\nCrawl complete!")
     print(f"Total items fetched: {total_fetched}")
     print(f"Total new matches stored: {total_stored}")
+    print(f"Pages not modified (304): {total_not_modified}")
     print(f"Oldest date seen: {oldest_date}")
     print(f"Newest date seen: {newest_date}")
-    print(f"Last page processed: {page - 1}")
+    print(f"Last page processed: {checkpoint}")
+    if progress['completed']:
+        print(f"Pages completed past the checkpoint (will be re-fetched next run): {sorted(progress['completed'])}")
+    print("Pipeline stages:")
+    print(pipeline.report([fetch_stats, match_stats, write_stats]))
     if total_stored == 0:
         print("No new matching content found.")
     else:
         print("Check your doj_cases.db for the new stored matches!")
 
+##################################
+# Incremental Sync
+##################################
+def sync_recent(wait_sec=2, max_rps=None):
+    """
+    Walk the DOJ API newest-first (by `changed`) and upsert matching releases
+    until a whole page is no newer than the sync watermark. New releases are
+    inserted and edited releases are refreshed, so a daily run costs a few
+    requests instead of a full traversal. The watermark only advances once a
+    sync reaches already-seen releases, so an interrupted sync is redone.
+    """
+    if not max_rps and wait_sec:
+        max_rps = 1.0 / wait_sec
+    limiter = create_limiter(max_rps)
+
+    conn = sqlite3.connect(DATABASE_NAME)
+    with closing(conn):
+        watermark = get_sync_watermark(conn)
+        if watermark is None:
+            print("No existing records found. Run a full crawl before syncing.")
+            return
+
+        print(f"Syncing releases changed after {datetime.fromtimestamp(watermark)} ({watermark})...")
+        validators = load_http_validators(conn)
+        page = SYNC_FIRST_PAGE
+        newest_seen = watermark
+        total_fetched = 0
+        total_stored = 0
+        caught_up = False
+        # Validators are only saved once the sync completes; otherwise a 304
+        # could end a later sync before the pages it missed were ingested
+        pending_cache = []
+
+        while True:
+            results = fetch_page(page, limiter, extra_params=SYNC_SORT_PARAMS, validators=validators)
+            if results is None:
+                print(f"Stopping sync due to persistent error on page {page}.")
+                break
+            if getattr(results, 'not_modified', False):
+                print(f"Page {page} is unchanged since the last completed sync. Ending sync.")
+                caught_up = True
+                break
+            if not results:
+                print(f"No more results at page {page}. Ending sync.")
+                caught_up = True
+                break
+
+            total_fetched += len(results)
+            if getattr(results, 'cache_entry', None):
+                pending_cache.append(results.cache_entry)
+            stamps = [
+                parse_timestamp(item.get("changed")) or parse_timestamp(item.get("date")) or 0
+                for item in results
+            ]
+            newest_seen = max(newest_seen, max(stamps))
+
+            fresh = [item for item, ts in zip(results, stamps) if ts > watermark]
+            page_stored = store_page(conn, fresh)
+            total_stored += page_stored
+            print(f"Page {page}: {len(fresh)} changed since last sync, {page_stored} new or updated matches")
+
+            if len(fresh) < len(results):
+                # Sorted newest-first, so everything past this point is already synced
+                caught_up = True
+                break
+            page += 1
+
+        if caught_up:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO scraper_state (key, value) VALUES (?, ?)",
+                    ('sync_watermark', str(newest_seen))
+                )
+                conn.executemany("INSERT OR REPLACE INTO scraper_state (key, value) VALUES (?, ?)", pending_cache)
+        save_throughput(conn, limiter)
+
+    print(f"\nSync complete!")
+    print(f"Pages requested: {page - SYNC_FIRST_PAGE + 1}")
+    print(f"Total items fetched: {total_fetched}")
+    print(f"Total new or updated matches: {total_stored}")
+    if caught_up:
+        print(f"Sync watermark: {newest_seen}")
+    else:
+        print("Sync did not reach already-seen releases; the watermark was not advanced.")
+
+##################################
+# Raw Page Archive & Offline Replay
+##################################
+def use_archive(directory):
+    """Append every fetched page to the raw page archive in `directory`."""
+    global ARCHIVE
+    ARCHIVE = PageArchive(directory)
+    print(f"Archiving raw pages to {directory}/ ({ARCHIVE.count()} pages archived so far)")
+
+def replay_archive(directory=None, since=None, until=None):
+    """
+    Re-run filtering and ingest over archived pages without any network access.
+    Pages are replayed in fetch order, so later copies of a release win.
+    Labels and mention flags of every archived item are recomputed with the
+    current watchlist. `since`/`until` restrict the replay to releases dated
+    within that range (epoch seconds).
+    """
+    directory = directory or ARCHIVE_DIR
+    if not os.path.exists(os.path.join(directory, "index.db")):
+        print(f"No page archive found in {directory}/.")
+        return
+
+    archive = PageArchive(directory)
+    total_pages = 0
+    total_items = 0
+    total_stored = 0
+    start = time.monotonic()
+    print(f"Replaying {archive.count()} archived pages from {directory}/...")
+
+    conn = sqlite3.connect(DATABASE_NAME)
+    with closing(conn):
+        for record in archive.iter_pages(since=since, until=until):
+            results = (record.get("data") or {}).get("results") or []
+            if since is not None or until is not None:
+                results = [
+                    item for item in results
+                    if (date_ := parse_timestamp(item.get("date"))) is not None
+                    and (since is None or date_ >= since)
+                    and (until is None or date_ <= until)
+                ]
+            total_pages += 1
+            total_items += len(results)
+            total_stored += store_page(conn, results, relabel=True)
+    archive.close()
+
+    elapsed = time.monotonic() - start
+    print(f"\nReplay complete!")
+    print(f"Pages replayed: {total_pages}")
+    print(f"Items re-tagged: {total_items} ({total_items / elapsed if elapsed else 0:.1f} items/sec)")
+    print(f"Total new or updated matches: {total_stored}")
+
+##################################
+# Parallel Re-tag
+##################################
+# Pages (archive) or cases (cases table) per worker task
+RETAG_ARCHIVE_SHARD_PAGES = 20
+RETAG_CASES_SHARD_SIZE = 1000
+
+def _init_retag_worker(watchlist):
+    """Pool initializer: compile the parent's watchlist in each worker."""
+    global MATCHER
+    MATCHER = build_matcher(watchlist)
+
+def _retag_archive_shard(shard):
+    """Tag the items of a run of archived pages. Returns (built, unmatched, items)."""
+    directory, entries = shard
+    items = []
+    for record in read_pages(directory, entries):
+        items.extend((record.get("data") or {}).get("results") or [])
+    built, unmatched = tag_results(items)
+    return built, unmatched, len(items)
+
+def _retag_cases_shard(shard):
+    """Tag stored case bodies in a rowid range. Returns ({id: tags}, items)."""
+    database, low, high = shard
+    conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    with closing(conn):
+        rows = conn.execute(
+            "SELECT id, body_text, CASE WHEN body_text IS NULL THEN body END FROM cases WHERE rowid BETWEEN ? AND ?",
+            (low, high)
+        ).fetchall()
+    tags = {}
+    for case_id, text, body in rows:
+        labels = tuple(sorted(MATCHER.match(text if text is not None else html_to_text(body or ""))))
+        tags[case_id] = ("1960" in labels, "crypto" in labels, labels)
+    return tags, len(rows)
+
+def _retag_shards(source, directory):
+    """Split the corpus into shards for the worker pool."""
+    if source == 'archive':
+        archive = PageArchive(directory)
+        entries = archive.entries()
+        archive.close()
+        return [
+            (directory, entries[i:i + RETAG_ARCHIVE_SHARD_PAGES])
+            for i in range(0, len(entries), RETAG_ARCHIVE_SHARD_PAGES)
+        ]
+
+    conn = sqlite3.connect(DATABASE_NAME)
+    with closing(conn):
+        low, high = conn.execute("SELECT MIN(rowid), MAX(rowid) FROM cases").fetchone()
+    if low is None:
+        return []
+    return [
+        (DATABASE_NAME, start, start + RETAG_CASES_SHARD_SIZE - 1)
+        for start in range(low, high + 1, RETAG_CASES_SHARD_SIZE)
+    ]
+
+def retag_corpus(source='archive', directory=None, workers=None):
+    """
+    Re-run the watchlist matcher over the whole stored corpus on a process pool.
+
+    `source` is 'archive' (every raw archived release; new matches are
+    inserted) or 'cases' (bodies already in the cases table). Shards are
+    tagged in parallel by read-only workers; this process is the only writer
+    and applies each shard's changed labels and mention flags in one
+    transaction, in shard order, so later archived copies of a release win.
+    Returns the throughput in documents per second.
+    """
+    directory = directory or ARCHIVE_DIR
+    workers = workers or os.cpu_count() or 1
+    if source == 'archive' and not os.path.exists(os.path.join(directory, "index.db")):
+        print(f"No page archive found in {directory}/.")
+        return 0.0
+
+    shards = _retag_shards(source, directory)
+    task = _retag_archive_shard if source == 'archive' else _retag_cases_shard
+    print(f"Re-tagging {source} corpus: {len(shards)} shards on {workers} worker process(es)...")
+
+    total_items = 0
+    total_stored = 0
+    total_relabeled = 0
+    start = time.monotonic()
+
+    pool = multiprocessing.Pool(workers, initializer=_init_retag_worker, initargs=(WATCHLIST,)) if workers > 1 else None
+    results = pool.imap(task, shards) if pool else map(task, shards)
+    conn = sqlite3.connect(DATABASE_NAME)
+    try:
+        with closing(conn):
+            for number, result in enumerate(results, 1):
+                if source == 'archive':
+                    built, unmatched, items = result
+                    stored, relabeled = store_tagged(conn, built, unmatched, relabel=True, report=False)
+                else:
+                    tags, items = result
+                    with conn:
+                        changed_tags = _changed_tags(conn, tags)
+                        conn.executemany(
+                            "UPDATE cases SET mentions_1960 = ?, mentions_crypto = ? WHERE id = ?",
+                            [(m1960, mcrypto, case_id) for case_id, (m1960, mcrypto, _) in changed_tags.items()]
+                        )
+                        write_case_labels(conn, ((case_id, labels) for case_id, (_, _, labels) in changed_tags.items()))
+                    stored, relabeled = 0, len(changed_tags)
+
+                total_items += items
+                total_stored += stored
+                total_relabeled += relabeled
+                if number % 50 == 0 or number == len(shards):
+                    elapsed = time.monotonic() - start
+                    print(f"  {number}/{len(shards)} shards, {total_items} documents "
+                          f"({total_items / elapsed if elapsed else 0:.1f} docs/sec)")
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    elapsed = time.monotonic() - start
+    throughput = total_items / elapsed if elapsed else 0.0
+    print(f"\nRe-tag complete!")
+    print(f"Documents tagged: {total_items} in {elapsed:.1f}s ({throughput:.1f} docs/sec, {workers} workers)")
+    print(f"New or updated matches: {total_stored}")
+    print(f"Cases with changed labels/flags: {total_relabeled}")
+    return throughput
+
+##################################
+# Sharded Historical Backfill
+##################################
+# Oldest first by creation time: releases published during the backfill land
+# on the last page, so no page's contents shift under a running shard
+BACKFILL_SORT_PARAMS = {"sort": "created", "direction": "ASC"}
+BACKFILL_PLAN_KEY = "backfill_plan"
+BACKFILL_SHARD_PREFIX = "backfill_shard:"
+BACKFILL_QUEUE_PAGES = 32
+
+def find_page_count(limiter):
+    """
+    Count the non-empty API pages (in backfill order) by doubling the page
+    number until a page comes back empty, then bisecting. Costs about
+    2*log2(pages) requests. Returns None if a probe fails.
+    """
+    def has_results(page):
+        results = fetch_page(page, limiter, extra_params=BACKFILL_SORT_PARAMS)
+        if results is None:
+            raise LookupError(page)
+        return len(results) > 0
+
+    try:
+        if not has_results(0):
+            return 0
+        low, high = 0, 1    # low has results; high is the next probe
+        while has_results(high):
+            low, high = high, high * 2
+        while high - low > 1:
+            middle = (low + high) // 2
+            if has_results(middle):
+                low = middle
+            else:
+                high = middle
+    except LookupError as e:
+        print(f"Could not probe page {e.args[0]}; page count unknown.")
+        return None
+    return high
+
+def plan_backfill_shards(page_count, shards):
+    """
+    Split pages [0, page_count) into up to `shards` contiguous ranges of
+    (first_page, last_page). The last range is open-ended (last_page None)
+    so it also picks up releases published while the backfill runs.
+    """
+    shards = max(1, min(shards, page_count or 1))
+    size = -(-max(page_count, 1) // shards)
+    ranges = [(start, start + size - 1) for start in range(0, shards * size, size)][:shards]
+    first, _ = ranges[-1]
+    ranges[-1] = (first, None)
+    return ranges
+
+def load_backfill_plan(conn):
+    """Return the saved backfill plan and its shard states, or (None, {})."""
+    rows = dict(conn.execute(
+        "SELECT key, value FROM scraper_state WHERE key = ? OR key LIKE ?",
+        (BACKFILL_PLAN_KEY, BACKFILL_SHARD_PREFIX + '%')
+    ).fetchall())
+    plan = rows.pop(BACKFILL_PLAN_KEY, None)
+    if plan is None:
+        return None, {}
+    shards = {int(key[len(BACKFILL_SHARD_PREFIX):]): json.loads(value) for key, value in rows.items()}
+    return json.loads(plan), shards
+
+def save_backfill_shard(conn, shard_id, state):
+    """Record a shard's progress inside the caller's transaction."""
+    conn.execute(
+        "INSERT OR REPLACE INTO scraper_state (key, value) VALUES (?, ?)",
+        (f"{BACKFILL_SHARD_PREFIX}{shard_id}", json.dumps(state))
+    )
+
+def _backfill_worker(shard_id, first_page, last_page, settings, out_queue):
+    """
+    Shard process: fetch and tag pages first_page..last_page (or until an
+    empty page) and hand each one to the parent's writer through
+    `out_queue`. Workers never write the database; they archive into their
+    own segment files. Ends with a ('done' or 'failed', shard_id, page)
+    message naming the first page not delivered.
+    """
+    global DOJ_API_URL, MATCHER, ARCHIVE, _SESSION
+    # A forked worker must not reuse the parent's pooled keep-alive sockets
+    _SESSION = None
+    DOJ_API_URL = settings["api_url"]
+    configure_fetch(page_size=settings["page_size"], stream=settings["stream"])
+    MATCHER = build_matcher(settings["watchlist"])
+    if settings["archive_dir"]:
+        ARCHIVE = PageArchive(settings["archive_dir"], segment_prefix=f"pages-shard{shard_id}")
+    limiter = create_limiter(settings["max_rps"])
+
+    page = first_page
+    try:
+        while last_page is None or page <= last_page:
+            results = fetch_page(page, limiter, extra_params=BACKFILL_SORT_PARAMS)
+            if results is None:
+                out_queue.put(('failed', shard_id, page))
+                return
+            if not results:
+                break
+            built, unmatched = tag_results(results)
+            out_queue.put(('page', shard_id, page, built, unmatched, len(results)))
+            page += 1
+        out_queue.put(('done', shard_id, page))
+    except Exception as e:
+        print(f"Backfill shard {shard_id} failed on page {page}: {e}")
+        out_queue.put(('failed', shard_id, page))
+    finally:
+        if ARCHIVE is not None:
+            ARCHIVE.close()
+
+def backfill_history(shards=4, wait_sec=2, max_rps=None, archive_dir=None):
+    """
+    Load the full history with one worker process per range of API pages.
+
+    The first run counts the pages (see find_page_count), splits them into
+    `shards` ranges and saves the plan plus one checkpoint row per shard in
+    scraper_state. Each shard fetches and tags its range in its own process
+    at an equal share of the global rate (`max_rps`, default one request
+    per `wait_sec`); this process is the only writer and stores every page
+    together with its shard's checkpoint in one transaction, a few pages per
+    commit. After a crash or a failed page, rerunning resumes every
+    unfinished shard from its own checkpoint under the saved plan (and its
+    page size). Returns True once every shard has reached its end.
+    """
+    if not max_rps and wait_sec:
+        max_rps = 1.0 / wait_sec
+
+    conn = sqlite3.connect(DATABASE_NAME)
+    with closing(conn):
+        plan, states = load_backfill_plan(conn)
+        if plan is None:
+            print("Planning backfill: counting API pages...")
+            page_count = find_page_count(create_limiter(max_rps))
+            if page_count is None:
+                return False
+            ranges = plan_backfill_shards(page_count, shards)
+            plan = {"page_size": PAGE_SIZE, "page_count": page_count, "sort": BACKFILL_SORT_PARAMS}
+            states = {
+                shard_id: {"first": first, "last": last, "next": first, "done": False}
+                for shard_id, (first, last) in enumerate(ranges)
+            }
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO scraper_state (key, value) VALUES (?, ?)",
+                             (BACKFILL_PLAN_KEY, json.dumps(plan)))
+                for shard_id, state in states.items():
+                    save_backfill_shard(conn, shard_id, state)
+            print(f"Backfill plan: {page_count} pages of {PAGE_SIZE} in {len(states)} shards")
+        else:
+            print(f"Resuming backfill of {plan['page_count']} pages of {plan['page_size']} "
+                  f"({sum(1 for state in states.values() if state['done'])}/{len(states)} shards done)")
+            if plan["page_size"] != PAGE_SIZE:
+                print(f"Using the planned page size {plan['page_size']} instead of {PAGE_SIZE}")
+                configure_fetch(page_size=plan["page_size"])
+
+        pending = {shard_id: state for shard_id, state in states.items() if not state["done"]}
+        if not pending:
+            print("Backfill already complete. Use 'sync' to pick up newer releases.")
+            return True
+
+        settings = {
+            "api_url": DOJ_API_URL,
+            "page_size": PAGE_SIZE,
+            "stream": STREAM_PAGES,
+            "watchlist": WATCHLIST,
+            "archive_dir": archive_dir,
+            "max_rps": max_rps / len(pending) if max_rps else None,
+        }
+        out_queue = multiprocessing.Queue(maxsize=BACKFILL_QUEUE_PAGES)
+        workers = {
+            shard_id: multiprocessing.Process(
+                target=_backfill_worker, name=f"backfill-{shard_id}",
+                args=(shard_id, state["next"], state["last"], settings, out_queue)
+            )
+            for shard_id, state in pending.items()
+        }
+        for shard_id, worker in workers.items():
+            state = pending[shard_id]
+            print(f"Shard {shard_id}: pages {state['next']}..{'end' if state['last'] is None else state['last']}")
+            worker.start()
+
+        running = set(workers)
+        failed = set()
+        total_pages = 0
+        total_items = 0
+        total_stored = 0
+        start = time.monotonic()
+
+        def finish(shard_id, kind, page):
+            running.discard(shard_id)
+            if kind == 'done':
+                pending[shard_id]["done"] = True
+                print(f"Shard {shard_id} complete at page {page}")
+            else:
+                failed.add(shard_id)
+                print(f"Shard {shard_id} stopped at page {page}; rerun backfill to resume it")
+
+        try:
+            while running:
+                try:
+                    messages = [out_queue.get(timeout=1)]
+                except queue.Empty:
+                    # A worker that died without a final message (killed, crashed)
+                    for shard_id in [s for s in running if workers[s].exitcode is not None]:
+                        finish(shard_id, 'failed', pending[shard_id]["next"])
+                    continue
+                while len(messages) < WRITE_BATCH_PAGES:
+                    try:
+                        messages.append(out_queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                with conn:
+                    for message in messages:
+                        kind, shard_id, page = message[:3]
+                        if kind == 'page':
+                            built, unmatched, items = message[3:]
+                            stored, _, _ = write_tagged(conn, built, unmatched)
+                            total_pages += 1
+                            total_items += items
+                            total_stored += stored
+                            pending[shard_id]["next"] = page + 1
+                        else:
+                            finish(shard_id, kind, page)
+                        save_backfill_shard(conn, shard_id, pending[shard_id])
+
+                elapsed = time.monotonic() - start
+                print(f"Backfill: {total_pages} pages, {total_items} items "
+                      f"({total_items / elapsed if elapsed else 0:.1f} items/sec), {total_stored} stored")
+        finally:
+            for worker in workers.values():
+                if running and worker.is_alive():
+                    worker.terminate()
+                worker.join()
+
+    elapsed = time.monotonic() - start
+    complete = not failed
+    print(f"\nBackfill {'complete' if complete else 'interrupted'}!")
+    print(f"Pages: {total_pages}, items: {total_items} in {elapsed:.1f}s "
+          f"({total_items / elapsed if elapsed else 0:.1f} items/sec, {len(workers)} shards)")
+    print(f"Total new or updated matches: {total_stored}")
+    if failed:
+        print(f"Shards to resume: {', '.join(str(shard_id) for shard_id in sorted(failed))}")
+    return complete
+
+##################################
+# Plain-text Body Backfill
+##################################
+BACKFILL_BATCH_SIZE = 500
+
+def backfill_body_text(batch_size=BACKFILL_BATCH_SIZE):
+    """
+    Derive the plain-text body (and its hash) of stored cases that predate
+    it, in rowid order with one transaction per batch. Only rows still
+    missing `body_text` are read, so an interrupted backfill resumes where
+    it stopped. Returns the number of cases backfilled.
+    """
+    conn = sqlite3.connect(DATABASE_NAME)
+    total = 0
+    html_chars = 0
+    text_chars = 0
+    last_rowid = 0
+    start = time.monotonic()
+    with closing(conn):
+        remaining = conn.execute("SELECT COUNT(*) FROM cases WHERE body_text IS NULL").fetchone()[0]
+        print(f"Backfilling plain-text bodies for {remaining} cases...")
+        while True:
+            rows = conn.execute(
+                "SELECT rowid, id, body FROM cases WHERE body_text IS NULL AND rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            updates = []
+            for _, case_id, body in rows:
+                text = html_to_text(body or "")
+                html_chars += len(body or "")
+                text_chars += len(text)
+                updates.append((text, body_hash(text), case_id))
+            with conn:
+                conn.executemany(BACKFILL_TEXT_SQL, updates)
+            total += len(rows)
+            print(f"Backfilled {total}/{remaining} cases")
+
+    elapsed = time.monotonic() - start
+    print(f"\nBackfill complete!")
+    print(f"Cases backfilled: {total} in {elapsed:.1f}s")
+    if html_chars:
+        print(f"Plain text is {text_chars / html_chars:.0%} of the HTML size ({html_chars} -> {text_chars} characters)")
+    return total
+
 def main():
+    parser = argparse.ArgumentParser(description='Scrape DOJ press releases into the Project1960 database')
+    parser.add_argument('command', nargs='?', default='crawl', choices=['crawl', 'sync', 'backfill', 'replay', 'retag', 'backfill-text'],
+                        help='crawl: resume the full paginated crawl; sync: fetch only releases new or changed since the last sync; '
+                             'backfill: load the full history with one process per range of pages (resumable per shard); '
+                             'replay: re-run filtering over the raw page archive without network access; '
+                             'retag: re-tag the whole stored corpus on a process pool; '
+                             'backfill-text: derive the plain-text body of cases stored before it existed')
+    parser.add_argument('--concurrency', type=int, default=1, help='Maximum number of page requests in flight')
+    parser.add_argument('--match-workers', type=int, default=1, help='crawl: matcher processes in the pipeline (1 = match in a thread); '
+                             'streamed pages are already matched while they are decoded, so this pays off with --no-stream')
+    parser.add_argument('--rate', type=float, default=None, help='Global request rate limit in requests/sec (default: 1/--wait)')
+    parser.add_argument('--wait', type=float, default=2, help='Polite wait between requests in seconds when --rate is not set')
+    parser.add_argument('--watchlist', type=str, default=None, help='JSON watchlist of labels to tag (default: WATCHLIST_FILE or built-in)')
+    parser.add_argument('--archive', type=str, default=ARCHIVE_DIR, help='Raw page archive directory (default: SCRAPER_ARCHIVE_DIR or ./archive)')
+    parser.add_argument('--no-archive', action='store_true', help='Do not archive raw pages while crawling or syncing')
+    parser.add_argument('--pagesize', type=int, default=PAGE_SIZE, help='Results per API request (default: 50)')
+    parser.add_argument('--no-stream', action='store_true',
+                        help='Decode each page whole with response.json() and match in the match stage (see --match-workers)')
+    parser.add_argument('--since', type=str, default=None, help='replay: only releases dated on or after this date (YYYY-MM-DD)')
+    parser.add_argument('--until', type=str, default=None, help='replay: only releases dated on or before this date (YYYY-MM-DD)')
+    parser.add_argument('--source', choices=['archive', 'cases'], default='archive',
+                        help='retag: tag every archived release, or only the bodies in the cases table')
+    parser.add_argument('--workers', type=int, default=None, help='retag: worker processes (default: CPU count)')
+    parser.add_argument('--shards', type=int, default=4, help='backfill: page ranges fetched in parallel, one process each (default: 4)')
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1.")
+    if args.match_workers < 1:
+        parser.error("--match-workers must be at least 1.")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1.")
+    if args.shards < 1:
+        parser.error("--shards must be at least 1.")
+    if args.pagesize < 1:
+        parser.error("--pagesize must be at least 1.")
+    configure_fetch(page_size=args.pagesize, stream=not args.no_stream)
+    if args.watchlist:
+        try:
+            use_watchlist(args.watchlist)
+        except (OSError, ValueError) as e:
+            parser.error(f"Could not load watchlist: {e}")
+
+    since = parse_timestamp(args.since)
+    until = parse_timestamp(args.until)
+    if (args.since and since is None) or (args.until and until is None):
+        parser.error("--since/--until must be dates like 2024-01-31.")
+    if until is not None and len(args.until) == 10:
+        until += 24 * 60 * 60 - 1  # Include the whole --until day
+
     setup_database()
     try:
-        fetch_all(wait_sec=2)
-        print("\nCrawl complete. Check your doj_cases.db for stored matches!")
+        if args.command == 'replay':
+            replay_archive(args.archive, since=since, until=until)
+            return
+        if args.command == 'retag':
+            retag_corpus(args.source, args.archive, workers=args.workers)
+            return
+        if args.command == 'backfill-text':
+            backfill_body_text()
+            return
+        if args.command == 'backfill':
+            backfill_history(shards=args.shards, wait_sec=args.wait, max_rps=args.rate,
+                             archive_dir=None if args.no_archive else args.archive)
+            return
+        if not args.no_archive:
+            use_archive(args.archive)
+        if args.command == 'sync':
+            sync_recent(wait_sec=args.wait, max_rps=args.rate)
+        else:
+            fetch_all(wait_sec=args.wait, concurrency=args.concurrency, max_rps=args.rate,
+                      match_workers=args.match_workers)
+            print("\nCrawl complete. Check your doj_cases.db for stored matches!")
     except Exception as e:
         print(f"\nCRITICAL ERROR: Scraper failed with exception: {e}")
         import traceback
         traceback.print_exc()
         print(f"\nScraper stopped due to unhandled exception.")
+    finally:
+        compress_new_bodies()
 
 if __name__ == "__main__":
     main()
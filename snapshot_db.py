@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Database snapshot script.
+Takes a consistent, compressed, integrity-checked snapshot of the live
+database with SQLite's online backup API (utils/snapshots.py) while the
+scraper and enrichment keep writing, and keeps the newest SNAPSHOT_KEEP.
+"""
+import argparse
+import logging
+import os
+import sys
+from utils.config import Config
+from utils.logging_config import setup_logging
+from utils.snapshots import SnapshotScheduler, create_snapshot, latest_snapshot, list_snapshots, verify_snapshot
+
+def print_snapshots(directory=None, db_path=None):
+    """Print the snapshots of the database, newest first."""
+    for path in list_snapshots(directory, db_path):
+        print(f"{os.path.getsize(path) / 1e6:>10.1f} MB  {path}")
+
+def verify(path=None, directory=None, db_path=None):
+    """Verify a snapshot (default: the newest). Returns a process exit code."""
+    path = path or latest_snapshot(directory, db_path)
+    if path is None:
+        print("No snapshots found.")
+        return 1
+    try:
+        verify_snapshot(path)
+    except RuntimeError as e:
+        print(f"FAILED: {e}")
+        return 1
+    print(f"OK: {path}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Take consistent snapshots of the Project1960 database.')
+    parser.add_argument('--db', type=str, default=None, help='Database file (default: DATABASE_NAME)')
+    parser.add_argument('--dir', type=str, default=None, help='Snapshot directory (default: SNAPSHOT_DIR)')
+    parser.add_argument('--keep', type=int, default=None, help='Snapshots to keep (default: SNAPSHOT_KEEP)')
+    parser.add_argument('--every', type=float, metavar='HOURS',
+                        help='Keep running and take a snapshot every HOURS hours')
+    parser.add_argument('--list', action='store_true', help='List existing snapshots, newest first')
+    parser.add_argument('--verify', nargs='?', const='', metavar='FILE',
+                        help='Check the checksum and integrity of a snapshot (default: the newest)')
+    args = parser.parse_args()
+
+    if sum([args.every is not None, args.list, args.verify is not None]) > 1:
+        parser.error("Use only one of --every, --list and --verify.")
+
+    setup_logging()
+    if args.list:
+        print_snapshots(args.dir, args.db)
+    elif args.verify is not None:
+        sys.exit(verify(args.verify or None, args.dir, args.db))
+    elif args.every is not None:
+        scheduler = SnapshotScheduler(args.db, args.dir, interval_hours=args.every, keep=args.keep)
+        logging.getLogger(__name__).info(
+            f"Snapshotting {scheduler.db_path} every {args.every} hours into {scheduler.directory}")
+        try:
+            scheduler.run()
+        except KeyboardInterrupt:
+            pass
+    else:
+        print(create_snapshot(args.db or Config.DATABASE_NAME, args.dir, args.keep))
@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.analytics import REPORTS, export_table, export_tables, exported_years, run_query, run_report
+from utils.database import DatabaseManager, close_connections
+from utils.migrations import migrate
+
+# 2024-02-01 as epoch seconds, as the DOJ API sends it
+FEB_2024 = '1706745600'
+
+@pytest.fixture
+def db(tmp_path):
+    """A migrated database with three cases (one undated), some charges and two forfeitures."""
+    db_path = str(tmp_path / 'doj_cases.db')
+    migrate(db_path)
+    manager = DatabaseManager(db_path)
+    manager.execute_many("INSERT INTO cases (id, title, date, body, body_text) VALUES (?, ?, ?, ?, ?)",
+                         [("a", "Mixer", FEB_2024, "<p>a</p>", "a"), ("b", "Exchange", "2023-05-01", None, None),
+                          ("c", "Undated", "", None, None)])
+    manager.execute_many("INSERT INTO charges (case_id, statute) VALUES (?, ?)",
+                         [("a", "18 U.S.C. 1960"), ("a", "18 U.S.C. 1956"), ("b", "18 U.S.C. 1960")])
+    manager.execute_many("INSERT INTO financial_actions (case_id, action_type, amount) VALUES (?, ?, ?)",
+                         [("a", "Forfeiture", "$1.5 million"), ("b", "forfeiture", "$2,000"), ("b", "Fine", "$10")])
+    manager.execute_query("INSERT INTO case_metadata (case_id, district_office) VALUES ('a', 'SDNY')")
+    yield db_path
+    close_connections()
+
+def changes(db_path):
+    return DatabaseManager(db_path).execute_query("SELECT table_name, year FROM export_changes ORDER BY 1, 2")
+
+class TestChangeTracking:
+    """Writes record the (table, year) partitions they touch."""
+
+    def test_writes_mark_partitions(self, db):
+        manager = DatabaseManager(db)
+        manager.execute_query("DELETE FROM export_changes")
+        manager.execute_query("INSERT INTO charges (case_id, statute) VALUES ('b', '18 U.S.C. 371')")
+        manager.execute_query("UPDATE cases SET classification = 'yes' WHERE id = 'a'")
+        manager.execute_query("UPDATE cases SET body_text = 'not exported' WHERE id = 'c'")
+        manager.execute_query("UPDATE case_records SET title = title")
+        assert changes(db) == [("cases", "2024"), ("charges", "2023")]
+
+    def test_redating_a_case_moves_its_rows(self, db):
+        manager = DatabaseManager(db)
+        manager.execute_query("DELETE FROM export_changes")
+        manager.execute_query("UPDATE cases SET date = '2020-01-01' WHERE id = 'b'")
+        marked = changes(db)
+        assert ("cases", "2020") in marked and ("cases", "2023") in marked
+        assert {("charges", "2020"), ("charges", "2023"), ("financial_actions", "2023")} <= set(marked)
+        # Case b has no themes, so no theme partition changed
+        assert not [table for table, _ in marked if table == 'themes']
+
+    def test_new_case_adopts_orphan_rows(self, db):
+        manager = DatabaseManager(db)
+        manager.execute_query("INSERT INTO themes (case_id, theme_name) VALUES ('d', 'Darknet')")
+        manager.execute_query("DELETE FROM export_changes")
+        manager.execute_query("INSERT INTO cases (id, title, date) VALUES ('e', 'Other', '2022-01-01')")
+        assert changes(db) == [("cases", "2022")]
+        manager.execute_query("INSERT INTO cases (id, title, date) VALUES ('d', 'Darknet', '2022-01-01')")
+        assert changes(db) == [("cases", "2022"), ("themes", "2022"), ("themes", "unknown")]
+
+class TestParquetExport:
+    """Exports rewrite only the changed partitions."""
+
+    @pytest.fixture(autouse=True)
+    def needs_pyarrow(self):
+        pytest.importorskip('pyarrow')
+
+    def test_incremental_export(self, db, tmp_path):
+        out = str(tmp_path / 'analytics')
+        results = export_tables(db, out)
+        assert results['cases'] == (3, 3)
+        assert results['charges'] == (2, 3)
+        assert exported_years(os.path.join(out, 'cases')) == ['2023', '2024', 'unknown']
+        assert changes(db) == []
+        assert export_tables(db, out) == {}
+
+        written = os.path.getmtime(os.path.join(out, 'cases', 'year=2024', 'part.parquet'))
+        DatabaseManager(db).execute_query("UPDATE cases SET date = '2020-06-01' WHERE id = 'b'")
+        results = export_tables(db, out)
+        assert results['cases'] == (1, 1)
+        # b's rows moved from 2023 to 2020, and nothing else was rewritten
+        assert exported_years(os.path.join(out, 'cases')) == ['2020', '2024', 'unknown']
+        assert exported_years(os.path.join(out, 'charges')) == ['2020', '2024']
+        assert os.path.getmtime(os.path.join(out, 'cases', 'year=2024', 'part.parquet')) == written
+
+    def test_write_during_export_is_kept(self, db, tmp_path):
+        out = str(tmp_path / 'analytics')
+        conn = sqlite3.connect(db, isolation_level=None)
+        _, _, done = export_table(conn, 'charges', out)
+        # A write after the rows were read must survive the acknowledgement
+        DatabaseManager(db).execute_query("INSERT INTO charges (case_id, statute) VALUES ('a', '18 U.S.C. 371')")
+        conn.executemany("DELETE FROM export_changes WHERE table_name = ? AND year = ? AND version = ?", done)
+        conn.close()
+        assert ("charges", "2024") in changes(db)
+        assert export_tables(db, out, tables=['charges'])['charges'] == (1, 3)
+
+    def test_full_export_removes_stale_partitions(self, db, tmp_path):
+        out = str(tmp_path / 'analytics')
+        export_tables(db, out)
+        os.makedirs(os.path.join(out, 'cases', 'year=1999'))
+        export_tables(db, out, tables=['cases'], full=True)
+        assert exported_years(os.path.join(out, 'cases')) == ['2023', '2024', 'unknown']
+
+class TestQueries:
+    """DuckDB and pandas give the same answers over the export."""
+
+    @pytest.fixture
+    def export(self, db, tmp_path):
+        pytest.importorskip('pyarrow')
+        out = str(tmp_path / 'analytics')
+        export_tables(db, out)
+        return out
+
+    @pytest.mark.parametrize('report', sorted(REPORTS))
+    def test_reports_agree(self, export, report):
+        pytest.importorskip('duckdb')
+        by_duckdb = run_report(report, export, engine='duckdb')
+        by_pandas = run_report(report, export, engine='pandas')
+        key = list(by_pandas.columns)
+        assert by_duckdb.sort_values(key).values.tolist() == by_pandas.sort_values(key).values.tolist()
+
+    def test_forfeitures_by_district(self, export):
+        result = run_report('forfeitures-by-district', export, engine='pandas')
+        assert result[['district_office', 'total_usd']].values.tolist() == [['SDNY', 1.5e6], ['Unknown', 2000.0]]
+
+    def test_sql_query(self, export):
+        pytest.importorskip('duckdb')
+        result = run_query("SELECT year, COUNT(*) AS cases FROM cases GROUP BY year ORDER BY year", export)
+        assert result.values.tolist() == [['2023', 1], ['2024', 1], ['unknown', 1]]
@@ -0,0 +1,156 @@
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.case_storage import compress_case_bodies, decode_body, encode_body, load_case_body, vacuum
+from utils.database import DatabaseManager, close_connections
+from utils.migrations import LATEST_VERSION, migrate
+from utils.stats import count_stats, read_stats
+
+BODY = "<p>The defendant operated an unlicensed money transmitting business.</p>" * 20
+
+@pytest.fixture
+def temp_db():
+    """Path to an empty temporary database."""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+        db_path = f.name
+    yield db_path
+    close_connections()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.unlink(db_path + suffix)
+
+def columns(conn, table):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+
+def assert_consistent(db_path):
+    """The search index and the dashboard counters match the stored cases."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO cases_fts (cases_fts) VALUES ('integrity-check')")
+    assert read_stats(conn) == count_stats(conn.cursor())
+    conn.close()
+
+class TestCaseSplit:
+    """Migration 11 moves bodies to case_bodies and `cases` keeps working as a view."""
+
+    def test_existing_bodies_move_to_side_table(self, temp_db):
+        migrate(temp_db, target=10)
+        DatabaseManager(temp_db).execute_many(
+            "INSERT INTO cases (id, title, date, body, body_text, mentions_1960) VALUES (?, ?, ?, ?, ?, ?)",
+            [("a", "Bitcoin mixer charged", "2024-01-01", BODY, "unlicensed money transmitting", 1),
+             ("b", "Wire fraud", "2024-01-02", None, None, 0)]
+        )
+        assert migrate(temp_db) == LATEST_VERSION
+
+        conn = sqlite3.connect(temp_db)
+        assert 'body' not in columns(conn, 'case_records')
+        assert 'body_text' not in columns(conn, 'case_records')
+        assert conn.execute("SELECT case_id, body_codec, body = ? FROM case_bodies", (BODY,)).fetchall() == \
+            [("a", "none", 1)]
+        assert conn.execute("SELECT id, rowid, body IS NOT NULL, body_text FROM cases ORDER BY id").fetchall() == \
+            [("a", 1, 1, "unlicensed money transmitting"), ("b", 2, 0, None)]
+        assert conn.execute("SELECT rowid FROM cases_fts WHERE cases_fts MATCH 'transmitting'").fetchall() == [(1,)]
+        conn.close()
+        assert_consistent(temp_db)
+
+    def test_writes_through_view(self, temp_db):
+        migrate(temp_db)
+        manager = DatabaseManager(temp_db)
+        manager.execute_many(
+            "INSERT OR IGNORE INTO cases (id, title, body, body_text, mentions_1960) VALUES (?, ?, ?, ?, ?)",
+            [("a", "Mixer", BODY, "mixer proceeds", 1), ("a", "Duplicate", "<p>x</p>", "duplicate", 0),
+             ("b", "Ransomware", None, None, 1), ("c", "Darknet market", "<p>c</p>", "darknet", 0)]
+        )
+        manager.execute_query("UPDATE cases SET body_text = 'ransomware wallets', body_hash = 'h' WHERE id = 'b'")
+        manager.execute_query("UPDATE cases SET classification = 'yes', verified_1960 = 1 WHERE id = 'a'")
+        manager.execute_query("DELETE FROM cases WHERE id = 'c'")
+        with pytest.raises(sqlite3.IntegrityError):
+            manager.execute_query("UPDATE cases SET id = 'z' WHERE id = 'a'")
+
+        assert manager.execute_query("SELECT id, title, classification, verified_1960, verified_crypto FROM cases") == \
+            [("a", "Mixer", "yes", 1, 0), ("b", "Ransomware", None, 0, 0)]
+        assert manager.execute_query("SELECT case_id, body_text FROM case_bodies ORDER BY case_id") == \
+            [("a", "mixer proceeds"), ("b", "ransomware wallets")]
+        assert_consistent(temp_db)
+
+    def test_list_queries_read_only_case_records(self, temp_db):
+        migrate(temp_db)
+        conn = sqlite3.connect(temp_db)
+        plan = " | ".join(row[3] for row in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id, title, date, classification FROM cases ORDER BY date DESC LIMIT 20"))
+        conn.close()
+        assert 'idx_cases_date' in plan
+        assert 'case_bodies' not in plan
+
+    def test_rerunning_every_migration_is_safe(self, temp_db, caplog):
+        migrate(temp_db)
+        DatabaseManager(temp_db).execute_query(
+            "INSERT INTO cases (id, title, body, body_text) VALUES ('a', 'Mixer', ?, 'mixer')", (BODY,))
+        DatabaseManager(temp_db).execute_query("DELETE FROM schema_version")
+        with caplog.at_level(logging.WARNING):
+            assert migrate(temp_db) == LATEST_VERSION
+        assert 'Skipping index' not in caplog.text
+        assert DatabaseManager(temp_db).execute_query("SELECT title, body_text FROM cases") == [("Mixer", "mixer")]
+        assert_consistent(temp_db)
+
+class TestBodyCompression:
+    """Raw HTML bodies can be stored compressed and are read back transparently."""
+
+    def test_zlib_round_trip(self, temp_db):
+        migrate(temp_db)
+        manager = DatabaseManager(temp_db)
+        manager.execute_many("INSERT INTO cases (id, title, body, body_text) VALUES (?, ?, ?, ?)",
+                             [("a", "Mixer", BODY, "mixer"), ("b", "Legacy", BODY, None)])
+        # Bodies without plain text stay readable in SQL
+        assert compress_case_bodies(temp_db, 'zlib') == 1
+        assert compress_case_bodies(temp_db, 'zlib') == 0
+
+        conn = sqlite3.connect(temp_db)
+        assert conn.execute("SELECT id, body IS NULL, body_text FROM cases ORDER BY id").fetchall() == \
+            [("a", 1, "mixer"), ("b", 0, None)]
+        stored = conn.execute("SELECT LENGTH(body) FROM case_bodies WHERE case_id = 'a'").fetchone()[0]
+        assert stored < len(BODY) / 5
+        assert load_case_body(conn, 'a') == BODY
+        conn.close()
+
+        # A body written through the view is stored plain until the next run
+        manager.execute_query("UPDATE cases SET body = '<p>edited</p>' WHERE id = 'a'")
+        assert manager.execute_query("SELECT body, body_codec FROM case_bodies WHERE case_id = 'a'") == \
+            [("<p>edited</p>", "none")]
+        compress_case_bodies(temp_db, 'zlib')
+        assert compress_case_bodies(temp_db, 'none') == 1
+        assert manager.execute_query("SELECT body FROM cases WHERE id = 'a'") == [("<p>edited</p>",)]
+        close_connections()
+        before, after = vacuum(temp_db)
+        assert after <= before
+        assert_consistent(temp_db)
+
+    def test_zstd_codec(self):
+        pytest.importorskip('zstandard')
+        assert decode_body(encode_body(BODY, 'zstd'), 'zstd') == BODY
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            encode_body(BODY, 'lz4')
+
+    def test_case_page_shows_compressed_body(self, temp_db):
+        import app
+
+        migrate(temp_db)
+        DatabaseManager(temp_db).execute_query(
+            "INSERT INTO cases (id, title, body, body_text) VALUES ('a', 'Mixer', '<p>Mixer <b>body</b></p>', 'mixer')")
+        compress_case_bodies(temp_db, 'zlib')
+        with patch('app.DATABASE_NAME', temp_db), patch('app.start_wal_checkpointer'):
+            client = app.app.test_client()
+            assert b'<p>Mixer <b>body</b></p>' in client.get('/case/a').data
+            page = client.get('/cases')
+            assert page.status_code == 200
+            assert b'Mixer' in page.data
+            assert [case['id'] for case in client.get('/api/cases').get_json()] == ['a']
@@ -0,0 +1,180 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import database
+from utils.database import DatabaseManager, close_connections
+
+@pytest.fixture
+def temp_db():
+    """Create a temporary database with a small table."""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+        db_path = f.name
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.commit()
+    conn.close()
+    yield db_path
+    close_connections()
+    if os.path.exists(db_path):
+        os.unlink(db_path)
+
+class TestSharedConnections:
+    """DatabaseManager keeps one long-lived connection per thread and database."""
+
+    def test_managers_share_the_thread_connection(self, temp_db):
+        first = DatabaseManager(temp_db)
+        second = DatabaseManager(temp_db)
+        first.execute_query("INSERT INTO items (name) VALUES (?)", ("a",))
+        assert second.execute_query("SELECT name FROM items") == [("a",)]
+        assert first.connection() is second.connection()
+
+    def test_threads_get_their_own_connection(self, temp_db):
+        manager = DatabaseManager(temp_db)
+        seen = []
+
+        def worker():
+            seen.append(manager.connection())
+            manager.execute_query("INSERT INTO items (name) VALUES (?)", ("thread",))
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        assert seen[0] is not manager.connection()
+        assert manager.execute_query("SELECT name FROM items") == [("thread",)]
+
+    def test_path_change_and_replaced_file(self, temp_db):
+        manager = DatabaseManager(temp_db)
+        conn = manager.connection()
+
+        # A recreated file gets a fresh connection instead of the unlinked inode
+        os.unlink(temp_db)
+        sqlite3.connect(temp_db).execute("CREATE TABLE other (id INTEGER)").connection.close()
+        assert manager.connection() is not conn
+        assert manager.table_exists('other')
+        manager.execute_query("CREATE VIEW other_view AS SELECT id FROM other")
+        assert manager.table_exists('other_view')
+
+        with tempfile.NamedTemporaryFile(suffix='.db') as f:
+            manager.db_path = f.name
+            assert not manager.table_exists('other')
+            manager.close()
+
+    def test_child_after_fork_opens_its_own_connection(self, temp_db):
+        manager = DatabaseManager(temp_db)
+        parent_conn = manager.connection()
+        saved = database._local
+        try:
+            database._reset_after_fork()
+            assert manager.connection() is not parent_conn
+            assert parent_conn in database._inherited
+        finally:
+            close_connections()
+            database._local = saved
+            database._inherited.remove(parent_conn)
+        assert manager.connection() is parent_conn
+
+def enrichment_database(db_path):
+    """A migrated database with the participants table and the enrichment activity log."""
+    from modules.enrichment.schemas import get_all_schemas
+    from utils.migrations import migrate
+
+    migrate(db_path)
+    manager = DatabaseManager(db_path)
+    schemas = get_all_schemas()
+    manager.create_tables({table: schemas[table] for table in ('participants', 'enrichment_activity_log')})
+    return manager
+
+class TestTransactions:
+    """transaction() commits a unit of work once, with savepoints when nested."""
+
+    def test_commit_once_and_rollback(self, temp_db):
+        manager = DatabaseManager(temp_db)
+        with manager.transaction() as cursor:
+            cursor.execute("INSERT INTO items (name) VALUES ('a')")
+            # Other connections do not see the write before the commit
+            other = sqlite3.connect(temp_db)
+            assert other.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+            other.close()
+
+        with pytest.raises(RuntimeError):
+            with manager.transaction() as cursor:
+                cursor.execute("INSERT INTO items (name) VALUES ('b')")
+                raise RuntimeError("boom")
+        assert manager.execute_query("SELECT name FROM items") == [("a",)]
+        assert not manager.in_transaction()
+
+    def test_nested_savepoint_rolls_back_alone(self, temp_db):
+        manager = DatabaseManager(temp_db)
+        with manager.transaction() as cursor:
+            cursor.execute("INSERT INTO items (name) VALUES ('outer')")
+            with pytest.raises(sqlite3.IntegrityError):
+                with manager.transaction() as inner:
+                    inner.execute("INSERT INTO items (id, name) VALUES (100, 'inner')")
+                    inner.execute("INSERT INTO items (id, name) VALUES (100, 'duplicate')")
+            # execute_query joins the open transaction instead of committing
+            manager.execute_query("INSERT INTO items (name) VALUES ('joined')")
+        assert manager.execute_query("SELECT name FROM items ORDER BY id") == [("outer",), ("joined",)]
+
+    def test_failed_enrichment_write_keeps_previous_rows(self, temp_db):
+        from modules.enrichment.storage import store_extracted_data
+
+        manager = enrichment_database(temp_db)
+        with patch('utils.database.Config.DATABASE_NAME', temp_db):
+            assert store_extracted_data('case1', 'participants', [{'name': 'First'}], 'http://example.com')
+            # The second item cannot be bound, so the DELETE and first INSERT roll back too
+            assert not store_extracted_data('case1', 'participants', [{'name': 'Second'}, {'name': {'bad': 1}}],
+                                            'http://example.com')
+        assert manager.execute_query("SELECT name FROM participants WHERE case_id = 'case1'") == [("First",)]
+
+    def test_failed_status_write_rolls_back_enrichment(self, temp_db):
+        from modules.enrichment.storage import store_extracted_data
+
+        manager = enrichment_database(temp_db)
+        with patch('utils.database.Config.DATABASE_NAME', temp_db), \
+                patch('modules.enrichment.storage.record_enrichment_status',
+                      side_effect=sqlite3.OperationalError("disk I/O error")):
+            assert not store_extracted_data('case1', 'participants', [{'name': 'First'}], 'http://example.com')
+        # Neither the rows nor a success log entry commit without the status row
+        assert manager.execute_query("SELECT COUNT(*) FROM participants") == [(0,)]
+        assert manager.execute_query("SELECT COUNT(*) FROM enrichment_activity_log") == [(0,)]
+
+class TestStorageProfile:
+    """Connections use WAL and the tuned pragmas; the checkpointer keeps the WAL small."""
+
+    def test_profile_pragmas(self, temp_db):
+        conn = DatabaseManager(temp_db).connection()
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 30000
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -database.Config.SQLITE_CACHE_MB * 1024
+
+    def test_reader_does_not_block_writer(self, temp_db):
+        manager = DatabaseManager(temp_db)
+        manager.execute_query("INSERT INTO items (name) VALUES ('a')")
+        reader = database.apply_storage_profile(sqlite3.connect(temp_db, isolation_level=None))
+        reader.execute("BEGIN")
+        assert reader.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+        # The writer commits while the read transaction is open; the reader keeps its snapshot
+        with manager.transaction() as cursor:
+            cursor.execute("INSERT INTO items (name) VALUES ('b')")
+        assert reader.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 1
+        reader.execute("COMMIT")
+        assert reader.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 2
+        reader.close()
+
+    def test_checkpointer_truncates_large_wal(self, temp_db):
+        manager = DatabaseManager(temp_db)
+        manager.execute_many("INSERT INTO items (name) VALUES (?)", [("x" * 1000,) for _ in range(500)])
+        assert os.path.getsize(temp_db + '-wal') > 0
+        checkpointer = database.WalCheckpointer(temp_db, interval=3600, truncate_bytes=1024)
+        busy, _, _ = checkpointer.checkpoint()
+        assert busy == 0
+        assert os.path.getsize(temp_db + '-wal') == 0
@@ -0,0 +1,97 @@
+import pytest
+import os
+import sys
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rapidfuzz import process, fuzz
+import re
+import scraper
+from modules.scraper.matching import FUZZY_THRESHOLD, TermMatcher, anchored_partial_ratio, fuzzy_anchor, literal_anchors
+from modules.scraper.watchlist import DEFAULT_WATCHLIST, build_matcher, load_watchlist
+
+def legacy_check_1960(text):
+    if re.search(scraper.LAW_REGEX, text, re.IGNORECASE):
+        return True
+    match = process.extractOne(text, scraper.LAW_VARIATIONS, scorer=fuzz.partial_ratio)
+    return bool(match and match[1] > 80)
+
+def legacy_check_crypto(text):
+    match = process.extractOne(text, scraper.CRYPTO_TERMS, scorer=fuzz.partial_ratio)
+    return bool(match and match[1] > 80)
+
+SAMPLES = [
+    "Defendant pleaded guilty to violating 18 U.S.C. 1960.",
+    "Charged under § 1960 for operating without a license.",
+    "He ran an unlicensed money transmiting business.",
+    "UNLICENSED MONEY TRANSMITTING charges were filed.",
+    "The scheme laundered BITCOIN and Etherium.",
+    "Proceeds were converted to crypto-currency.",
+    "Proceeds were converted into Bitcion.",
+    "A routine wire fraud sentencing in federal court.",
+    "The defendant used encrypted messaging applications.",
+    "",
+]
+
+class TestTermMatcher:
+    """Test the compiled matcher used by check_1960 and check_crypto."""
+
+    @pytest.mark.parametrize("text", SAMPLES)
+    def test_recall_matches_legacy(self, text):
+        """Everything the legacy rapidfuzz checks flag is still flagged."""
+        if legacy_check_1960(text):
+            assert scraper.check_1960(text)
+        if legacy_check_crypto(text):
+            assert scraper.check_crypto(text)
+
+    @pytest.mark.parametrize("text", SAMPLES)
+    def test_anchored_fuzzy_scoring_matches_full_body(self, text):
+        """Scoring only the anchor windows of a long body agrees with scoring all of it."""
+        filler = "The court entered judgment and the case was closed after sentencing. " * 40
+        body = (filler + text.lower() + " " + filler).strip()
+        for term in (t.lower() for t in scraper.LAW_VARIATIONS + scraper.CRYPTO_TERMS):
+            anchored = anchored_partial_ratio(term, fuzzy_anchor(term), body, FUZZY_THRESHOLD)
+            full = fuzz.partial_ratio(term, body, score_cutoff=FUZZY_THRESHOLD)
+            assert (anchored > FUZZY_THRESHOLD) == (full > FUZZY_THRESHOLD), term
+
+    def test_case_insensitive_terms(self):
+        assert scraper.check_crypto("Seized ETHEREUM wallets.")
+        assert scraper.check_1960("Violations of 18 usc 1960.")
+
+    def test_restricts_to_requested_categories(self):
+        matcher = TermMatcher({"a": {"terms": ["alpha"]}, "b": {"patterns": [r"\bbeta\b"]}})
+        assert matcher.match("Alpha and Beta", ["b"]) == {"b"}
+        assert matcher.match("alpha and beta") == {"a", "b"}
+        assert matcher.match("gamma") == set()
+        assert matcher.match(None) == set()
+
+class TestWatchlist:
+    """Test the statute watchlist and pattern anchors."""
+
+    def test_tags_all_matching_labels(self):
+        matcher = build_matcher(DEFAULT_WATCHLIST)
+        text = ("Charged with conspiracy to commit money laundering, 18 U.S.C. § 1956(h), "
+                "failing to file a currency transaction report and violating IEEPA.")
+        assert {"1956", "5313", "ieepa"} <= matcher.match(text)
+
+    def test_year_is_not_a_citation(self):
+        matcher = build_matcher(DEFAULT_WATCHLIST)
+        assert "1956" not in matcher.match("The company was founded in 1956.")
+
+    def test_literal_anchors(self):
+        assert literal_anchors(r"\b18\s*U\.?S\.?C\.?\s*1957\b") == frozenset({"1957"})
+        assert literal_anchors(scraper.LAW_REGEX) == frozenset({"1960", "unlicensed money transmitting"})
+        assert literal_anchors(r"\d+") is None
+
+    def test_load_watchlist_file(self, tmp_path):
+        path = tmp_path / "watchlist.json"
+        path.write_text('{"sanctions": {"patterns": ["OFAC"], "terms": ["sanctions evasion"]}}')
+        watchlist = load_watchlist(str(path))
+        assert build_matcher(watchlist).match("An OFAC designation") == {"sanctions"}
+
+    def test_load_watchlist_rejects_unknown_keys(self, tmp_path):
+        path = tmp_path / "watchlist.json"
+        path.write_text('{"sanctions": {"regex": ["OFAC"]}}')
+        with pytest.raises(ValueError):
+            load_watchlist(str(path))
@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.enrichment.storage import log_enrichment_activity, store_extracted_data
+from orchestrators.enrichment_orchestrator import EnrichmentOrchestrator
+from utils.database import DatabaseManager, close_connections
+from utils.migrations import LATEST_VERSION, migrate, migration_status
+
+@pytest.fixture
+def temp_db():
+    """Path to an empty temporary database."""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+        db_path = f.name
+    yield db_path
+    close_connections()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.unlink(db_path + suffix)
+
+def build_legacy_database(db_path):
+    """A database as an old verifier run left it: cases rebuilt without a PRIMARY KEY."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE cases_old (id TEXT, title TEXT, body TEXT, url TEXT, created TEXT, "
+                 "mentions_1960 BOOLEAN, mentions_crypto BOOLEAN, verified_1960 BOOLEAN, classification TEXT)")
+    conn.execute("CREATE TABLE cases AS SELECT * FROM cases_old")
+    conn.execute("DROP TABLE cases_old")
+    conn.executemany(
+        "INSERT INTO cases (id, title, created, mentions_1960, verified_1960, classification) VALUES (?, ?, ?, ?, ?, ?)",
+        [("a", "A classified", "2024-01-01", 1, 1, "yes"),
+         ("a", "A re-crawled", "2024-01-01", 1, None, None),
+         ("b", "B", "2024-01-02", 0, None, None)] +
+        [(f"c{i}", f"C{i}", "2024-01-03", 0, None, None) for i in range(10)]
+    )
+    conn.commit()
+    conn.close()
+
+def index_names(db_path):
+    conn = sqlite3.connect(db_path)
+    names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    conn.close()
+    return names
+
+def query_plan(db_path, query, params=()):
+    conn = sqlite3.connect(db_path)
+    plan = " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+    conn.close()
+    return plan
+
+class TestMigrationRunner:
+    """migrate() brings fresh and legacy databases to the latest schema version."""
+
+    def test_fresh_database_reaches_latest_version(self, temp_db):
+        assert migrate(temp_db) == LATEST_VERSION
+        assert {'idx_cases_created', 'idx_participants_case_id',
+                'idx_activity_table_case_time'} <= index_names(temp_db)
+        assert all(applied_at for _, _, applied_at in migration_status(temp_db))
+        # Re-running is a no-op
+        assert migrate(temp_db) == LATEST_VERSION
+
+    def test_target_stops_early(self, temp_db):
+        assert migrate(temp_db, target=3) == 3
+        assert 'idx_cases_created' not in index_names(temp_db)
+        assert migrate(temp_db) == LATEST_VERSION
+
+    def test_legacy_database_is_deduplicated_in_batches(self, temp_db):
+        build_legacy_database(temp_db)
+        assert migrate(temp_db, batch_size=3) == LATEST_VERSION
+
+        manager = DatabaseManager(temp_db)
+        rows = manager.execute_query("SELECT id, title, classification FROM cases WHERE id = 'a'")
+        assert rows == [("a", "A classified", "yes")]
+        assert manager.execute_query("SELECT COUNT(*) FROM cases WHERE verified_1960 IS NULL "
+                                     "OR verified_crypto IS NULL") == [(0,)]
+        with pytest.raises(sqlite3.IntegrityError):
+            manager.execute_query("INSERT INTO cases (id) VALUES ('b')")
+
+class TestHotQueryPlans:
+    """The case page and the enrichment picker use indexes instead of full scans."""
+
+    def test_case_lookup_uses_index(self, temp_db):
+        build_legacy_database(temp_db)
+        migrate(temp_db)
+        assert 'SEARCH case_records USING' in query_plan(temp_db, "SELECT * FROM cases WHERE id = ?", ("a",))
+        assert 'SEARCH participants USING' in query_plan(
+            temp_db, "SELECT * FROM participants WHERE case_id = ? ORDER BY rowid", ("a",))
+
+    def test_enrichment_picker_uses_indexes(self, temp_db):
+        migrate(temp_db)
+        manager = DatabaseManager(temp_db)
+        manager.execute_many("INSERT INTO cases (id, title, body, url, created, classification) "
+                             "VALUES (?, ?, 'body', 'http://example.com', ?, 'yes')",
+                             [(f"case{i}", f"Case {i}", f"2024-01-{i + 1:02d}") for i in range(5)])
+        with patch('utils.database.Config.DATABASE_NAME', temp_db):
+            log_enrichment_activity('case4', 'participants', 'success', 'Stored 1 participants')
+            log_enrichment_activity('case3', 'participants', 'error', 'Timeout')
+
+        orchestrator = EnrichmentOrchestrator.__new__(EnrichmentOrchestrator)
+        orchestrator.db_manager = manager
+        picked = orchestrator.get_cases_for_enrichment('participants', limit=2, verified_1960_only=True)
+        assert [row[0] for row in picked] == ['case3', 'case2']
+
+        plan = query_plan(temp_db, """
+            SELECT c.id FROM cases c
+            WHERE NOT EXISTS (SELECT 1 FROM enrichment_status s
+                              WHERE s.case_id = c.id AND s.table_name = ? AND s.status = 'success')
+            ORDER BY c.created DESC LIMIT 10
+        """, ('participants',))
+        assert 'idx_cases_created' in plan
+        assert 'SEARCH s USING INDEX sqlite_autoindex_enrichment_status_1' in plan
+        assert 'enrichment_activity_log' not in plan
+        assert 'TEMP B-TREE' not in plan
+
+class TestEnrichmentStatus:
+    """enrichment_status is backfilled from the log and kept current by storage."""
+
+    def test_backfill_from_activity_log(self, temp_db):
+        migrate(temp_db, target=7)
+        manager = DatabaseManager(temp_db)
+        manager.execute_many(
+            "INSERT INTO enrichment_activity_log (timestamp, case_id, table_name, status) VALUES (?, ?, ?, ?)",
+            [("2024-01-01", "a", "participants", "error"),
+             ("2024-01-02", "a", "participants", "success"),
+             ("2024-01-03", "a", "participants", "stale"),
+             ("2024-01-01", "a", "charges", "success"),
+             ("2024-01-01", "b", "charges", "error")]
+        )
+        migrate(temp_db)
+        rows = manager.execute_query("SELECT case_id, table_name, status, attempts, last_attempt_at, last_success_at "
+                                     "FROM enrichment_status ORDER BY case_id, table_name")
+        assert rows == [("a", "charges", "success", 1, "2024-01-01", "2024-01-01"),
+                        ("a", "participants", "stale", 2, "2024-01-02", "2024-01-02"),
+                        ("b", "charges", "error", 1, "2024-01-01", None)]
+
+    def test_storage_updates_status_with_the_log(self, temp_db):
+        migrate(temp_db)
+        manager = DatabaseManager(temp_db)
+        with patch('utils.database.Config.DATABASE_NAME', temp_db):
+            log_enrichment_activity('a', 'participants', 'error', 'Timeout')
+            assert store_extracted_data('a', 'participants', [{'name': 'First'}], 'http://example.com')
+            log_enrichment_activity('a', 'participants', 'stale', 'Release body changed')
+        status, attempts, last_success_at = manager.execute_query(
+            "SELECT status, attempts, last_success_at FROM enrichment_status WHERE case_id = 'a'")[0]
+        assert (status, attempts) == ('stale', 2)
+        assert last_success_at is not None
@@ -0,0 +1,698 @@
+import pytest
+import json
+import sqlite3
+import tempfile
+import os
+import random
+import time
+from contextlib import closing
+from unittest.mock import patch
+import sys
+
+# Add the current directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scraper
+from utils.rate_limiter import AdaptiveRateLimiter, parse_retry_after
+from modules.scraper.archive import PageArchive
+from modules.scraper.stream import iter_results
+from modules.enrichment.schemas import get_schema
+from modules.scraper.text import html_to_text
+from utils.case_storage import compress_case_bodies, load_case_body
+from orchestrators.verification_orchestrator import VerificationOrchestrator
+from utils.database import DatabaseManager
+from benchmarks.fake_doj_api import FakeDojApi, synthetic_items
+
+def make_item(uuid, body="Defendant laundered Bitcoin through an exchange.", **extra):
+    """Build a DOJ API result item."""
+    item = {
+        "uuid": uuid,
+        "title": f"Press release {uuid}",
+        "date": "1700000000",
+        "body": body,
+        "url": f"https://www.justice.gov/{uuid}",
+        "changed": "1700000000",
+        "created": "1700000000",
+    }
+    item.update(extra)
+    return item
+
+def last_page(db_path):
+    """The crawl checkpoint saved in a database."""
+    conn = sqlite3.connect(db_path)
+    with closing(conn):
+        return scraper.get_last_processed_page(conn)
+
+class FakeResponse:
+    """Minimal stand-in for a requests.Response."""
+
+    def __init__(self, status_code, payload=None, headers=None):
+        self.status_code = status_code
+        self.payload = payload
+        self.headers = headers or {}
+        self.text = ""
+        self.closed = False
+
+    def json(self):
+        if isinstance(self.payload, Exception):
+            raise self.payload
+        return self.payload
+
+    def iter_content(self, chunk_size=1):
+        body = json.dumps(self.payload).encode('utf-8')
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class FakeSession:
+    """Session that replays canned responses and records request headers."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.requests.append((url, dict(headers or {})))
+        return self.responses.pop(0)
+
+@pytest.fixture
+def temp_db():
+    """Create a temporary scraper database."""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+        db_path = f.name
+    with patch('scraper.DATABASE_NAME', db_path):
+        scraper.setup_database()
+        yield db_path
+    if os.path.exists(db_path):
+        os.unlink(db_path)
+
+class TestConcurrentCrawl:
+    """Test the concurrent page crawl in fetch_all."""
+
+    def test_checkpoint_with_out_of_order_pages(self, temp_db):
+        """Pages finishing out of order still checkpoint the contiguous prefix."""
+        def fake_fetch_page(page, limiter=None, validators=None):
+            time.sleep(random.uniform(0, 0.02))
+            if page > 8:
+                return []
+            return [make_item(f"p{page}-i{i}") for i in range(3)]
+
+        with patch('scraper.fetch_page', side_effect=fake_fetch_page):
+            scraper.fetch_all(wait_sec=0, concurrency=4)
+
+        assert last_page(temp_db) == 8
+        conn = sqlite3.connect(temp_db)
+        assert conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0] == 24
+        conn.close()
+
+    def test_checkpoint_stops_before_failed_page(self, temp_db):
+        """A failed page holds the checkpoint back even if later pages succeed."""
+        def fake_fetch_page(page, limiter=None, validators=None):
+            if page == 3:
+                return None
+            if page > 6:
+                return []
+            return [make_item(f"p{page}")]
+
+        with patch('scraper.fetch_page', side_effect=fake_fetch_page):
+            scraper.fetch_all(wait_sec=0, concurrency=3)
+
+        assert last_page(temp_db) == 2
+
+    def test_pipeline_with_matcher_processes(self, temp_db):
+        """Matching in a process pool stores the same rows and checkpoint."""
+        def fake_fetch_page(page, limiter=None, validators=None):
+            if page > 5:
+                return []
+            return [make_item(f"p{page}"), make_item(f"p{page}-miss", body="Unrelated.")]
+
+        with patch('scraper.fetch_page', side_effect=fake_fetch_page), \
+                patch('scraper.PIPELINE_QUEUE_PAGES', 1), patch('scraper.WRITE_BATCH_PAGES', 2):
+            scraper.fetch_all(wait_sec=0, concurrency=2, match_workers=2)
+
+        assert last_page(temp_db) == 5
+        conn = sqlite3.connect(temp_db)
+        assert conn.execute("SELECT COUNT(*) FROM cases").fetchone()[0] == 5
+        conn.close()
+
+    def test_writer_error_stops_crawl(self, temp_db):
+        """A failing write stops every stage and is raised to the caller."""
+        conn = sqlite3.connect(temp_db)
+        conn.execute("DROP VIEW cases")
+        conn.close()
+
+        with patch('scraper.fetch_page', side_effect=lambda page, limiter=None, validators=None: [make_item(f"p{page}")]):
+            with pytest.raises(sqlite3.OperationalError):
+                scraper.fetch_all(wait_sec=0, concurrency=2)
+
+        assert last_page(temp_db) == 0
+
+    def test_resumes_from_checkpoint(self, temp_db):
+        """A crawl starts from the page after the saved checkpoint."""
+        conn = sqlite3.connect(temp_db)
+        scraper.save_last_processed_page(conn, 5)
+        conn.close()
+        requested = []
+
+        def fake_fetch_page(page, limiter=None, validators=None):
+            requested.append(page)
+            return []
+
+        with patch('scraper.fetch_page', side_effect=fake_fetch_page):
+            scraper.fetch_all(wait_sec=0, concurrency=2)
+
+        assert min(requested) == 6
+
+class TestAdaptiveRateLimiter:
+    """Test the adaptive token bucket and fetch_page backoff."""
+
+    def test_throttle_halves_rate_and_success_ramps_back(self):
+        limiter = AdaptiveRateLimiter(10, ramp_step=2.5)
+        assert limiter.on_throttle(retry_after=0) == 0
+        assert limiter.current_rate == 5
+        limiter.on_success()
+        limiter.on_success()
+        limiter.on_success()
+        assert limiter.current_rate == 10
+
+    def test_backoff_grows_and_honours_retry_after(self):
+        limiter = AdaptiveRateLimiter(None, backoff_base=1, jitter=0)
+        assert [limiter.on_throttle() for _ in range(3)] == [1, 2, 4]
+        assert limiter.on_throttle(retry_after=7) == 7
+        assert parse_retry_after("120") == 120
+        assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+
+    def test_fetch_page_retries_throttled_responses(self, temp_db):
+        session = FakeSession([
+            FakeResponse(429, headers={"Retry-After": "0"}),
+            FakeResponse(503),
+            FakeResponse(200, {"results": [make_item("a")]}),
+        ])
+        limiter = AdaptiveRateLimiter(None, backoff_base=0.01)
+        with patch('scraper.get_session', return_value=session):
+            results = scraper.fetch_page(0, limiter)
+
+        assert [item["uuid"] for item in results] == ["a"]
+        assert limiter.throttled == 2 and limiter.successes == 1
+
+    def test_fetch_page_retries_bad_json_and_closes_every_response(self, temp_db):
+        responses = [FakeResponse(200, ValueError("truncated")), FakeResponse(200, {"results": [make_item("a")]}),
+                     FakeResponse(404)]
+        limiter = AdaptiveRateLimiter(None, backoff_base=0.01)
+        with patch('scraper.get_session', return_value=FakeSession(responses)), \
+                patch('scraper.STREAM_PAGES', False):
+            assert [item["uuid"] for item in scraper.fetch_page(0, limiter)] == ["a"]
+            assert scraper.fetch_page(1, limiter) is None
+
+        assert limiter.throttled == 1
+        assert all(response.closed for response in responses)
+
+    def test_crawl_records_throughput(self, temp_db):
+        with patch('scraper.fetch_page', side_effect=lambda page, limiter=None, validators=None: []):
+            scraper.fetch_all(wait_sec=0, max_rps=5)
+
+        conn = sqlite3.connect(temp_db)
+        state = conn.execute(
+            "SELECT value FROM scraper_state WHERE key = ?", (scraper.THROUGHPUT_STATE_KEY,)
+        ).fetchone()[0]
+        conn.close()
+        assert '"target_rps": 5' in state
+
+class TestPageStorage:
+    """Test batched per-page writes."""
+
+    def test_store_page_filters_and_checkpoints(self, temp_db):
+        """Only matching items are stored, together with the page checkpoint."""
+        results = [
+            make_item("match-1"),
+            make_item("miss-1", body="A routine fraud sentencing."),
+            make_item("match-2", body="Operated an unlicensed money transmitting business."),
+        ]
+        conn = sqlite3.connect(temp_db)
+        stored = scraper.store_page(conn, results, checkpoint=7)
+        conn.close()
+
+        assert stored == 2
+        assert last_page(temp_db) == 7
+        conn = sqlite3.connect(temp_db)
+        ids = {r[0] for r in conn.execute("SELECT id FROM cases")}
+        conn.close()
+        assert ids == {"match-1", "match-2"}
+
+    def test_store_page_counts_only_new_rows(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        assert scraper.store_page(conn, [make_item("a"), make_item("b")]) == 2
+        assert scraper.store_page(conn, [make_item("a"), make_item("c"), make_item("c")]) == 1
+        conn.close()
+
+    def test_store_page_writes_labels(self, temp_db):
+        """Every watchlist label of a stored case is written to case_labels."""
+        body = "Laundered Bitcoin in violation of 18 U.S.C. 1956 and 18 U.S.C. 1960."
+        conn = sqlite3.connect(temp_db)
+        scraper.store_page(conn, [make_item("multi", body=body), make_item("ml", body="Charged with monetary transactions in criminally derived property.")])
+        labels = set(conn.execute("SELECT case_id, label FROM case_labels"))
+        row = conn.execute("SELECT mentions_1960, mentions_crypto FROM cases WHERE id = 'ml'").fetchone()
+        conn.close()
+
+        assert {("multi", "1956"), ("multi", "1960"), ("multi", "crypto"), ("ml", "1957")} <= labels
+        assert row == (0, 0)
+
+    def test_failed_page_write_leaves_no_checkpoint(self, temp_db):
+        """A failing page write rolls back the checkpoint with it."""
+        conn = sqlite3.connect(temp_db)
+        scraper.store_page(conn, [make_item("a")], checkpoint=1)
+        conn.execute("DROP VIEW cases")
+        with pytest.raises(sqlite3.OperationalError):
+            scraper.store_page(conn, [make_item("b")], checkpoint=2)
+        conn.close()
+
+        assert last_page(temp_db) == 1
+
+class TestChangeDetection:
+    """Test content-hash change detection on ingest."""
+
+    def test_identical_record_is_not_rewritten(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        scraper.store_page(conn, [make_item("a")])
+        before = conn.total_changes
+        assert scraper.store_page(conn, [make_item("a", body="Defendant  laundered Bitcoin\nthrough an exchange.")]) == 0
+        assert conn.total_changes == before
+        conn.close()
+
+    def test_body_edit_updates_and_flags_case(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        scraper.store_page(conn, [make_item("a")])
+        conn.execute("UPDATE cases SET classification = 'yes' WHERE id = 'a'")
+        conn.execute(get_schema('enrichment_activity_log'))
+        conn.execute("INSERT INTO enrichment_activity_log (timestamp, case_id, table_name, status) "
+                     "VALUES ('2024-01-01T00:00:00', 'a', 'case_metadata', 'success')")
+        conn.execute("INSERT INTO enrichment_status (case_id, table_name, status, attempts) "
+                     "VALUES ('a', 'case_metadata', 'success', 1)")
+        conn.commit()
+
+        edited = make_item("a", changed="1700009999", body="Defendant laundered Bitcoin; sentenced to 5 years.")
+        assert scraper.store_page(conn, [edited]) == 1
+
+        body, classification, stored_hash = conn.execute(
+            "SELECT body, classification, body_hash FROM cases WHERE id = 'a'").fetchone()
+        assert body.endswith("5 years.") and classification is None
+        assert stored_hash == scraper.body_hash(edited["body"])
+        assert conn.execute("SELECT status FROM enrichment_activity_log ORDER BY log_id DESC").fetchone() == ("stale",)
+        assert conn.execute("SELECT status, attempts FROM enrichment_status").fetchone() == ("stale", 1)
+        conn.close()
+
+    def test_metadata_edit_keeps_classification(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        scraper.store_page(conn, [make_item("a")])
+        conn.execute("UPDATE cases SET classification = 'yes' WHERE id = 'a'")
+        conn.commit()
+
+        assert scraper.store_page(conn, [make_item("a", changed="1700009999", title="Retitled")]) == 1
+        assert conn.execute("SELECT title, classification FROM cases").fetchone() == ("Retitled", "yes")
+        conn.close()
+
+    def test_metadata_edit_keeps_compressed_body(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        scraper.store_page(conn, [make_item("a")])
+        assert compress_case_bodies(temp_db, 'zlib') == 1
+
+        assert scraper.store_page(conn, [make_item("a", changed="1700009999", title="Retitled")]) == 1
+        assert conn.execute("SELECT body_codec FROM case_bodies").fetchone() == ("zlib",)
+        assert load_case_body(conn, "a") == make_item("a")["body"]
+        conn.close()
+
+    def test_older_copy_does_not_overwrite(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        scraper.store_page(conn, [make_item("a", changed="2000", body="Newer Bitcoin release.")])
+        assert scraper.store_page(conn, [make_item("a", changed="1000", body="Older Bitcoin release.")]) == 0
+        assert conn.execute("SELECT body FROM cases").fetchone() == ("Newer Bitcoin release.",)
+        conn.close()
+
+class TestPlainTextBody:
+    """Test the plain-text body derived at ingest."""
+
+    def test_html_to_text(self):
+        body = '<p>Violated 18 U.S.C.&nbsp;&sect;&nbsp;1960.</p>\n\n<p>He <a href="/x">used</a>  Bitcoin.<script>x()</script></p>'
+        assert html_to_text(body) == "Violated 18 U.S.C. § 1960.\nHe used Bitcoin."
+
+    def test_ingest_stores_text_and_matches_it(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        scraper.store_page(conn, [make_item("a", body="<p>Charged under 18 U.S.C. &sect; 1960.</p>")])
+        body_text, mentions_1960 = conn.execute("SELECT body_text, mentions_1960 FROM cases").fetchone()
+        conn.close()
+        assert body_text == "Charged under 18 U.S.C. § 1960." and mentions_1960
+
+    def test_backfill_fills_legacy_rows(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        conn.executemany("INSERT INTO cases (id, body) VALUES (?, ?)",
+                         [(f"legacy-{i}", f"<p>Release&nbsp;{i}</p>") for i in range(5)])
+        conn.commit()
+
+        assert scraper.backfill_body_text(batch_size=2) == 5
+        assert scraper.backfill_body_text() == 0
+        text, stored_hash = conn.execute("SELECT body_text, body_hash FROM cases WHERE id = 'legacy-3'").fetchone()
+        conn.close()
+        assert text == "Release 3" and stored_hash == scraper.body_hash("Release 3")
+
+    def test_consumers_read_plain_text(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        conn.execute("INSERT INTO cases (id, title, body, body_text, mentions_1960) "
+                     "VALUES ('a', 't', '<p>html</p>', 'text', 1)")
+        conn.commit()
+        conn.close()
+
+        orchestrator = VerificationOrchestrator()
+        orchestrator.db_manager = DatabaseManager(temp_db)
+        assert orchestrator.get_sample_cases() == [("a", "t", "text")]
+
+class TestIncrementalSync:
+    """Test the newest-first incremental sync."""
+
+    def test_sync_stops_at_seen_releases_and_upserts_edits(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        scraper.store_page(conn, [
+            make_item("old", changed="1000"),
+            make_item("edited", changed="1000"),
+        ])
+        conn.close()
+
+        pages = {
+            0: [make_item("new", changed="1300"),
+                make_item("edited", changed="1200", body="Updated: sentenced for Bitcoin laundering.")],
+            1: [make_item("newer-miss", changed="1100", body="Unrelated release."),
+                make_item("old", changed="1000")],
+            2: [make_item("ancient", changed="500")],
+        }
+        requested = []
+
+        def fake_fetch_page(page, limiter=None, extra_params=None, validators=None):
+            requested.append(page)
+            assert extra_params == scraper.SYNC_SORT_PARAMS
+            return pages.get(page, [])
+
+        with patch('scraper.fetch_page', side_effect=fake_fetch_page):
+            scraper.sync_recent(wait_sec=0)
+
+        assert requested == [0, 1]
+        conn = sqlite3.connect(temp_db)
+        rows = dict(conn.execute("SELECT id, body FROM cases"))
+        assert set(rows) == {"old", "edited", "new"}
+        assert rows["edited"].startswith("Updated")
+        assert scraper.get_sync_watermark(conn) == 1300
+        conn.close()
+
+    def test_interrupted_sync_keeps_watermark(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        scraper.store_page(conn, [make_item("old", changed="1000")])
+        conn.close()
+
+        def fake_fetch_page(page, limiter=None, extra_params=None, validators=None):
+            if page == 0:
+                return [make_item("new", changed="2000")]
+            return None
+
+        with patch('scraper.fetch_page', side_effect=fake_fetch_page):
+            scraper.sync_recent(wait_sec=0)
+
+        conn = sqlite3.connect(temp_db)
+        assert conn.execute(
+            "SELECT value FROM scraper_state WHERE key = 'sync_watermark'"
+        ).fetchone() is None
+        conn.close()
+
+class TestPageArchive:
+    """Test the raw page archive and offline replay."""
+
+    def test_append_and_iterate(self, tmp_path):
+        archive = PageArchive(str(tmp_path))
+        archive.append(1, {"results": [make_item("a", date="100")]}, {"page": 1}, dates=[100])
+        archive.append(2, {"results": [make_item("b", date="300")]}, {"page": 2}, dates=[300])
+
+        assert [r["page"] for r in archive.iter_pages()] == [1, 2]
+        assert [r["data"]["results"][0]["uuid"] for r in archive.iter_pages(since=200)] == ["b"]
+        assert [r["page"] for r in archive.iter_pages(until=200)] == [1]
+        archive.close()
+
+    def test_fetch_page_archives_raw_response(self, temp_db, tmp_path):
+        payload = {"metadata": {"count": 1}, "results": [make_item("a")]}
+
+        with patch('scraper.ARCHIVE', PageArchive(str(tmp_path))), \
+                patch('scraper.get_session', return_value=FakeSession([FakeResponse(200, payload)])):
+            assert [item["uuid"] for item in scraper.fetch_page(4, AdaptiveRateLimiter(None))] == ["a"]
+            records = list(scraper.ARCHIVE.iter_pages())
+
+        assert records[0]["page"] == 4
+        assert records[0]["data"] == payload
+
+    def test_replay_retags_without_network(self, temp_db, tmp_path):
+        archive = PageArchive(str(tmp_path))
+        archive.append(1, {"results": [
+            make_item("crypto"),
+            make_item("ieepa", body="Charged with violating IEEPA by exporting goods."),
+        ]})
+        archive.close()
+
+        # First ingest with a watchlist that only knows about crypto
+        crypto_only = {"crypto": scraper.WATCHLIST["crypto"]}
+        with patch('scraper.MATCHER', scraper.build_matcher(crypto_only)), \
+                patch('scraper.get_session', side_effect=AssertionError("network used")):
+            scraper.replay_archive(str(tmp_path))
+        conn = sqlite3.connect(temp_db)
+        assert {r[0] for r in conn.execute("SELECT id FROM cases")} == {"crypto"}
+        conn.close()
+
+        # Replaying with the full watchlist picks up the new statute
+        with patch('scraper.get_session', side_effect=AssertionError("network used")):
+            scraper.replay_archive(str(tmp_path))
+        conn = sqlite3.connect(temp_db)
+        labels = set(conn.execute("SELECT case_id, label FROM case_labels"))
+        conn.close()
+        assert labels == {("crypto", "crypto"), ("ieepa", "ieepa")}
+
+class TestRetag:
+    """Test the parallel bulk re-tag."""
+
+    def test_retag_archive_with_worker_pool(self, temp_db, tmp_path):
+        archive = PageArchive(str(tmp_path))
+        for page in range(3):
+            archive.append(page, {"results": [
+                make_item(f"p{page}-crypto"),
+                make_item(f"p{page}-miss", body="A routine fraud sentencing."),
+            ]})
+        archive.close()
+
+        with patch('scraper.RETAG_ARCHIVE_SHARD_PAGES', 1):
+            throughput = scraper.retag_corpus('archive', str(tmp_path), workers=2)
+
+        assert throughput > 0
+        conn = sqlite3.connect(temp_db)
+        assert {r[0] for r in conn.execute("SELECT id FROM cases")} == {"p0-crypto", "p1-crypto", "p2-crypto"}
+        conn.close()
+
+    def test_retag_cases_updates_stale_tags(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        scraper.store_page(conn, [
+            make_item("stale", body="Violated IEEPA while laundering Bitcoin."),
+            make_item("current"),
+        ])
+        # Simulate tags written by an older watchlist
+        conn.execute("DELETE FROM case_labels WHERE case_id = 'stale' AND label = 'ieepa'")
+        conn.commit()
+        conn.close()
+
+        scraper.retag_corpus('cases', workers=1)
+
+        conn = sqlite3.connect(temp_db)
+        labels = set(conn.execute("SELECT case_id, label FROM case_labels"))
+        conn.close()
+        assert labels == {("stale", "crypto"), ("stale", "ieepa"), ("current", "crypto")}
+
+class TestConditionalRequests:
+    """Test ETag/Last-Modified handling in fetch_page."""
+
+    def test_validators_saved_with_page_and_sent_back(self, temp_db):
+        validators = {"ETag": '"abc"', "Last-Modified": "Wed, 01 May 2024 00:00:00 GMT"}
+        session = FakeSession([
+            FakeResponse(200, {"results": [make_item("a")]}, validators),
+            FakeResponse(304),
+        ])
+        limiter = AdaptiveRateLimiter(None)
+        with patch('scraper.get_session', return_value=session):
+            results = scraper.fetch_page(3, limiter)
+            conn = sqlite3.connect(temp_db)
+            scraper.store_page(conn, results, http_cache=results.cache_entry)
+            validators = scraper.load_http_validators(conn)
+            conn.close()
+            unchanged = scraper.fetch_page(3, limiter, validators=validators)
+
+        assert session.requests[0][1] == {}
+        assert session.requests[1][1] == {"If-None-Match": '"abc"',
+                                          "If-Modified-Since": "Wed, 01 May 2024 00:00:00 GMT"}
+        assert unchanged.not_modified and not unchanged
+
+    def test_not_modified_page_advances_crawl_checkpoint(self, temp_db):
+        def fake_fetch_page(page, limiter=None, validators=None):
+            if page == 1:
+                unchanged = scraper.FetchedPage()
+                unchanged.not_modified = True
+                return unchanged
+            if page > 2:
+                return []
+            return [make_item(f"p{page}")]
+
+        with patch('scraper.fetch_page', side_effect=fake_fetch_page):
+            scraper.fetch_all(wait_sec=0)
+
+        assert last_page(temp_db) == 2
+
+    def test_interrupted_sync_saves_no_validators(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        scraper.store_page(conn, [make_item("old", changed="1000")])
+        conn.close()
+
+        def fake_fetch_page(page, limiter=None, extra_params=None, validators=None):
+            if page == 0:
+                results = scraper.FetchedPage([make_item("new", changed="2000")])
+                results.cache_entry = (scraper.HTTP_CACHE_PREFIX + "page0", '{"etag": "x"}')
+                return results
+            return None
+
+        with patch('scraper.fetch_page', side_effect=fake_fetch_page):
+            scraper.sync_recent(wait_sec=0)
+
+        conn = sqlite3.connect(temp_db)
+        assert conn.execute(
+            "SELECT COUNT(*) FROM scraper_state WHERE key LIKE 'http_cache:%'"
+        ).fetchone()[0] == 0
+        conn.close()
+
+class TestStreamingDecode:
+    """Test incremental decoding of API pages."""
+
+    def test_decoder_matches_json_loads_for_any_chunking(self):
+        payload = {
+            "metadata": {"results": "not the array", "count": 3},
+            "results": [make_item(str(i), body='Bitcoin "quoted" é ' * i) for i in range(3)],
+            "links": [1, 2.5, None],
+        }
+        body = json.dumps(payload, indent=1, ensure_ascii=False).encode('utf-8')
+        for size in (1, 5, 4096):
+            chunks = [body[start:start + size] for start in range(0, len(body), size)]
+            assert list(iter_results(chunks)) == payload["results"]
+
+    def test_decoder_rejects_truncated_page(self):
+        with pytest.raises(ValueError):
+            list(iter_results([b'{"results": [{"uuid": "a"}, {"uuid": ']))
+
+    def test_unmatched_items_become_stubs(self, temp_db):
+        payload = {"results": [make_item("hit"), make_item("miss", body="An unrelated fraud case.")]}
+        with patch('scraper.get_session', return_value=FakeSession([FakeResponse(200, payload)])):
+            results = scraper.fetch_page(0, AdaptiveRateLimiter(None))
+
+        assert results[0]["body"] == payload["results"][0]["body"]
+        assert results[1] == {"uuid": "miss", "date": "1700000000", "changed": "1700000000",
+                              "created": "1700000000", scraper.PREFILTER_LABELS_KEY: []}
+        built, unmatched = scraper.tag_results(results)
+        assert [row[0] for row, _ in built] == ["hit"] and unmatched == ["miss"]
+
+    def test_truncated_body_is_retried(self, temp_db):
+        class TruncatedResponse(FakeResponse):
+            def iter_content(self, chunk_size=1):
+                yield b'{"results": [{"uuid": "a"'
+
+        session = FakeSession([
+            TruncatedResponse(200, {}),
+            FakeResponse(200, {"results": [make_item("a")]}),
+        ])
+        limiter = AdaptiveRateLimiter(None, backoff_base=0.01)
+        with patch('scraper.get_session', return_value=session):
+            results = scraper.fetch_page(0, limiter)
+
+        assert [item["uuid"] for item in results] == ["a"]
+        assert limiter.throttled == 1
+
+    def test_page_size_change_rescales_checkpoint(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        scraper.save_last_processed_page(conn, 9)  # Pages 0-9 of 50 results
+        with patch('scraper.PAGE_SIZE', 200), \
+                patch('scraper.fetch_page', side_effect=lambda page, limiter=None, validators=None: []) as fetch:
+            scraper.fetch_all(wait_sec=0)
+
+        assert fetch.call_args_list[0].args[0] == 2  # 500 results cover pages 0-1 of 200
+        assert scraper.rescale_crawl_checkpoint(conn, 200) == 1
+        conn.close()
+
+class TestFakeApiCrawl:
+    """Crawl the local fake DOJ API end to end."""
+
+    def test_crawl_survives_injected_errors(self, temp_db):
+        items = synthetic_items(300, match_rate=0.3, words=(20, 40))
+        expected = {item["uuid"] for item in items[50:] if scraper.MATCHER.match(item["body"])}
+
+        with FakeDojApi(items, error_429=0.2, error_500=0.1, retry_after=0) as api, \
+                patch('scraper.DOJ_API_URL', api.url), patch('scraper.ARCHIVE', None):
+            scraper.fetch_all(wait_sec=0, concurrency=3)
+            stats = dict(api.stats)
+
+        conn = sqlite3.connect(temp_db)
+        stored = {row[0] for row in conn.execute("SELECT id FROM cases")}
+        conn.close()
+        assert stored == expected
+        assert stats["429"] + stats["500"] > 0
+        assert last_page(temp_db) == 5
+
+class TestShardedBackfill:
+    """Backfill the full history from the fake DOJ API with one process per shard."""
+
+    def test_page_count_probe(self, temp_db):
+        with FakeDojApi(synthetic_items(260, words=(5, 10))) as api, \
+                patch('scraper.DOJ_API_URL', api.url), patch('scraper.ARCHIVE', None):
+            assert scraper.find_page_count(AdaptiveRateLimiter(None)) == 6
+
+    def test_plan_shards(self):
+        assert scraper.plan_backfill_shards(10, 3) == [(0, 3), (4, 7), (8, None)]
+        assert scraper.plan_backfill_shards(2, 4) == [(0, 0), (1, None)]
+        assert scraper.plan_backfill_shards(0, 4) == [(0, None)]
+
+    def test_backfill_stores_every_match_and_resumes_per_shard(self, temp_db):
+        items = synthetic_items(400, match_rate=0.3, words=(20, 40))
+        expected = {item["uuid"] for item in items if scraper.MATCHER.match(item["body"])}
+
+        with FakeDojApi(items, error_429=0.1, retry_after=0) as api, \
+                patch('scraper.DOJ_API_URL', api.url), patch('scraper.ARCHIVE', None):
+            assert scraper.backfill_history(shards=3, wait_sec=0)
+            conn = sqlite3.connect(temp_db)
+            plan, states = scraper.load_backfill_plan(conn)
+            stored = {row[0] for row in conn.execute("SELECT id FROM cases")}
+            conn.close()
+
+            assert plan["page_count"] == 8
+            assert all(state["done"] for state in states.values())
+            assert states[2]["next"] == 8
+            assert stored == expected
+
+            # Reopen one shard as if its worker had crashed halfway through
+            conn = sqlite3.connect(temp_db)
+            with conn:
+                conn.execute("DELETE FROM cases")
+                scraper.save_backfill_shard(conn, 1, dict(states[1], next=4, done=False))
+            conn.close()
+            ok_before = api.stats["ok"]
+            assert scraper.backfill_history(shards=3, wait_sec=0)
+            refetched = api.stats["ok"] - ok_before
+
+        conn = sqlite3.connect(temp_db)
+        stored = {row[0] for row in conn.execute("SELECT id FROM cases")}
+        conn.close()
+        # Only pages 4-5 of shard 1 are fetched again (oldest first)
+        assert refetched == 2
+        resumed = {item["uuid"] for item in items[::-1][200:300]}
+        assert stored == expected & resumed
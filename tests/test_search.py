@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.database import DatabaseManager, close_connections
+from utils.migrations import migrate
+from utils.search import build_match_query, highlight, search_cases
+
+CASES = [
+    ("a", "Exchange operator sentenced for money laundering", "2024-01-03",
+     "The defendant laundered bitcoin through an unlicensed money transmitting business.", "yes"),
+    ("b", "Wire fraud conspiracy", "2024-01-02",
+     "Prosecutors said the scheme moved money through shell companies.", "no"),
+    ("c", "Bitcoin mixer charged", "2024-01-01",
+     "Operating an unlicensed money transmitting business under 18 U.S.C. 1960 <script>.", "yes"),
+]
+
+@pytest.fixture
+def temp_db():
+    """A migrated temporary database with three cases."""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+        db_path = f.name
+    migrate(db_path)
+    DatabaseManager(db_path).execute_many(
+        "INSERT INTO cases (id, title, date, body_text, classification) VALUES (?, ?, ?, ?, ?)", CASES
+    )
+    yield db_path
+    close_connections()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.unlink(db_path + suffix)
+
+def search_ids(db_path, text, filters=None):
+    conn = sqlite3.connect(db_path)
+    total, results = search_cases(conn, text, filters)
+    conn.close()
+    assert total == len(results)
+    return [result['id'] for result in results]
+
+class TestBuildMatchQuery:
+    """User input becomes a safe FTS5 query."""
+
+    def test_terms_phrases_prefixes_and_or(self):
+        assert build_match_query('bitcoin "money transmitting" launder*') == \
+            '"bitcoin" "money transmitting" "launder"*'
+        assert build_match_query('mixer OR tumbler') == '"mixer" OR "tumbler"'
+
+    def test_syntax_is_literal(self):
+        assert build_match_query('title:bitcoin AND -NEAR( "unclosed') == '"title bitcoin" "AND" "NEAR" "unclosed"'
+        assert build_match_query('OR') is None
+        assert build_match_query(' --- ') is None
+
+class TestSearchIndex:
+    """cases_fts follows every write to cases and ranks, filters and highlights."""
+
+    def test_phrase_prefix_and_ranking(self, temp_db):
+        assert sorted(search_ids(temp_db, '"money transmitting"')) == ['a', 'c']
+        assert search_ids(temp_db, '"transmitting money"') == []
+        assert search_ids(temp_db, 'launder*') == ['a']
+        # Title matches outrank body matches
+        assert search_ids(temp_db, 'bitcoin') == ['c', 'a']
+        assert search_ids(temp_db, 'bitcoin', {'classification': 'yes'}) == ['c', 'a']
+        assert search_ids(temp_db, 'money', {'classification': 'no'}) == ['b']
+
+    def test_index_follows_updates_and_deletes(self, temp_db):
+        manager = DatabaseManager(temp_db)
+        manager.execute_query("UPDATE cases SET body_text = 'Ransomware proceeds were converted.' WHERE id = 'b'")
+        manager.execute_query("DELETE FROM cases WHERE id = 'c'")
+        assert search_ids(temp_db, 'ransomware') == ['b']
+        assert search_ids(temp_db, 'shell') == []
+        assert search_ids(temp_db, 'mixer') == []
+        conn = sqlite3.connect(temp_db)
+        conn.execute("INSERT INTO cases_fts (cases_fts) VALUES ('integrity-check')")
+        conn.close()
+
+    def test_snippet_is_escaped_and_marked(self, temp_db):
+        conn = sqlite3.connect(temp_db)
+        _, results = search_cases(conn, '1960')
+        conn.close()
+        assert '<mark>1960</mark>' in results[0]['snippet']
+        assert '&lt;script&gt;' in results[0]['snippet']
+        assert highlight(None) == ''
+
+    def test_search_api(self, temp_db):
+        import app
+
+        with patch('app.DATABASE_NAME', temp_db), patch('app.start_wal_checkpointer'):
+            client = app.app.test_client()
+            response = client.get('/api/search?q=bitcoin&limit=1')
+            assert response.status_code == 200
+            data = response.get_json()
+            assert data['total'] == 2
+            assert [result['id'] for result in data['results']] == ['c']
+
+            page = client.get('/cases?search=launder*')
+            assert page.status_code == 200
+            assert b'<mark>laundering</mark>' in page.data
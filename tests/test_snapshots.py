@@ -0,0 +1,191 @@
+import gzip
+import http.client
+import os
+import socketserver
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import Config
+from utils.database import DatabaseManager, close_connections
+from utils.migrations import migrate
+from utils.snapshots import (SnapshotScheduler, TIMESTAMP_FORMAT, create_snapshot, latest_snapshot,
+                             list_snapshots, prune_snapshots, verify_snapshot)
+from utils.stats import count_stats, read_stats
+
+@pytest.fixture
+def live_db(tmp_path):
+    """A migrated database in WAL mode holding a few hundred cases."""
+    db_path = str(tmp_path / 'doj_cases.db')
+    migrate(db_path)
+    DatabaseManager(db_path).execute_many(
+        "INSERT INTO cases (id, title, body, body_text) VALUES (?, ?, ?, ?)",
+        [(f"case-{i}", f"Case {i}", "<p>x</p>" * 200, "unlicensed money transmitting") for i in range(300)]
+    )
+    yield db_path
+    close_connections()
+
+def snapshot_connection(path, tmp_path):
+    """An open connection to the database inside a snapshot."""
+    copy = tmp_path / 'restored.db'
+    with gzip.open(path, 'rb') as f:
+        copy.write_bytes(f.read())
+    return sqlite3.connect(str(copy))
+
+def fake_snapshot(directory, hours_ago):
+    taken = datetime.now(timezone.utc) - timedelta(hours=hours_ago)
+    path = directory / f"doj_cases-{taken.strftime(TIMESTAMP_FORMAT)}.db.gz"
+    path.write_bytes(b'')
+    return str(path)
+
+class TestSnapshots:
+    """Snapshots are consistent copies taken while writers keep committing."""
+
+    def test_snapshot_during_writes(self, live_db, tmp_path):
+        directory = str(tmp_path / 'snapshots')
+        stop = threading.Event()
+        written = []
+
+        def writer():
+            conn = sqlite3.connect(live_db, timeout=30)
+            while not stop.is_set():
+                conn.execute("INSERT INTO cases (id, title) VALUES (?, 'Concurrent')", (f"w-{len(written)}",))
+                conn.commit()
+                written.append(1)
+            conn.close()
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            # Small steps with pauses, so the writer commits between them
+            path = create_snapshot(live_db, directory, pages_per_step=4, step_sleep_ms=1)
+        finally:
+            stop.set()
+            thread.join()
+
+        assert written
+        assert os.path.basename(path).startswith('doj_cases-') and path.endswith('.db.gz')
+        assert latest_snapshot(directory, live_db) == path
+        assert [name for name in os.listdir(directory) if name.startswith('.')] == []
+        verify_snapshot(path)
+
+        conn = snapshot_connection(path, tmp_path)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'delete'
+        assert conn.execute("SELECT COUNT(*) FROM cases WHERE id LIKE 'case-%'").fetchone()[0] == 300
+        # The search index and the counters were copied at the same commit as the cases
+        assert read_stats(conn) == count_stats(conn.cursor())
+        conn.execute("INSERT INTO cases_fts (cases_fts) VALUES ('integrity-check')")
+        conn.close()
+
+    def test_verify_detects_corruption(self, live_db, tmp_path):
+        path = create_snapshot(live_db, str(tmp_path / 'snapshots'))
+        with open(path, 'r+b') as f:
+            f.seek(100)
+            f.write(b'corrupt')
+        with pytest.raises(RuntimeError, match='Checksum mismatch'):
+            verify_snapshot(path)
+        os.remove(path + '.sha256')
+        with pytest.raises(RuntimeError):
+            verify_snapshot(path)
+
+    def test_retention(self, live_db, tmp_path):
+        directory = tmp_path / 'snapshots'
+        directory.mkdir()
+        old = [fake_snapshot(directory, hours) for hours in (72, 48, 24)]
+        (directory / 'other.db.gz').write_bytes(b'')
+
+        newest = create_snapshot(live_db, str(directory), keep=2)
+        assert list_snapshots(str(directory), live_db) == [newest, old[2]]
+        assert (directory / 'other.db.gz').exists()
+        assert prune_snapshots(str(directory), keep=0, db_path=live_db) == [old[2]]
+
+    def test_scheduler_counts_from_latest_snapshot(self, live_db, tmp_path):
+        directory = tmp_path / 'snapshots'
+        directory.mkdir()
+        scheduler = SnapshotScheduler(live_db, str(directory), interval_hours=24)
+        assert scheduler.seconds_until_due() == 0
+        fake_snapshot(directory, 2)
+        assert 21 * 3600 < scheduler.seconds_until_due() <= 22 * 3600
+        fake_snapshot(directory, 0)
+        scheduler.interval = timedelta(0)
+        scheduler.start()
+        scheduler._stop.wait(0.5)
+        scheduler.stop()
+        assert scheduler.snapshots >= 1
+
+class TestFileServer:
+    """The file server hands out snapshots instead of the live database."""
+
+    @contextmanager
+    def serving(self, directory, database_name):
+        """Run the file server over a directory and yield its port."""
+        from utils import file_server
+
+        with patch.object(Config, 'DATABASE_NAME', database_name), \
+                patch.object(Config, 'SNAPSHOT_DIR', os.path.join(directory, 'snapshots')), \
+                patch.object(file_server, 'DIRECTORY', directory):
+            httpd = socketserver.TCPServer(("127.0.0.1", 0), file_server.FileServerHandler)
+            thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+            thread.start()
+            try:
+                yield httpd.server_address[1]
+            finally:
+                httpd.shutdown()
+                httpd.server_close()
+
+    @pytest.fixture
+    def server(self, live_db, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        with self.serving(str(tmp_path), live_db) as port:
+            yield port
+
+    def get(self, port, path):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+        conn.request("GET", path)
+        response = conn.getresponse()
+        return response, response.read()
+
+    def test_live_database_redirects_to_snapshot(self, server, live_db):
+        response, _ = self.get(server, '/doj_cases.db')
+        assert response.status == 302
+        assert response.getheader('Location') == '/snapshots/latest'
+        assert self.get(server, '/doj_cases.db-wal')[0].status == 302
+        for path in ('/./doj_cases.db', '/x/../doj_cases.db', '/%64oj_cases.db', '/doj_cases.db%2D%77al'):
+            assert self.get(server, path)[0].status == 302, path
+        assert self.get(server, '/snapshots/latest')[0].status == 404
+
+        path = create_snapshot(live_db, Config.SNAPSHOT_DIR)
+        name = os.path.basename(path)
+        response, _ = self.get(server, '/snapshots/latest')
+        assert response.getheader('Location') == f'/snapshots/{name}'
+        response, body = self.get(server, f'/snapshots/{name}')
+        assert response.status == 200
+        assert response.getheader('Content-Type') == 'application/gzip'
+        with open(path, 'rb') as f:
+            assert body == f.read()
+        assert self.get(server, f'/snapshots/{name}.sha256')[1].split()[1].decode() == name
+        assert self.get(server, '/snapshots/..%2Fdoj_cases.db')[0].status == 302
+
+        _, listing = self.get(server, '/')
+        assert name.encode() in listing
+        assert b'href="/doj_cases.db"' not in listing
+
+    def test_relative_database_name_resolves_against_served_directory(self, live_db, tmp_path, monkeypatch):
+        elsewhere = tmp_path / 'elsewhere'
+        elsewhere.mkdir()
+        (elsewhere / 'notes.txt').write_text('not served')
+        monkeypatch.chdir(elsewhere)
+        with self.serving(str(tmp_path), 'doj_cases.db') as port:
+            assert self.get(port, '/doj_cases.db')[0].status == 302
+            assert self.get(port, '/doj_cases.db-wal')[0].status == 302
+            _, listing = self.get(port, '/')
+        assert b'href="/doj_cases.db"' not in listing
+        assert b'notes.txt' not in listing
+        assert str(tmp_path).encode() in listing
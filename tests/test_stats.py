@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.enrichment.storage import store_extracted_data
+from utils.database import DatabaseManager, close_connections
+from utils.migrations import migrate
+from utils.stats import count_stats, read_stats, reconcile_stats
+
+@pytest.fixture
+def temp_db():
+    """A migrated temporary database."""
+    with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+        db_path = f.name
+    migrate(db_path)
+    yield db_path
+    close_connections()
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.unlink(db_path + suffix)
+
+def stored_counters(db_path):
+    conn = sqlite3.connect(db_path)
+    counters = read_stats(conn)
+    conn.close()
+    return counters
+
+def assert_counters_exact(db_path):
+    conn = sqlite3.connect(db_path)
+    assert read_stats(conn) == count_stats(conn.cursor())
+    conn.close()
+
+class TestStatsCounters:
+    """Triggers keep stats_counters equal to a full recount."""
+
+    def test_case_writes(self, temp_db):
+        manager = DatabaseManager(temp_db)
+        manager.execute_many(
+            "INSERT OR IGNORE INTO cases (id, mentions_1960, mentions_crypto) VALUES (?, ?, ?)",
+            [("a", True, False), ("b", True, True), ("c", False, None), ("a", False, True)]
+        )
+        manager.execute_query("UPDATE cases SET verified_1960 = 1, classification = 'yes' WHERE id = 'a'")
+        manager.execute_query("UPDATE cases SET verified_1960 = 0 WHERE id = 'b'")
+        assert stored_counters(temp_db)['verified_1960_yes'] == 1
+        manager.execute_query("DELETE FROM cases WHERE id = 'b'")
+
+        counters = stored_counters(temp_db)
+        assert (counters['cases'], counters['mentions_1960'], counters['mentions_crypto']) == (2, 1, 0)
+        assert (counters['verified_1960_yes'], counters['verified_1960_no']) == (1, 0)
+        assert_counters_exact(temp_db)
+
+    def test_enrichment_counts_distinct_cases(self, temp_db):
+        manager = DatabaseManager(temp_db)
+        with patch('utils.database.Config.DATABASE_NAME', temp_db):
+            assert store_extracted_data('a', 'participants', [{'name': 'One'}, {'name': 'Two'}], 'http://example.com')
+            # Re-enrichment replaces the rows of the same case
+            assert store_extracted_data('a', 'participants', [{'name': 'Three'}], 'http://example.com')
+            assert store_extracted_data('b', 'participants', [{'name': 'Four'}], 'http://example.com')
+            # case_metadata is written with INSERT OR REPLACE
+            assert store_extracted_data('a', 'case_metadata', {'district_office': 'SDNY'}, 'http://example.com')
+            assert store_extracted_data('a', 'case_metadata', {'district_office': 'EDNY'}, 'http://example.com')
+        manager.execute_query("UPDATE participants SET case_id = 'c' WHERE case_id = 'b'")
+        manager.execute_query("DELETE FROM participants WHERE case_id = 'a'")
+
+        counters = stored_counters(temp_db)
+        assert counters['enriched:participants'] == 1
+        assert counters['enriched:case_metadata'] == 1
+        assert_counters_exact(temp_db)
+
+    def test_reconcile_repairs_drift(self, temp_db):
+        manager = DatabaseManager(temp_db)
+        manager.execute_query("INSERT INTO cases (id, mentions_1960) VALUES ('a', 1)")
+        manager.execute_query("UPDATE stats_counters SET value = 42 WHERE name = 'mentions_1960'")
+        manager.execute_query("DROP TRIGGER stats_cases_insert")
+        manager.execute_query("INSERT INTO cases (id) VALUES ('b')")
+
+        assert reconcile_stats(temp_db) == {'cases': (1, 2), 'mentions_1960': (42, 1)}
+        manager.execute_query("INSERT INTO cases (id) VALUES ('c')")
+        assert_counters_exact(temp_db)
+        assert reconcile_stats(temp_db) == {}
@@ -0,0 +1,433 @@
+"""
+Columnar analytics export of the Project1960 database.
+
+Questions over the whole corpus (charges by statute per year, forfeitures
+by district) are full scans that SQLite runs row by row, on the same file
+the scraper and enrichment write to. export_tables() copies `cases`
+(without the bodies) and the eight enrichment tables to Parquet files
+partitioned by the year of the case,
+`<ANALYTICS_DIR>/<table>/year=<YYYY>/part.parquet`. run_query() and
+run_report() then aggregate over those files with DuckDB, or pandas.
+
+Exports are incremental. Triggers on the case rows and on the enrichment
+tables record which (table, year) partitions a write touches in
+`export_changes`, in the same transaction as the write. An export only
+rewrites those partitions, then clears their entries unless another write
+touched them in the meantime. When a case is added, removed or re-dated,
+its enrichment rows change partition, so each table holding rows for it
+is marked for the years involved. An index on the case year lets an
+export read just the changed years.
+
+Writing Parquet needs the optional `pyarrow` package, and SQL queries the
+optional `duckdb` package. The built-in reports fall back to pandas when
+DuckDB is missing.
+"""
+import logging
+import os
+import shutil
+import sqlite3
+from typing import Dict, List, Optional
+
+from .case_storage import BODY_COLUMNS, case_rows_table
+from .config import Config
+from .database import apply_storage_profile
+from .stats import ENRICHMENT_TABLES
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHANGES_TABLE = """
+CREATE TABLE IF NOT EXISTS export_changes (
+  table_name         TEXT NOT NULL,
+  year               TEXT NOT NULL,
+  version            INTEGER NOT NULL DEFAULT 1,
+  PRIMARY KEY (table_name, year)
+) WITHOUT ROWID
+"""
+
+EXPORT_TABLES = ['cases'] + ENRICHMENT_TABLES
+
+PARTITION_FILE = 'part.parquet'
+UNKNOWN_YEAR = 'unknown'
+YEAR_INDEX = 'idx_cases_export_year'
+
+# Case dates are epoch seconds from the DOJ API, or ISO dates in older rows
+YEAR_SQL = ("COALESCE(CASE WHEN {date} NOT GLOB '*[^0-9.]*' THEN strftime('%Y', {date}, 'unixepoch') END, "
+            "strftime('%Y', {date}), '" + UNKNOWN_YEAR + "')")
+
+def case_year(date: str) -> str:
+    """SQL for the partition year of a case date expression."""
+    return YEAR_SQL.format(date=date)
+
+def _has_date(cursor, case_table: str) -> bool:
+    """Test and legacy databases can lack cases.date; their cases are all in the unknown partition."""
+    return 'date' in {row[1] for row in cursor.execute(f"PRAGMA table_info({case_table})")}
+
+def _year_of(row: str, has_date: bool) -> str:
+    return case_year(f"{row}.date") if has_date else f"'{UNKNOWN_YEAR}'"
+
+##################################
+# Change tracking
+##################################
+def _mark(table: str, years: List[str], when: str = 'true') -> str:
+    """Statement marking the table's partitions for `years` as changed, if `when` holds."""
+    year_rows = ", ".join(f"({year})" for year in years)
+    return f"""
+          INSERT INTO export_changes (table_name, year)
+          SELECT '{table}', column1 FROM (VALUES {year_rows}) WHERE {when}
+          ON CONFLICT (table_name, year) DO UPDATE SET version = version + 1;"""
+
+def _case_triggers(case_table: str, columns: List[str], enrichment: List[str], has_date: bool):
+    unknown = f"'{UNKNOWN_YEAR}'"
+    new_year, old_year = _year_of('NEW', has_date), _year_of('OLD', has_date)
+
+    # Enrichment rows of an id without a case are in the unknown partition;
+    # the rows of a case move between it and the case's year. Most cases
+    # have no enrichment rows yet when they are inserted, so nothing moves.
+    def move(years, *ids):
+        return "".join(
+            _mark(table, years, " OR ".join(f"EXISTS (SELECT 1 FROM {table} WHERE case_id = {id})" for id in ids))
+            for table in enrichment)
+
+    yield f"""
+        CREATE TRIGGER export_cases_insert AFTER INSERT ON {case_table} BEGIN
+          {_mark('cases', [new_year])}
+          {move([new_year, unknown], 'NEW.id')}
+        END"""
+    yield f"""
+        CREATE TRIGGER export_cases_delete AFTER DELETE ON {case_table} BEGIN
+          {_mark('cases', [old_year])}
+          {move([old_year, unknown], 'OLD.id')}
+        END"""
+    # Only a change to an exported column makes the partition stale
+    yield f"""
+        CREATE TRIGGER export_cases_update AFTER UPDATE OF {', '.join(columns)} ON {case_table}
+        WHEN {' OR '.join(f'NEW.{name} IS NOT OLD.{name}' for name in columns)} BEGIN
+          {_mark('cases', [old_year, new_year])}
+        END"""
+    if enrichment:
+        yield f"""
+            CREATE TRIGGER export_cases_update_date AFTER UPDATE OF {'id, date' if has_date else 'id'} ON {case_table}
+            WHEN NEW.id IS NOT OLD.id{' OR NEW.date IS NOT OLD.date' if has_date else ''} BEGIN
+              {move([old_year, new_year, unknown], 'OLD.id', 'NEW.id')}
+            END"""
+
+def _enrichment_triggers(table: str, case_table: str, has_date: bool):
+    def year_of(row):
+        return (f"COALESCE((SELECT {_year_of(case_table, has_date)} FROM {case_table} "
+                f"WHERE id = {row}.case_id), '{UNKNOWN_YEAR}')")
+
+    yield f"""
+        CREATE TRIGGER export_{table}_insert AFTER INSERT ON {table} BEGIN
+          {_mark(table, [year_of('NEW')])}
+        END"""
+    yield f"""
+        CREATE TRIGGER export_{table}_delete AFTER DELETE ON {table} BEGIN
+          {_mark(table, [year_of('OLD')])}
+        END"""
+    yield f"""
+        CREATE TRIGGER export_{table}_update AFTER UPDATE ON {table} BEGIN
+          {_mark(table, [year_of('OLD'), year_of('NEW')])}
+        END"""
+
+def _existing_tables(cursor) -> set:
+    return {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+def create_export_tracking(cursor) -> None:
+    """
+    (Re)create export_changes and its triggers, and mark every partition
+    as changed, so the next export rewrites everything once. Run it again
+    after adding a column to the case table.
+    """
+    cursor.execute(EXPORT_CHANGES_TABLE)
+    for (trigger,) in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'export\\_%' ESCAPE '\\'").fetchall():
+        cursor.execute(f"DROP TRIGGER {trigger}")
+    tables = _existing_tables(cursor)
+    case_table = case_rows_table(cursor)
+    if case_table not in tables:
+        return
+    has_date = _has_date(cursor, case_table)
+    if has_date:
+        # Incremental exports read the changed years' cases through this index
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {YEAR_INDEX} ON {case_table} ({case_year('date')})")
+    enrichment = [table for table in ENRICHMENT_TABLES if table in tables]
+    columns = [name for name, _ in _export_columns(cursor, 'cases')]
+    statements = list(_case_triggers(case_table, columns, enrichment, has_date))
+    for table in enrichment:
+        statements.extend(_enrichment_triggers(table, case_table, has_date))
+    for statement in statements:
+        cursor.execute(statement)
+    table_rows = ", ".join(f"('{table}')" for table in ['cases'] + enrichment)
+    cursor.execute(f"""
+        INSERT INTO export_changes (table_name, year)
+        SELECT t.column1, y.year FROM (VALUES {table_rows}) t,
+               (SELECT DISTINCT {_year_of(case_table, has_date)} AS year FROM {case_table}
+                UNION SELECT '{UNKNOWN_YEAR}') y
+        WHERE true
+        ON CONFLICT (table_name, year) DO UPDATE SET version = version + 1
+    """)
+
+##################################
+# Export
+##################################
+def _require_pyarrow() -> None:
+    if pyarrow is None:
+        raise RuntimeError("Parquet export needs the pyarrow package (pip install pyarrow)")
+
+def _column_kind(declared: str) -> str:
+    """SQLite type affinity of a declared column type, with booleans kept apart."""
+    declared = (declared or '').upper()
+    if 'INT' in declared:
+        return 'int'
+    if 'BOOL' in declared:
+        return 'bool'
+    if any(name in declared for name in ('REAL', 'FLOA', 'DOUB')):
+        return 'float'
+    return 'string'
+
+def _to_int(value):
+    if value is None or isinstance(value, int):
+        return value
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+def _to_float(value):
+    try:
+        return None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _to_bool(value):
+    if value is None or isinstance(value, (int, float)):
+        return None if value is None else bool(value)
+    text = str(value).strip().lower()
+    return {'1': True, 'true': True, 'yes': True, '0': False, 'false': False, 'no': False}.get(text)
+
+def _to_string(value):
+    if value is None or isinstance(value, str):
+        return value
+    return value.decode('utf-8', 'replace') if isinstance(value, bytes) else str(value)
+
+CONVERTERS = {'int': _to_int, 'float': _to_float, 'bool': _to_bool, 'string': _to_string}
+
+def _arrow_types():
+    return {'int': pyarrow.int64(), 'float': pyarrow.float64(), 'bool': pyarrow.bool_(), 'string': pyarrow.string()}
+
+def _export_columns(conn, table: str) -> List[tuple]:
+    """(name, kind) of the columns exported for a table; `cases` leaves out the bodies."""
+    source = case_rows_table(conn) if table == 'cases' else table
+    return [(row[1], _column_kind(row[2])) for row in conn.execute(f"PRAGMA table_info({source})")
+            if not (table == 'cases' and row[1] in BODY_COLUMNS)]
+
+def _select_rows(conn, table: str, columns: List[tuple], years: Optional[List[str]]):
+    """(year, row) of a table's rows in the given partitions (all partitions for None)."""
+    case_table = case_rows_table(conn)
+    has_date = _has_date(conn, case_table)
+    year = _year_of('c', has_date)
+    if table == 'cases':
+        selected = ", ".join(f"c.{name}" for name, _ in columns)
+        sql = f"SELECT {year}, {selected} FROM {case_table} c"
+        return conn.execute(sql if years is None else sql + f" WHERE {year} IN ({', '.join('?' * len(years))})",
+                            years or ())
+    selected = ", ".join(f"t.{name}" for name, _ in columns)
+    if years is None:
+        return conn.execute(f"SELECT {year}, {selected} FROM {table} t LEFT JOIN {case_table} c ON c.id = t.case_id")
+    # The changed years' cases through the year index, then their rows through idx_<table>_case_id
+    sql = (f"SELECT {year}, {selected} FROM {case_table} c JOIN {table} t ON t.case_id = c.id "
+           f"WHERE {year} IN ({', '.join('?' * len(years))})")
+    if UNKNOWN_YEAR in years:
+        # Rows whose case does not exist
+        sql += (f" UNION ALL SELECT '{UNKNOWN_YEAR}', {selected} FROM {table} t "
+                f"WHERE NOT EXISTS (SELECT 1 FROM {case_table} c WHERE c.id = t.case_id)")
+    return conn.execute(sql, years)
+
+def _write_partition(table_dir: str, year: str, columns: List[tuple], rows: List[tuple]) -> None:
+    """Write one partition file atomically (readers see the old or the new file)."""
+    types = _arrow_types()
+    schema = pyarrow.schema([(name, types[kind]) for name, kind in columns])
+    arrays = [
+        pyarrow.array([CONVERTERS[kind](row[i]) for row in rows], type=types[kind])
+        for i, (_, kind) in enumerate(columns)
+    ]
+    partition_dir = os.path.join(table_dir, f"year={year}")
+    os.makedirs(partition_dir, exist_ok=True)
+    path = os.path.join(partition_dir, PARTITION_FILE)
+    pyarrow.parquet.write_table(pyarrow.Table.from_arrays(arrays, schema=schema), path + '.tmp',
+                                compression='zstd')
+    os.replace(path + '.tmp', path)
+
+def _remove_partition(table_dir: str, year: str) -> None:
+    shutil.rmtree(os.path.join(table_dir, f"year={year}"), ignore_errors=True)
+
+def exported_years(table_dir: str) -> List[str]:
+    """Years of the partitions already on disk for a table."""
+    try:
+        return sorted(name[len('year='):] for name in os.listdir(table_dir) if name.startswith('year='))
+    except FileNotFoundError:
+        return []
+
+def export_table(conn, table: str, directory: str, full: bool = False) -> tuple:
+    """
+    Rewrite the changed partitions of one table (all of them with `full`,
+    or on its first export). Reads the change log and the rows in one read
+    transaction. Returns (partitions written, rows written, change log
+    entries to clear).
+    """
+    table_dir = os.path.join(directory, table)
+    full = full or not os.path.isdir(table_dir)
+    conn.execute("BEGIN")
+    try:
+        changes = conn.execute(
+            "SELECT year, version FROM export_changes WHERE table_name = ?", (table,)).fetchall()
+        if not full and not changes:
+            return 0, 0, []
+        columns = _export_columns(conn, table)
+        partitions: Dict[str, List[tuple]] = {}
+        for row in _select_rows(conn, table, columns, None if full else [year for year, _ in changes]):
+            partitions.setdefault(row[0], []).append(row[1:])
+    finally:
+        conn.execute("COMMIT")
+
+    for year, rows in partitions.items():
+        _write_partition(table_dir, year, columns, rows)
+    # Partitions whose last row went away
+    stale = exported_years(table_dir) if full else [year for year, _ in changes]
+    for year in stale:
+        if year not in partitions:
+            _remove_partition(table_dir, year)
+    return len(partitions), sum(len(rows) for rows in partitions.values()), \
+        [(table, year, version) for year, version in changes]
+
+def export_tables(db_path: Optional[str] = None, directory: Optional[str] = None,
+                  tables: Optional[List[str]] = None, full: bool = False) -> Dict[str, tuple]:
+    """
+    Export the changed partitions of `tables` (default: `cases` and the
+    enrichment tables) to Parquet. Returns {table: (partitions, rows)}
+    for the tables that had something to write.
+    """
+    _require_pyarrow()
+    db_path = db_path or Config.DATABASE_NAME
+    directory = directory or Config.ANALYTICS_DIR
+    conn = apply_storage_profile(sqlite3.connect(db_path, isolation_level=None))
+    results = {}
+    try:
+        existing = _existing_tables(conn)
+        for table in tables or EXPORT_TABLES:
+            if (case_rows_table(conn) if table == 'cases' else table) not in existing:
+                continue
+            partitions, rows, done = export_table(conn, table, directory, full)
+            if done or partitions:
+                results[table] = (partitions, rows)
+            if partitions:
+                logger.info(f"Exported {rows} {table} rows in {partitions} partition(s)")
+            # Only entries no write has touched since they were read
+            conn.executemany("DELETE FROM export_changes WHERE table_name = ? AND year = ? AND version = ?", done)
+    finally:
+        conn.close()
+    return results
+
+##################################
+# Queries
+##################################
+def table_glob(directory: str, table: str) -> str:
+    return os.path.join(directory, table, 'year=*', PARTITION_FILE)
+
+def connect(directory: Optional[str] = None):
+    """An in-memory DuckDB connection with a view per exported table (year is a column)."""
+    if duckdb is None:
+        raise RuntimeError("SQL queries over the export need the duckdb package (pip install duckdb)")
+    directory = directory or Config.ANALYTICS_DIR
+    conn = duckdb.connect()
+    for table in EXPORT_TABLES:
+        if exported_years(os.path.join(directory, table)):
+            path = table_glob(directory, table).replace("'", "''")
+            conn.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{path}', "
+                         f"hive_partitioning = true, hive_types = {{'year': VARCHAR}}, union_by_name = true)")
+    return conn
+
+def run_query(sql: str, directory: Optional[str] = None):
+    """Run DuckDB SQL over the export and return the result as a pandas DataFrame."""
+    conn = connect(directory)
+    try:
+        return conn.execute(sql).df()
+    finally:
+        conn.close()
+
+def load_table(table: str, directory: Optional[str] = None):
+    """One exported table as a pandas DataFrame, with the partition year as a column."""
+    import pandas as pd
+
+    _require_pyarrow()
+    table_dir = os.path.join(directory or Config.ANALYTICS_DIR, table)
+    frames = []
+    for year in exported_years(table_dir):
+        frame = pd.read_parquet(os.path.join(table_dir, f"year={year}", PARTITION_FILE))
+        frames.append(frame.assign(year=year))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+# Dollar amounts are free text written by the model, e.g. "$1,200,000" or "$3.5 million"
+AMOUNT_SQL = ("TRY_CAST(NULLIF(regexp_replace(amount, '[^0-9.]', '', 'g'), '') AS DOUBLE) * "
+              "CASE WHEN lower(amount) LIKE '%billion%' THEN 1e9 "
+              "WHEN lower(amount) LIKE '%million%' THEN 1e6 ELSE 1 END")
+
+def _parse_amounts(amounts):
+    import pandas as pd
+
+    text = amounts.fillna('').str.lower()
+    values = pd.to_numeric(text.str.replace(r'[^0-9.]', '', regex=True), errors='coerce')
+    scale = pd.Series(1.0, index=text.index)
+    scale[text.str.contains('million')] = 1e6
+    scale[text.str.contains('billion')] = 1e9
+    return values * scale
+
+def _charges_by_statute_year(directory):
+    charges = load_table('charges', directory)
+    charges = charges[charges['statute'].notna()]
+    return (charges.groupby(['year', 'statute'])
+            .agg(charges=('case_id', 'size'), cases=('case_id', 'nunique'))
+            .reset_index().sort_values(['year', 'charges'], ascending=[True, False], ignore_index=True))
+
+def _forfeitures_by_district(directory):
+    actions = load_table('financial_actions', directory)
+    metadata = load_table('case_metadata', directory)[['case_id', 'district_office']]
+    actions = actions[actions['action_type'].fillna('').str.lower().str.contains('forfeit')]
+    actions = actions.assign(amount_usd=_parse_amounts(actions['amount'])).merge(metadata, on='case_id', how='left')
+    return (actions.groupby(actions['district_office'].fillna('Unknown'))
+            .agg(cases=('case_id', 'nunique'), actions=('case_id', 'size'), total_usd=('amount_usd', 'sum'))
+            .reset_index().sort_values('total_usd', ascending=False, ignore_index=True))
+
+# Built-in reports: name -> (DuckDB SQL, pandas implementation)
+REPORTS = {
+    'charges-by-statute-year': ("""
+        SELECT year, statute, COUNT(*) AS charges, COUNT(DISTINCT case_id) AS cases
+        FROM charges WHERE statute IS NOT NULL
+        GROUP BY year, statute ORDER BY year, charges DESC
+    """, _charges_by_statute_year),
+    'forfeitures-by-district': (f"""
+        SELECT COALESCE(m.district_office, 'Unknown') AS district_office,
+               COUNT(DISTINCT f.case_id) AS cases, COUNT(*) AS actions, SUM({AMOUNT_SQL}) AS total_usd
+        FROM financial_actions f LEFT JOIN case_metadata m ON m.case_id = f.case_id
+        WHERE lower(f.action_type) LIKE '%forfeit%'
+        GROUP BY 1 ORDER BY total_usd DESC NULLS LAST
+    """, _forfeitures_by_district),
+}
+
+def run_report(name: str, directory: Optional[str] = None, engine: str = 'auto'):
+    """Run a built-in report with DuckDB ('duckdb'), pandas ('pandas') or whichever is installed ('auto')."""
+    sql, pandas_report = REPORTS[name]
+    if engine == 'duckdb' or (engine == 'auto' and duckdb is not None):
+        return run_query(sql, directory)
+    return pandas_report(directory or Config.ANALYTICS_DIR)
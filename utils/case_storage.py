@@ -0,0 +1,268 @@
+"""
+Split storage of cases: narrow hot rows and a side table of bodies.
+
+`case_records` holds one small row per case (title, dates, flags,
+classification, hashes), so list pages, pickers and counts only ever read
+small rows. The raw HTML body and the derived plain text live in
+`case_bodies`, keyed by case id. `cases` is a view joining the two under
+the old column names, with INSTEAD OF triggers that route inserts,
+updates and deletes to the right table, so existing queries and writes
+keep working; a query that names no body column never reads case_bodies.
+
+Raw HTML bodies can be compressed with zlib or, with the optional
+`zstandard` package, zstd (CASE_BODY_COMPRESSION). Only bodies whose
+plain text exists are compressed, and the plain text itself is never
+compressed, because the search index and the pickers read it in SQL.
+Through the `cases` view a compressed body reads as NULL; load_case_body()
+returns any body decoded.
+"""
+import logging
+import sqlite3
+import zlib
+from typing import List, Optional
+
+from .config import Config
+from .database import DatabaseManager, apply_storage_profile
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+CASE_RECORDS = 'case_records'
+
+# body_codec comes before the large columns so that scans reading it stay
+# on the table's leaf pages instead of following overflow chains
+CASE_BODIES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS case_bodies (
+  case_id            TEXT PRIMARY KEY,
+  body_codec         TEXT NOT NULL DEFAULT 'none',
+  body_text          TEXT,
+  body               BLOB
+)
+"""
+
+# Bodies still stored as plain text, i.e. the compressor's work queue
+PLAIN_BODIES_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_case_bodies_plain ON case_bodies (case_id) WHERE body_codec = 'none'
+"""
+
+BODY_COLUMNS = ['body', 'body_text']
+
+CODECS = ['none', 'zlib', 'zstd']
+ZLIB_LEVEL = 9
+ZSTD_LEVEL = 9
+
+# Bodies per transaction when compressing
+COMPRESS_BATCH_SIZE = 500
+
+##################################
+# Codecs
+##################################
+def _check_codec(codec: str) -> None:
+    if codec not in CODECS:
+        raise ValueError(f"Unknown body codec {codec!r} (expected one of {', '.join(CODECS)})")
+    if codec == 'zstd' and zstandard is None:
+        raise RuntimeError("zstd body compression needs the zstandard package (pip install zstandard)")
+
+def encode_body(body: Optional[str], codec: str):
+    """A body as stored under `codec`: the text itself for 'none', else compressed bytes."""
+    _check_codec(codec)
+    if body is None or codec == 'none':
+        return body
+    data = body.encode('utf-8')
+    if codec == 'zlib':
+        return zlib.compress(data, ZLIB_LEVEL)
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+
+def decode_body(value, codec: str) -> Optional[str]:
+    """Inverse of encode_body()."""
+    if value is None:
+        return None
+    if codec == 'none':
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+    _check_codec(codec)
+    if codec == 'zlib':
+        return zlib.decompress(value).decode('utf-8')
+    return zstandard.ZstdDecompressor().decompress(value).decode('utf-8')
+
+##################################
+# Layout
+##################################
+def is_split(cursor) -> bool:
+    """True once migration 11 has split `cases` into case_records and case_bodies."""
+    return cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CASE_RECORDS,)
+    ).fetchone() is not None
+
+def case_rows_table(cursor) -> str:
+    """The table holding one row per case: case_records, or `cases` before the split."""
+    return CASE_RECORDS if is_split(cursor) else 'cases'
+
+def _view_columns(cursor) -> List[tuple]:
+    """(name, default) of the case_records columns, in table order."""
+    return [(row[1], row[4]) for row in cursor.execute(f"PRAGMA table_info({CASE_RECORDS})")]
+
+def _view_sql(columns: List[str]) -> str:
+    selected = [f"{CASE_RECORDS}.{column}" for column in columns]
+    # The old column order keeps SELECT * results in the familiar shape
+    body = "CASE WHEN case_bodies.body_codec = 'none' THEN case_bodies.body END AS body"
+    selected.insert(columns.index('date') + 1 if 'date' in columns else len(selected), body)
+    selected += ["case_bodies.body_text AS body_text", f"{CASE_RECORDS}.rowid AS rowid"]
+    return f"""
+        CREATE VIEW cases AS
+        SELECT {', '.join(selected)}
+        FROM {CASE_RECORDS} LEFT JOIN case_bodies ON case_bodies.case_id = {CASE_RECORDS}.id"""
+
+def _view_triggers(columns: List[tuple]):
+    names = [name for name, _ in columns]
+    # A view has no column defaults, so omitted columns arrive as NULL
+    values = [f"COALESCE(NEW.{name}, {default})" if default is not None else f"NEW.{name}"
+              for name, default in columns]
+    # changes() is 0 when INSERT OR IGNORE skipped an existing case
+    yield f"""
+        CREATE TRIGGER cases_view_insert INSTEAD OF INSERT ON cases BEGIN
+          INSERT INTO {CASE_RECORDS} ({', '.join(names)}) VALUES ({', '.join(values)});
+          INSERT INTO case_bodies (case_id, body_text, body)
+          SELECT NEW.id, NEW.body_text, NEW.body
+          WHERE changes() > 0 AND (NEW.body IS NOT NULL OR NEW.body_text IS NOT NULL);
+        END"""
+    yield f"""
+        CREATE TRIGGER cases_view_delete INSTEAD OF DELETE ON cases BEGIN
+          DELETE FROM case_bodies WHERE case_id = OLD.id;
+          DELETE FROM {CASE_RECORDS} WHERE id = OLD.id;
+        END"""
+    yield """
+        CREATE TRIGGER cases_view_update_id INSTEAD OF UPDATE OF id ON cases
+        WHEN NEW.id IS NOT OLD.id BEGIN
+          SELECT RAISE(ABORT, 'case ids cannot be changed through the cases view');
+        END"""
+    # One trigger per column, so an update only writes the columns it changes
+    for name in names:
+        if name == 'id':
+            continue
+        yield f"""
+            CREATE TRIGGER cases_view_update_{name} INSTEAD OF UPDATE OF {name} ON cases
+            WHEN NEW.{name} IS NOT OLD.{name} BEGIN
+              UPDATE {CASE_RECORDS} SET {name} = NEW.{name} WHERE id = OLD.id;
+            END"""
+    # A body written through the view is stored uncompressed
+    yield """
+        CREATE TRIGGER cases_view_update_body INSTEAD OF UPDATE OF body ON cases
+        WHEN NEW.body IS NOT OLD.body BEGIN
+          INSERT INTO case_bodies (case_id, body_codec, body) VALUES (OLD.id, 'none', NEW.body)
+          ON CONFLICT (case_id) DO UPDATE SET body_codec = 'none', body = excluded.body;
+        END"""
+    yield """
+        CREATE TRIGGER cases_view_update_body_text INSTEAD OF UPDATE OF body_text ON cases
+        WHEN NEW.body_text IS NOT OLD.body_text BEGIN
+          INSERT INTO case_bodies (case_id, body_text) VALUES (OLD.id, NEW.body_text)
+          ON CONFLICT (case_id) DO UPDATE SET body_text = excluded.body_text;
+        END"""
+
+def create_case_view(cursor) -> None:
+    """
+    (Re)create the `cases` view and its triggers from the current
+    case_records columns. Run it again after adding a column to case_records.
+    """
+    cursor.execute("DROP VIEW IF EXISTS cases")
+    columns = _view_columns(cursor)
+    cursor.execute(_view_sql([name for name, _ in columns]))
+    for trigger in _view_triggers(columns):
+        cursor.execute(trigger)
+
+def split_case_bodies(cursor) -> None:
+    """
+    Move body and body_text out of `cases` into case_bodies, rename what
+    is left to case_records (keeping its rowids, indexes and triggers)
+    and put the `cases` view in its place. Safe to re-run.
+    """
+    cursor.execute(CASE_BODIES_SCHEMA)
+    cursor.execute(PLAIN_BODIES_INDEX)
+    if not is_split(cursor):
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(cases)")]
+        moved = [column for column in BODY_COLUMNS if column in columns]
+        body = 'body' if 'body' in moved else 'NULL'
+        body_text = 'body_text' if 'body_text' in moved else 'NULL'
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO case_bodies (case_id, body_text, body)
+            SELECT id, {body_text}, {body} FROM cases
+            WHERE {body} IS NOT NULL OR {body_text} IS NOT NULL
+        """)
+        # Triggers that read the moved columns would block DROP COLUMN
+        for (trigger,) in cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'cases' "
+                "AND name NOT LIKE 'stats\\_%' ESCAPE '\\'").fetchall():
+            cursor.execute(f"DROP TRIGGER {trigger}")
+        cursor.execute(f"ALTER TABLE cases RENAME TO {CASE_RECORDS}")
+        for column in moved:
+            cursor.execute(f"ALTER TABLE {CASE_RECORDS} DROP COLUMN {column}")
+    create_case_view(cursor)
+
+##################################
+# Bodies
+##################################
+def load_case_body(conn, case_id: str) -> Optional[str]:
+    """The raw HTML body of a case, decompressed if needed (works before the split too)."""
+    if not is_split(conn):
+        row = conn.execute("SELECT body FROM cases WHERE id = ?", (case_id,)).fetchone()
+        return row[0] if row else None
+    row = conn.execute("SELECT body, body_codec FROM case_bodies WHERE case_id = ?", (case_id,)).fetchone()
+    return decode_body(row[0], row[1]) if row else None
+
+def compress_case_bodies(db_path: Optional[str] = None, codec: Optional[str] = None,
+                         batch_size: int = COMPRESS_BATCH_SIZE) -> int:
+    """
+    Store raw HTML bodies under `codec` (default: CASE_BODY_COMPRESSION),
+    one batch per transaction. Compressing picks up the bodies still
+    stored as plain text (new ones arrive that way); 'none' decompresses
+    every body. Bodies without plain text stay as they are, because SQL
+    readers fall back to them. Returns the number of bodies rewritten.
+    """
+    codec = codec or Config.CASE_BODY_COMPRESSION
+    _check_codec(codec)
+    manager = DatabaseManager(db_path or Config.DATABASE_NAME)
+    with manager.transaction() as cursor:
+        if not is_split(cursor):
+            return 0
+    pending = "body_codec != 'none'" if codec == 'none' else "body_codec = 'none'"
+    rewritten = 0
+    last_id = ''
+    while True:
+        with manager.transaction() as cursor:
+            rows = cursor.execute(f"""
+                SELECT case_id, body_codec, body FROM case_bodies
+                WHERE {pending} AND case_id > ? AND body IS NOT NULL AND body_text IS NOT NULL
+                ORDER BY case_id LIMIT ?
+            """, (last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            cursor.executemany(
+                "UPDATE case_bodies SET body_codec = ?, body = ? WHERE case_id = ?",
+                [(codec, encode_body(decode_body(body, stored_codec), codec), case_id)
+                 for case_id, stored_codec, body in rows]
+            )
+        rewritten += len(rows)
+        last_id = rows[-1][0]
+    if rewritten:
+        logger.info(f"Stored {rewritten} case bodies as {codec}")
+    return rewritten
+
+def _file_size(conn) -> int:
+    return conn.execute("PRAGMA page_count").fetchone()[0] * conn.execute("PRAGMA page_size").fetchone()[0]
+
+def vacuum(db_path: Optional[str] = None) -> tuple:
+    """
+    Rebuild the database file so that the space freed by the split and by
+    compression goes back to the filesystem. VACUUM holds an exclusive
+    lock while it runs. Returns (bytes before, bytes after).
+    """
+    conn = apply_storage_profile(sqlite3.connect(db_path or Config.DATABASE_NAME, isolation_level=None))
+    try:
+        before = _file_size(conn)
+        conn.execute("VACUUM")
+        return before, _file_size(conn)
+    finally:
+        conn.close()
@@ -18,6 +18,27 @@ class Config:
     # Database Configuration
     DATABASE_NAME = os.getenv("DATABASE_NAME", "doj_cases.db")
     
+    # SQLite Storage Profile (see utils/database.apply_storage_profile)
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64"))
+    SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256"))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+    SQLITE_WAL_LIMIT_MB = int(os.getenv("SQLITE_WAL_LIMIT_MB", "64"))
+    SQLITE_CHECKPOINT_SECONDS = float(os.getenv("SQLITE_CHECKPOINT_SECONDS", "30"))
+    
+    # Raw HTML body compression: none, zlib or zstd (see utils/case_storage.py)
+    CASE_BODY_COMPRESSION = os.getenv("CASE_BODY_COMPRESSION", "none").lower()
+    
+    # Online-backup snapshots (see utils/snapshots.py)
+    SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+    SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "7"))
+    SNAPSHOT_INTERVAL_HOURS = float(os.getenv("SNAPSHOT_INTERVAL_HOURS", "0"))
+    SNAPSHOT_PAGES_PER_STEP = int(os.getenv("SNAPSHOT_PAGES_PER_STEP", "1024"))
+    SNAPSHOT_STEP_SLEEP_MS = float(os.getenv("SNAPSHOT_STEP_SLEEP_MS", "5"))
+    
+    # Parquet export for analytics (see utils/analytics.py)
+    ANALYTICS_DIR = os.getenv("ANALYTICS_DIR", "analytics")
+    
     # Processing Configuration
     DEFAULT_PROCESSING_LIMIT = 100
     API_TIMEOUT = 120
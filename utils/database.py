@@ -1,13 +1,166 @@
 """
 Database connection and schema management for the Project1960.
+
+Every DatabaseManager in a thread shares one long-lived connection per
+database file, so creating a manager is free and a query costs no connect.
+Connections are per thread (sqlite3 connections must not be shared across
+threads without locking) and per process: a forked child never touches its
+parent's connections and opens its own on first use.
+
+Every connection gets the storage profile (apply_storage_profile): WAL
+journaling so readers never block the writer and vice versa, synchronous=
+NORMAL, a sized page cache, memory-mapped reads and a busy timeout. Long-lived
+processes run a WalCheckpointer so checkpoints happen off the request path.
 """
+import os
 import sqlite3
 import logging
-from typing import Optional, List, Tuple, Any
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, List, Tuple, Any
 from .config import Config
 
 logger = logging.getLogger(__name__)
 
+# Per-thread {db_path: (connection, file identity)} and {db_path: open transaction depth}
+_local = threading.local()
+# Connections inherited across fork(); kept referenced so the child never
+# closes (and finalizes) the parent's SQLite handles
+_inherited: List[sqlite3.Connection] = []
+
+def _thread_connections() -> Dict[str, Tuple[sqlite3.Connection, Optional[Tuple[int, int]]]]:
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    return connections
+
+def _transaction_depths() -> Dict[str, int]:
+    depths = getattr(_local, 'depths', None)
+    if depths is None:
+        depths = _local.depths = {}
+    return depths
+
+def _file_identity(path: str) -> Optional[Tuple[int, int]]:
+    """(device, inode) of a database file, or None if it does not exist (yet)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+def _reset_after_fork() -> None:
+    """Forget the parent's connections (and checkpointer threads) in a freshly forked child."""
+    global _local
+    _inherited.extend(conn for conn, _ in getattr(_local, 'connections', {}).values())
+    _local = threading.local()
+    _checkpointers.clear()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def apply_storage_profile(conn: sqlite3.Connection, journal_mode: Optional[str] = None,
+                          busy_timeout_ms: Optional[int] = None) -> sqlite3.Connection:
+    """
+    Apply the storage profile from Config to a connection and return it.
+
+    WAL is a property of the database file, so the first connection to set
+    it converts the file and later ones only confirm it. synchronous=NORMAL
+    is only used under WAL, where it stays crash-safe (a power loss can drop
+    the last commits, never corrupt the file). If the journal mode cannot be
+    changed right now (another connection holds a lock), the connection is
+    still usable with the rest of the profile.
+    """
+    journal_mode = (journal_mode or Config.SQLITE_JOURNAL_MODE).upper()
+    if busy_timeout_ms is None:
+        busy_timeout_ms = Config.SQLITE_BUSY_TIMEOUT_MS
+    conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout_ms)}")
+    try:
+        mode = conn.execute(f"PRAGMA journal_mode = {journal_mode}").fetchone()[0].upper()
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Could not set journal_mode={journal_mode}: {e}")
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0].upper()
+    if mode == 'WAL':
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA journal_size_limit = {int(Config.SQLITE_WAL_LIMIT_MB) * 1024 * 1024}")
+    conn.execute(f"PRAGMA cache_size = {-int(Config.SQLITE_CACHE_MB) * 1024}")
+    conn.execute(f"PRAGMA mmap_size = {int(Config.SQLITE_MMAP_MB) * 1024 * 1024}")
+    return conn
+
+class WalCheckpointer:
+    """
+    Background thread that checkpoints a WAL database every `interval`
+    seconds, so the WAL does not grow while readers are always active and
+    writers rarely pay for a checkpoint at commit time. A PASSIVE checkpoint
+    never blocks readers or writers; once the WAL file exceeds
+    `truncate_bytes`, a TRUNCATE checkpoint (bounded by a short busy
+    timeout) resets it to zero length.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None, interval: Optional[float] = None,
+                 truncate_bytes: Optional[int] = None):
+        self.db_path = db_path or Config.DATABASE_NAME
+        self.interval = interval if interval is not None else Config.SQLITE_CHECKPOINT_SECONDS
+        self.truncate_bytes = (truncate_bytes if truncate_bytes is not None
+                               else Config.SQLITE_WAL_LIMIT_MB * 1024 * 1024)
+        self.checkpoints = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def checkpoint(self) -> Tuple[int, int, int]:
+        """Run one checkpoint now. Returns SQLite's (busy, wal pages, checkpointed pages)."""
+        conn = sqlite3.connect(self.db_path, timeout=1.0)
+        try:
+            mode = 'PASSIVE'
+            try:
+                if os.path.getsize(self.db_path + '-wal') > self.truncate_bytes:
+                    mode = 'TRUNCATE'
+            except OSError:
+                pass
+            result = conn.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+            self.checkpoints += 1
+            return tuple(result)
+        finally:
+            conn.close()
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.checkpoint()
+            except sqlite3.Error as e:
+                logger.warning(f"WAL checkpoint of {self.db_path} failed: {e}")
+    
+    def start(self) -> 'WalCheckpointer':
+        """Start checkpointing in a daemon thread."""
+        self._thread = threading.Thread(target=self._run, name='wal-checkpoint', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Stop the thread after its current checkpoint."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+# One checkpointer per database per process
+_checkpointers: Dict[str, WalCheckpointer] = {}
+_checkpointers_lock = threading.Lock()
+
+def start_wal_checkpointer(db_path: Optional[str] = None) -> WalCheckpointer:
+    """Start (once per process) the background checkpointer for a database."""
+    db_path = db_path or Config.DATABASE_NAME
+    with _checkpointers_lock:
+        checkpointer = _checkpointers.get(db_path)
+        if checkpointer is None:
+            checkpointer = _checkpointers[db_path] = WalCheckpointer(db_path).start()
+        return checkpointer
+
+def close_connections() -> None:
+    """Close every shared connection the calling thread holds."""
+    connections = _thread_connections()
+    while connections:
+        _, (conn, _) = connections.popitem()
+        conn.close()
+
 class DatabaseManager:
     """Database connection and management utilities."""
     
@@ -15,25 +168,89 @@ class DatabaseManager:
         """Initialize database manager with optional custom path."""
         self.db_path = db_path or Config.DATABASE_NAME
     
+    def connection(self) -> sqlite3.Connection:
+        """
+        Shared connection to `db_path` for the calling thread, opened on
+        first use. A file-backed connection is reopened if the database file
+        was replaced since (e.g. deleted and recreated), so it never points
+        at a stale file. Callers must not close it; use close() or
+        close_connections().
+        """
+        connections = _thread_connections()
+        entry = connections.get(self.db_path)
+        if entry is not None:
+            conn, identity = entry
+            if identity is None or _file_identity(self.db_path) == identity:
+                return conn
+            conn.close()
+        conn = self.get_connection()
+        connections[self.db_path] = (conn, _file_identity(self.db_path))
+        return conn
+    
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """
+        Unit of work on the shared connection: yields a cursor and commits
+        once when the block exits, or rolls everything back if it raises,
+        so readers never observe a partial write. The outermost block takes
+        the write lock up front (BEGIN IMMEDIATE); nested blocks become
+        savepoints that roll back on their own. execute_query/execute_many
+        calls made on the same database and thread while a block is open
+        join it instead of committing.
+        """
+        conn = self.connection()
+        depths = _transaction_depths()
+        depth = depths.get(self.db_path, 0)
+        savepoint = f"sp_{depth}"
+        conn.execute("BEGIN IMMEDIATE" if depth == 0 else f"SAVEPOINT {savepoint}")
+        depths[self.db_path] = depth + 1
+        cursor = conn.cursor()
+        try:
+            yield cursor
+        except BaseException:
+            if depth == 0:
+                conn.rollback()
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+        else:
+            if depth == 0:
+                conn.commit()
+            else:
+                conn.execute(f"RELEASE {savepoint}")
+        finally:
+            cursor.close()
+            depths[self.db_path] = depth
+    
+    def in_transaction(self) -> bool:
+        """Whether a transaction() block is open on this database in the calling thread."""
+        return _transaction_depths().get(self.db_path, 0) > 0
+    
+    def close(self) -> None:
+        """Close the calling thread's shared connection to `db_path`, if open."""
+        entry = _thread_connections().pop(self.db_path, None)
+        if entry is not None:
+            entry[0].close()
+    
     def get_connection(self, timeout: float = 30.0, isolation_level: Optional[str] = None) -> sqlite3.Connection:
-        """Get database connection with proper configuration."""
+        """Open a new, caller-owned database connection."""
         try:
             conn = sqlite3.connect(
                 self.db_path, 
                 timeout=timeout,
                 isolation_level=isolation_level
             )
-            return conn
+            return apply_storage_profile(conn, busy_timeout_ms=int(timeout * 1000))
         except sqlite3.Error as e:
             logger.error(f"Failed to connect to database {self.db_path}: {e}")
             raise
     
     def execute_query(self, query: str, params: Optional[Tuple] = None) -> List[Tuple]:
         """Execute query with error handling."""
-        conn = None
+        conn = self.connection()
+        cursor = conn.cursor()
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
             if params:
                 cursor.execute(query, params)
             else:
@@ -42,61 +259,50 @@ class DatabaseManager:
             if query.strip().upper().startswith('SELECT'):
                 return cursor.fetchall()
             else:
-                conn.commit()
+                if not self.in_transaction():
+                    conn.commit()
                 return []
         except sqlite3.Error as e:
             logger.error(f"Database query failed: {e}")
-            if conn:
+            if not self.in_transaction():
                 conn.rollback()
             raise
         finally:
-            if conn:
-                conn.close()
+            cursor.close()
     
     def execute_many(self, query: str, params_list: List[Tuple]) -> None:
         """Execute multiple queries with error handling."""
-        conn = None
+        conn = self.connection()
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            cursor.executemany(query, params_list)
-            conn.commit()
+            conn.executemany(query, params_list)
+            if not self.in_transaction():
+                conn.commit()
         except sqlite3.Error as e:
             logger.error(f"Database executemany failed: {e}")
-            if conn:
+            if not self.in_transaction():
                 conn.rollback()
             raise
-        finally:
-            if conn:
-                conn.close()
     
     def create_tables(self, schemas: dict) -> None:
         """Create tables from schema definitions."""
-        conn = None
+        conn = self.connection()
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
             for table_name, schema_sql in schemas.items():
                 logger.debug(f"Creating table '{table_name}'...")
-                cursor.execute(schema_sql)
+                conn.execute(schema_sql)
             
             conn.commit()
             logger.info("All tables created successfully or already exist.")
         except sqlite3.Error as e:
             logger.error(f"Database error during table setup: {e}")
-            if conn:
-                conn.rollback()
+            conn.rollback()
             raise
-        finally:
-            if conn:
-                conn.close()
     
     def table_exists(self, table_name: str) -> bool:
-        """Check if table exists."""
+        """Check if a table or view exists (`cases` is a view over case_records)."""
         try:
             result = self.execute_query(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
+                "SELECT name FROM sqlite_master WHERE type IN ('table', 'view') AND name=?",
                 (table_name,)
             )
             return len(result) > 0
@@ -104,6 +310,28 @@ class DatabaseManager:
             logger.error(f"Failed to check if table {table_name} exists: {e}")
             return False
     
+    def column_exists(self, table_name: str, column_name: str) -> bool:
+        """Check if a table has a column."""
+        try:
+            result = self.execute_query(
+                "SELECT 1 FROM pragma_table_info(?) WHERE name = ?",
+                (table_name, column_name)
+            )
+            return len(result) > 0
+        except sqlite3.Error as e:
+            logger.error(f"Failed to check if {table_name}.{column_name} exists: {e}")
+            return False
+    
+    def case_text_column(self, alias: str = "") -> str:
+        """
+        SQL expression for a case's plain-text body. Falls back to the raw
+        HTML body for rows (or databases) the scraper has not backfilled.
+        """
+        prefix = f"{alias}." if alias else ""
+        if self.column_exists('cases', 'body_text'):
+            return f"COALESCE({prefix}body_text, {prefix}body)"
+        return f"{prefix}body"
+    
     def get_table_info(self, table_name: str) -> List[Tuple]:
         """Get table schema information."""
         try:
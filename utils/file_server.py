@@ -1,16 +1,25 @@
 #!/usr/bin/env python3
 """
-Simple HTTP file server for downloading files from current directory
+Simple HTTP file server for downloading files from FILE_SERVER_DIRECTORY
 Usage: python file_server.py [port]
+
+The live database is never served: it may be mid-write and its newest
+commits may still be in the -wal file. Requests for it redirect to the
+newest snapshot (see snapshot_db.py), served from /snapshots/.
 """
 
 import http.server
 import socketserver
 import os
 import sys
-from urllib.parse import urlparse, unquote
+from urllib.parse import urlparse, unquote, quote
 from dotenv import load_dotenv
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.config import Config
+from utils.snapshots import SnapshotScheduler, latest_snapshot, list_snapshots
+
 # Load environment variables
 load_dotenv()
 
@@ -18,6 +27,19 @@ load_dotenv()
 PORT = int(os.getenv("FILE_SERVER_PORT", "8000"))
 DIRECTORY = os.getenv("FILE_SERVER_DIRECTORY", ".")
 
+SNAPSHOTS_URL = '/snapshots/'
+LATEST_SNAPSHOT_URL = SNAPSHOTS_URL + 'latest'
+
+def live_database_files():
+    """
+    Resolved paths of the live database and its journal files, which are never served.
+
+    A relative DATABASE_NAME is resolved against the served DIRECTORY, the
+    same way request paths are.
+    """
+    path = os.path.realpath(os.path.join(DIRECTORY, Config.DATABASE_NAME))
+    return {path + suffix for suffix in ('', '-wal', '-shm', '-journal')}
+
 class FileServerHandler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=DIRECTORY, **kwargs)
@@ -39,20 +61,69 @@ class FileServerHandler(http.server.SimpleHTTPRequestHandler):
         else:
             # Serve the requested file
             super().do_GET()
+
+    def send_head(self):
+        """Redirect the live database to the newest snapshot and serve snapshots; GET and HEAD both land here."""
+        path = unquote(urlparse(self.path).path)
+        # Compare the file the request resolves to, so /./, /x/../ and %-escapes cannot slip past
+        if os.path.realpath(self.translate_path(self.path)) in live_database_files():
+            return self.redirect(LATEST_SNAPSHOT_URL)
+        if path == LATEST_SNAPSHOT_URL:
+            latest = latest_snapshot()
+            if latest is None:
+                self.send_error(404, "No database snapshot has been taken yet")
+                return None
+            return self.redirect(SNAPSHOTS_URL + quote(os.path.basename(latest)))
+        if path.startswith(SNAPSHOTS_URL):
+            return self.send_snapshot(path[len(SNAPSHOTS_URL):])
+        return super().send_head()
+
+    def redirect(self, location):
+        self.send_response(302)
+        self.send_header('Location', location)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+        return None
+
+    def send_snapshot(self, name):
+        """Send the headers for a snapshot or its checksum file and return the open file."""
+        checksum = name.endswith('.sha256')
+        snapshots = {os.path.basename(path): path for path in list_snapshots()}
+        path = snapshots.get(name[:-len('.sha256')] if checksum else name)
+        if path is None:
+            self.send_error(404, "Snapshot not found")
+            return None
+        if checksum:
+            path += '.sha256'
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            # Pruned since it was listed
+            self.send_error(404, "Snapshot not found")
+            return None
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain' if checksum else 'application/gzip')
+        self.send_header('Content-Length', str(os.fstat(f.fileno()).st_size))
+        self.send_header('Content-Disposition', f'attachment; filename="{name}"')
+        self.end_headers()
+        return f
     
     def generate_directory_listing(self):
-        """Generate HTML listing of files in current directory"""
+        """Generate HTML listing of files in the served directory"""
         files = []
-        for item in os.listdir('.'):
-            if os.path.isfile(item):
-                size = os.path.getsize(item)
+        hidden = live_database_files()
+        directory = os.path.abspath(DIRECTORY)
+        for item in os.listdir(directory):
+            path = os.path.join(directory, item)
+            if os.path.isfile(path) and os.path.realpath(path) not in hidden:
+                size = os.path.getsize(path)
                 files.append((item, size))
         
         html = f"""
 <!DOCTYPE html>
 <html>
 <head>
-    <title>File Server - {os.getcwd()}</title>
+    <title>File Server - {directory}</title>
     <style>
         body {{ font-family: Arial, sans-serif; margin: 20px; }}
         h1 {{ color: #333; }}
@@ -72,7 +143,7 @@ class FileServerHandler(http.server.SimpleHTTPRequestHandler):
 </head>
 <body>
     <h1>File Server</h1>
-    <p><strong>Directory:</strong> {os.getcwd()}</p>
+    <p><strong>Directory:</strong> {directory}</p>
     <p><strong>Server:</strong> {self.server.server_address[0]}:{self.server.server_address[1]}</p>
     
     <h2>Available Files:</h2>
@@ -93,12 +164,50 @@ class FileServerHandler(http.server.SimpleHTTPRequestHandler):
         
         html += """
     </table>
+
+    <h2>Database Snapshots:</h2>
+"""
+        snapshots = list_snapshots()
+        if not snapshots:
+            html += """
+    <p>No snapshots yet. Run <code>python snapshot_db.py</code> to take one.</p>
+"""
+        else:
+            html += f"""
+    <p><a href="{LATEST_SNAPSHOT_URL}">Download the latest snapshot</a></p>
+    <table class="file-list">
+        <tr>
+            <th>Snapshot</th>
+            <th>Checksum</th>
+            <th class="size">Size (bytes)</th>
+        </tr>
+"""
+            for path in snapshots:
+                name = os.path.basename(path)
+                html += f"""
+        <tr>
+            <td><a href="{SNAPSHOTS_URL}{name}">{name}</a></td>
+            <td><a href="{SNAPSHOTS_URL}{name}.sha256">sha256</a></td>
+            <td class="size">{os.path.getsize(path):,}</td>
+        </tr>
+"""
+            html += """
+    </table>
+"""
+
+        html += """
 </body>
 </html>
 """
         return html
 
 def main():
+    # Optionally keep the served snapshot fresh from this process
+    scheduler = None
+    if Config.SNAPSHOT_INTERVAL_HOURS > 0:
+        scheduler = SnapshotScheduler().start()
+        print(f"Snapshotting {Config.DATABASE_NAME} every {Config.SNAPSHOT_INTERVAL_HOURS} hours")
+
     # Create server
     with socketserver.TCPServer(("0.0.0.0", PORT), FileServerHandler) as httpd:
         print(f"File server started on http://0.0.0.0:{PORT}")
@@ -109,6 +218,9 @@ def main():
             httpd.serve_forever()
         except KeyboardInterrupt:
             print("\nServer stopped.")
+        finally:
+            if scheduler is not None:
+                scheduler.stop()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
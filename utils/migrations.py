@@ -0,0 +1,316 @@
+"""
+Versioned schema migrations for the Project1960 database.
+
+Every schema change lives here as a numbered migration, applied in order by
+migrate() and recorded in the `schema_version` table. The scraper, the
+enrichment and verification entry points and migrate_schemas.py all run
+migrate() at startup, so any of them brings an existing database up to date
+and a fresh one to the current schema.
+
+Ordinary migrations run in a single transaction together with their
+`schema_version` row. Migrations that rewrite a large table are batched:
+each batch of rows commits on its own, so the web app and cron jobs keep
+reading and writing in between (the database runs in WAL mode). The
+version row is only written after the last batch, and every batch skips
+rows that are already done, so an interrupted run simply continues.
+"""
+import logging
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+from modules.enrichment.schemas import ENRICHMENT_STATUS_SCHEMA, get_all_schemas
+from .analytics import create_export_tracking
+from .case_storage import CASE_RECORDS, case_rows_table, split_case_bodies
+from .config import Config
+from .database import DatabaseManager
+from .search import create_search_index, create_search_triggers
+from .stats import create_stats_counters
+
+logger = logging.getLogger(__name__)
+
+# Rows per transaction in batched rewrites
+MIGRATION_BATCH_SIZE = 2000
+
+SCHEMA_VERSION_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_version (
+  version            INTEGER PRIMARY KEY,
+  description        TEXT NOT NULL,
+  applied_at         TEXT NOT NULL
+)
+"""
+
+class Migration(NamedTuple):
+    """A numbered schema change. Batched migrations manage their own transactions."""
+    version: int
+    description: str
+    apply: Callable
+    batched: bool = False
+
+##################################
+# Helpers
+##################################
+def table_exists(cursor, table: str) -> bool:
+    return cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+    ).fetchone() is not None
+
+def table_columns(cursor, table: str) -> List[str]:
+    return [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+
+def add_column(cursor, table: str, column: str, column_type: str) -> None:
+    """ALTER TABLE ... ADD COLUMN unless the table already has the column."""
+    if table_exists(cursor, table) and column not in table_columns(cursor, table):
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+def create_index(cursor, name: str, table: str, columns: Sequence[str], unique: bool = False) -> bool:
+    """
+    Create an index if the table has all of its columns. Older databases
+    created by other tools can lack a column; those are logged and skipped.
+    """
+    existing = table_columns(cursor, table) if table_exists(cursor, table) else []
+    missing = [column for column in columns if column not in existing]
+    if missing:
+        logger.warning(f"Skipping index {name}: {table} has no column(s) {', '.join(missing)}")
+        return False
+    cursor.execute(
+        f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    )
+    return True
+
+def rewrite_in_batches(manager: DatabaseManager, table: str, assignments: str, pending: str,
+                       batch_size: int) -> int:
+    """
+    UPDATE `table` SET `assignments` for rows matching `pending`, one rowid
+    range per transaction. `pending` must stop matching a row once it is
+    rewritten, which makes the rewrite resumable. Returns the rows updated.
+    """
+    with manager.transaction() as cursor:
+        if not table_exists(cursor, table):
+            return 0
+        low, high = cursor.execute(f"SELECT MIN(rowid), MAX(rowid) FROM {table}").fetchone()
+    if low is None:
+        return 0
+    updated = 0
+    for start in range(low, high + 1, batch_size):
+        with manager.transaction() as cursor:
+            cursor.execute(
+                f"UPDATE {table} SET {assignments} WHERE rowid BETWEEN ? AND ? AND ({pending})",
+                (start, start + batch_size - 1)
+            )
+            updated += cursor.rowcount
+    return updated
+
+##################################
+# Migrations
+##################################
+CASES_TABLE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+  id                 TEXT PRIMARY KEY,
+  title              TEXT,
+  date               TEXT,
+  body               TEXT,
+  url                TEXT,
+  teaser             TEXT,
+  number             TEXT,
+  component          TEXT,
+  topic              TEXT,
+  changed            TEXT,
+  created            TEXT,
+  mentions_1960      BOOLEAN,
+  mentions_crypto    BOOLEAN
+)
+"""
+
+def _core_tables(cursor) -> None:
+    cursor.execute(CASES_TABLE_SCHEMA)
+    cursor.execute("CREATE TABLE IF NOT EXISTS scraper_state (key TEXT PRIMARY KEY, value TEXT)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS case_labels (
+          case_id            TEXT NOT NULL,
+          label              TEXT NOT NULL,
+          PRIMARY KEY (case_id, label)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_case_labels_label ON case_labels (label)")
+    for schema in get_all_schemas().values():
+        cursor.execute(schema)
+
+def _legacy_enrichment_columns(cursor) -> None:
+    add_column(cursor, 'participants', 'title', 'TEXT')
+    add_column(cursor, 'charges', 'charge_description', 'TEXT')
+
+def _verification_columns(cursor) -> None:
+    add_column(cursor, 'cases', 'verified_1960', 'BOOLEAN DEFAULT FALSE')
+    add_column(cursor, 'cases', 'verified_crypto', 'BOOLEAN DEFAULT FALSE')
+    add_column(cursor, 'cases', 'classification', 'TEXT')
+
+def _body_columns(cursor) -> None:
+    add_column(cursor, 'cases', 'body_hash', 'TEXT')
+    add_column(cursor, 'cases', 'body_text', 'TEXT')
+
+def _default_verification_flags(manager: DatabaseManager, batch_size: int) -> None:
+    # Rows from before the columns existed hold NULL instead of FALSE
+    rewrite_in_batches(
+        manager, 'cases',
+        "verified_1960 = COALESCE(verified_1960, 0), verified_crypto = COALESCE(verified_crypto, 0)",
+        "verified_1960 IS NULL OR verified_crypto IS NULL",
+        batch_size
+    )
+
+def _has_unique_id_index(cursor) -> bool:
+    for _, name, unique, *_ in cursor.execute(f"PRAGMA index_list({case_rows_table(cursor)})").fetchall():
+        if unique and [row[2] for row in cursor.execute(f"PRAGMA index_info('{name}')")] == ['id']:
+            return True
+    return False
+
+def _unique_case_ids(manager: DatabaseManager, batch_size: int) -> None:
+    """
+    Older verifier runs rebuilt `cases` with CREATE TABLE ... AS SELECT,
+    which drops the PRIMARY KEY: id lookups became full scans and re-crawls
+    could insert duplicates. Remove duplicates (keeping the classified, then
+    newest copy), then restore uniqueness with an index.
+    """
+    with manager.transaction() as cursor:
+        if _has_unique_id_index(cursor):
+            return
+        duplicates = [row[0] for row in cursor.execute(
+            "SELECT id FROM cases GROUP BY id HAVING COUNT(*) > 1"
+        )]
+    if duplicates:
+        logger.info(f"Removing duplicate rows for {len(duplicates)} case ids...")
+    for start in range(0, len(duplicates), batch_size):
+        batch = duplicates[start:start + batch_size]
+        with manager.transaction() as cursor:
+            cursor.execute(f"""
+                DELETE FROM cases
+                WHERE id IN ({', '.join('?' * len(batch))})
+                  AND rowid != (
+                    SELECT keep.rowid FROM cases keep WHERE keep.id = cases.id
+                    ORDER BY keep.classification IS NOT NULL DESC, keep.rowid DESC LIMIT 1
+                  )
+            """, batch)
+    with manager.transaction() as cursor:
+        create_index(cursor, 'idx_cases_id', case_rows_table(cursor), ['id'], unique=True)
+
+ENRICHMENT_CHILD_TABLES = ['participants', 'case_agencies', 'charges', 'financial_actions',
+                           'victims', 'quotes', 'themes']
+
+def _hot_query_indexes(cursor) -> None:
+    # Case page and dashboard counts: per-case lookups in every enrichment table
+    for table in ENRICHMENT_CHILD_TABLES:
+        create_index(cursor, f'idx_{table}_case_id', table, ['case_id'])
+    # Verification picker, dashboard counts and the enrichment picker's newest-first scans
+    cases = case_rows_table(cursor)
+    create_index(cursor, 'idx_cases_1960_classification_date', cases, ['mentions_1960', 'classification', 'date'])
+    create_index(cursor, 'idx_cases_1960_verified', cases, ['mentions_1960', 'verified_1960'])
+    create_index(cursor, 'idx_cases_crypto', cases, ['mentions_crypto'])
+    create_index(cursor, 'idx_cases_created', cases, ['created'])
+    create_index(cursor, 'idx_cases_classification_created', cases, ['classification', 'created'])
+    # Latest enrichment status of a case for a table
+    create_index(cursor, 'idx_activity_table_case_time', 'enrichment_activity_log',
+                 ['table_name', 'case_id', 'timestamp'])
+
+def _enrichment_status(cursor) -> None:
+    """
+    Create enrichment_status and fill it from the activity log: the status
+    of the last entry (by log_id, i.e. insertion order), the number of
+    entries that were attempts (not 'stale') and the latest attempt and
+    success times. Runs in one transaction, so writers cannot interleave
+    with the backfill.
+    """
+    cursor.execute(ENRICHMENT_STATUS_SCHEMA)
+    cursor.execute("DELETE FROM enrichment_status")
+    cursor.execute("""
+        INSERT INTO enrichment_status (case_id, table_name, status, attempts, last_attempt_at, last_success_at)
+        SELECT l.case_id, l.table_name,
+               (SELECT latest.status FROM enrichment_activity_log latest
+                WHERE latest.table_name = l.table_name AND latest.case_id = l.case_id
+                ORDER BY latest.log_id DESC LIMIT 1),
+               SUM(l.status != 'stale'),
+               MAX(CASE WHEN l.status != 'stale' THEN l.timestamp END),
+               MAX(CASE WHEN l.status = 'success' THEN l.timestamp END)
+        FROM enrichment_activity_log l
+        GROUP BY l.case_id, l.table_name
+    """)
+
+def _split_case_bodies(cursor) -> None:
+    """
+    Move the bodies into case_bodies behind a `cases` view (see
+    utils/case_storage.py) and re-point the search index triggers. This is
+    a table swap, so unlike the row rewrites above it cannot be batched:
+    writers wait for it, while WAL readers keep reading the old layout.
+    """
+    split_case_bodies(cursor)
+    # The case list's newest-first page
+    create_index(cursor, 'idx_cases_date', CASE_RECORDS, ['date'])
+    if table_exists(cursor, 'cases_fts'):
+        create_search_triggers(cursor)
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "Core tables: cases, scraper state, case labels, enrichment tables", _core_tables),
+    Migration(2, "Add participants.title and charges.charge_description", _legacy_enrichment_columns),
+    Migration(3, "Add cases verification columns", _verification_columns),
+    Migration(4, "Add cases.body_hash and cases.body_text", _body_columns),
+    Migration(5, "Default NULL verification flags to FALSE", _default_verification_flags, batched=True),
+    Migration(6, "Deduplicate cases and index cases.id as unique", _unique_case_ids, batched=True),
+    Migration(7, "Indexes for enrichment lookups, dashboard counts and pickers", _hot_query_indexes),
+    Migration(8, "Enrichment status table, backfilled from the activity log", _enrichment_status),
+    Migration(9, "Trigger-maintained dashboard counters", create_stats_counters),
+    Migration(10, "FTS5 search index over case titles and plain-text bodies", create_search_index),
+    Migration(11, "Narrow case_records with bodies in case_bodies behind a cases view", _split_case_bodies),
+    Migration(12, "Change log of the partitions the Parquet export must rewrite", create_export_tracking),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+##################################
+# Runner
+##################################
+def get_schema_version(manager: DatabaseManager) -> int:
+    """Highest applied migration version (0 for a database never migrated)."""
+    with manager.transaction() as cursor:
+        cursor.execute(SCHEMA_VERSION_TABLE)
+        return cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+def _record(cursor, migration: Migration) -> None:
+    cursor.execute(
+        "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+        (migration.version, migration.description, datetime.now().isoformat(timespec='seconds'))
+    )
+
+def migrate(db_path: Optional[str] = None, target: Optional[int] = None,
+            batch_size: int = MIGRATION_BATCH_SIZE) -> int:
+    """
+    Apply every pending migration up to `target` (default: all) and return
+    the resulting schema version. Safe to call concurrently from several
+    processes: each migration re-checks the version under the write lock.
+    """
+    manager = DatabaseManager(db_path or Config.DATABASE_NAME)
+    version = get_schema_version(manager)
+    for migration in MIGRATIONS:
+        if migration.version <= version or (target is not None and migration.version > target):
+            continue
+        logger.info(f"Applying migration {migration.version}: {migration.description}")
+        if migration.batched:
+            migration.apply(manager, batch_size)
+            with manager.transaction() as cursor:
+                if not cursor.execute("SELECT 1 FROM schema_version WHERE version = ?",
+                                      (migration.version,)).fetchone():
+                    _record(cursor, migration)
+        else:
+            with manager.transaction() as cursor:
+                if cursor.execute("SELECT 1 FROM schema_version WHERE version = ?",
+                                  (migration.version,)).fetchone():
+                    continue
+                migration.apply(cursor)
+                _record(cursor, migration)
+        version = migration.version
+    return get_schema_version(manager)
+
+def migration_status(db_path: Optional[str] = None) -> List[tuple]:
+    """(version, description, applied_at or None) for every known migration."""
+    manager = DatabaseManager(db_path or Config.DATABASE_NAME)
+    get_schema_version(manager)
+    applied = {version: applied_at for version, applied_at in
+               manager.execute_query("SELECT version, applied_at FROM schema_version")}
+    return [(m.version, m.description, applied.get(m.version)) for m in MIGRATIONS]
@@ -0,0 +1,148 @@
+"""
+Request rate limiting utilities for the Project1960.
+"""
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+class AdaptiveRateLimiter:
+    """
+    Thread-safe token bucket that adapts its rate to the server.
+
+    Requests are admitted at `current_rate` (never above `target_rate`) with
+    bursts of up to `burst` requests. A throttling response (429/5xx or a
+    transport error) halves the rate and pauses every thread, either for the
+    server's Retry-After or for an exponential backoff with jitter. Each
+    success ramps the rate back towards the target.
+    """
+
+    def __init__(self, target_rate: Optional[float] = None, initial_rate: Optional[float] = None,
+                 burst: float = 1.0, min_rate: float = 0.05, ramp_step: Optional[float] = None,
+                 backoff_base: float = 1.0, max_backoff: float = 300.0, jitter: float = 0.5):
+        """
+        Initialize the limiter.
+
+        Args:
+            target_rate: Requests per second to hold when the server is healthy.
+                None or 0 admits requests without spacing (pauses still apply).
+            initial_rate: Starting rate, e.g. the rate a previous run settled at
+            burst: Maximum number of tokens that can accumulate
+            min_rate: Lower bound for the adapted rate
+            ramp_step: Rate increase per success (default: 10% of the target)
+            backoff_base: Pause in seconds after the first consecutive failure
+            max_backoff: Upper bound for a single pause
+            jitter: Pauses are scaled by a random factor in [1 - jitter, 1 + jitter]
+        """
+        self.target_rate = target_rate or None
+        self.min_rate = min_rate
+        self.ramp_step = ramp_step or (self.target_rate * 0.1 if self.target_rate else 0.0)
+        self.burst = max(burst, 1.0)
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+
+        if self.target_rate:
+            rate = initial_rate if initial_rate else self.target_rate
+            self.current_rate = max(self.min_rate, min(self.target_rate, rate))
+        else:
+            self.current_rate = None
+
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._failures = 0
+        self._started = None
+        self.successes = 0
+        self.throttled = 0
+
+    def _refill(self, now: float) -> None:
+        if self.current_rate:
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.current_rate)
+        self._last_refill = now
+
+    def acquire(self) -> float:
+        """
+        Block until a token is available and no pause is in effect.
+
+        Returns:
+            Number of seconds spent waiting
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._started is None:
+                self._started = now
+            self._refill(now)
+            delay = max(0.0, self._blocked_until - now)
+            if self.current_rate:
+                # Reserve a token; a negative balance is paid back over time
+                self._tokens -= 1
+                if self._tokens < 0:
+                    delay = max(delay, -self._tokens / self.current_rate)
+
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def on_success(self) -> None:
+        """Record a successful request and ramp the rate back up."""
+        with self._lock:
+            self.successes += 1
+            self._failures = 0
+            if self.current_rate and self.current_rate < self.target_rate:
+                self._refill(time.monotonic())
+                self.current_rate = min(self.target_rate, self.current_rate + self.ramp_step)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> float:
+        """
+        Record a throttled or failed request: halve the rate and pause all
+        threads for `retry_after` seconds or an exponential backoff.
+
+        Returns:
+            Length of the pause in seconds
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            self._failures += 1
+            if self.current_rate:
+                self._refill(now)
+                self.current_rate = max(self.min_rate, self.current_rate / 2)
+
+            if retry_after is not None and retry_after >= 0:
+                pause = min(float(retry_after), self.max_backoff)
+            else:
+                pause = min(self.max_backoff, self.backoff_base * 2 ** (self._failures - 1))
+                pause *= random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._blocked_until = max(self._blocked_until, now + pause)
+            return pause
+
+    def observed_rate(self) -> float:
+        """Successful requests per second since the first acquire."""
+        with self._lock:
+            if self._started is None:
+                return 0.0
+            elapsed = time.monotonic() - self._started
+            return self.successes / elapsed if elapsed > 0 else 0.0
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (delay in seconds or an HTTP date) into seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
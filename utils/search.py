@@ -0,0 +1,213 @@
+"""
+Full-text search over case titles and plain-text bodies.
+
+`cases_fts` is an FTS5 index whose content lives in `cases` itself (an
+external content table keyed by the cases rowid), so the text is not
+stored twice. Triggers keep the index in step with every insert, update
+and delete: on `cases` itself, or, once cases is a view over
+case_records and case_bodies (see utils/case_storage.py), on those two
+tables. Queries are ranked with BM25, with title matches weighted above
+body matches.
+
+Search text from users is turned into an FTS5 query by build_match_query():
+plain words must all match, "quoted phrases" match as phrases, a trailing
+`*` makes a prefix query, and an uppercase OR between two terms matches
+either. Anything else (FTS5 operators, column filters, stray punctuation)
+is treated as literal text, so user input can never be a syntax error.
+"""
+import html
+import logging
+import re
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from .case_storage import CASE_RECORDS, is_split
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS cases_fts USING fts5(
+  title, body_text,
+  content='cases', content_rowid='rowid',
+  tokenize='porter unicode61 remove_diacritics 2',
+  prefix='2 3'
+)
+"""
+
+SEARCH_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS cases_fts_insert AFTER INSERT ON cases BEGIN
+      INSERT INTO cases_fts (rowid, title, body_text) VALUES (NEW.rowid, NEW.title, NEW.body_text);
+    END""",
+    """
+    CREATE TRIGGER IF NOT EXISTS cases_fts_delete AFTER DELETE ON cases BEGIN
+      INSERT INTO cases_fts (cases_fts, rowid, title, body_text) VALUES ('delete', OLD.rowid, OLD.title, OLD.body_text);
+    END""",
+    """
+    CREATE TRIGGER IF NOT EXISTS cases_fts_update AFTER UPDATE OF title, body_text ON cases BEGIN
+      INSERT INTO cases_fts (cases_fts, rowid, title, body_text) VALUES ('delete', OLD.rowid, OLD.title, OLD.body_text);
+      INSERT INTO cases_fts (rowid, title, body_text) VALUES (NEW.rowid, NEW.title, NEW.body_text);
+    END""",
+]
+
+# The same for the split layout: a document is the case_records title plus
+# the case_bodies text, under the case_records rowid. Every trigger removes
+# the document as it was indexed and adds it as it is now.
+def _body_text(row: str) -> str:
+    return f"(SELECT body_text FROM case_bodies WHERE case_id = {row}.id)"
+
+def _delete_record_doc(case_id: str, body_text: str) -> str:
+    return (f"INSERT INTO cases_fts (cases_fts, rowid, title, body_text) "
+            f"SELECT 'delete', rowid, title, {body_text} FROM {CASE_RECORDS} WHERE id = {case_id};")
+
+def _insert_record_doc(case_id: str, body_text: str) -> str:
+    return (f"INSERT INTO cases_fts (rowid, title, body_text) "
+            f"SELECT rowid, title, {body_text} FROM {CASE_RECORDS} WHERE id = {case_id};")
+
+SPLIT_SEARCH_TRIGGERS = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS cases_fts_insert AFTER INSERT ON {CASE_RECORDS} BEGIN
+      INSERT INTO cases_fts (rowid, title, body_text) VALUES (NEW.rowid, NEW.title, {_body_text('NEW')});
+    END""",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS cases_fts_delete AFTER DELETE ON {CASE_RECORDS} BEGIN
+      INSERT INTO cases_fts (cases_fts, rowid, title, body_text) VALUES ('delete', OLD.rowid, OLD.title, {_body_text('OLD')});
+    END""",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS cases_fts_update AFTER UPDATE OF id, title ON {CASE_RECORDS} BEGIN
+      INSERT INTO cases_fts (cases_fts, rowid, title, body_text) VALUES ('delete', OLD.rowid, OLD.title, {_body_text('OLD')});
+      INSERT INTO cases_fts (rowid, title, body_text) VALUES (NEW.rowid, NEW.title, {_body_text('NEW')});
+    END""",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS cases_fts_body_insert AFTER INSERT ON case_bodies BEGIN
+      {_delete_record_doc('NEW.case_id', 'NULL')}
+      {_insert_record_doc('NEW.case_id', 'NEW.body_text')}
+    END""",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS cases_fts_body_delete AFTER DELETE ON case_bodies BEGIN
+      {_delete_record_doc('OLD.case_id', 'OLD.body_text')}
+      {_insert_record_doc('OLD.case_id', 'NULL')}
+    END""",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS cases_fts_body_update AFTER UPDATE OF case_id, body_text ON case_bodies BEGIN
+      {_delete_record_doc('OLD.case_id', 'OLD.body_text')}
+      {_insert_record_doc('OLD.case_id', 'NULL')}
+      {_delete_record_doc('NEW.case_id', 'NULL')}
+      {_insert_record_doc('NEW.case_id', 'NEW.body_text')}
+    END""",
+]
+
+# BM25 column weights: a title hit counts ten times a body hit. Stored as
+# the table's rank function, so ORDER BY rank is evaluated inside FTS5.
+RANK = "bm25(10.0, 1.0)"
+
+# Snippets are built with control characters as highlight markers, then
+# HTML-escaped and the markers turned into <mark> tags
+_OPEN, _CLOSE = "\x02", "\x03"
+SNIPPET = f"snippet(cases_fts, -1, '{_OPEN}', '{_CLOSE}', '…', 24)"
+
+_TERM = re.compile(r'"([^"]*)"?|(\S+)')
+_WORD = re.compile(r"\w+")
+
+def create_search_index(cursor) -> None:
+    """Create cases_fts and its triggers, and index every existing case."""
+    cursor.execute(SEARCH_TABLE)
+    cursor.execute("INSERT INTO cases_fts (cases_fts, rank) VALUES ('rank', ?)", (RANK,))
+    create_search_triggers(cursor)
+    rebuild_search_index(cursor)
+
+def create_search_triggers(cursor) -> None:
+    """(Re)create the index triggers that match the current storage layout."""
+    for (trigger,) in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'cases\\_fts\\_%' ESCAPE '\\'").fetchall():
+        cursor.execute(f"DROP TRIGGER {trigger}")
+    for trigger in SPLIT_SEARCH_TRIGGERS if is_split(cursor) else SEARCH_TRIGGERS:
+        cursor.execute(trigger)
+
+def rebuild_search_index(cursor) -> None:
+    """Re-read every case into the index (e.g. after editing cases with the triggers dropped)."""
+    cursor.execute("INSERT INTO cases_fts (cases_fts) VALUES ('rebuild')")
+
+def search_available(conn) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'cases_fts'"
+    ).fetchone() is not None
+
+def _quote(words: List[str]) -> str:
+    return '"' + " ".join(words) + '"'
+
+def build_match_query(text: str) -> Optional[str]:
+    """
+    Translate user search text into an FTS5 query, or None if it has no
+    searchable words. Every term is emitted as a quoted string, so FTS5
+    syntax in the input is only ever matched literally.
+    """
+    parts = []
+    for match in _TERM.finditer(text or ""):
+        phrase, word = match.groups()
+        if phrase is not None:
+            words = _WORD.findall(phrase)
+            if words:
+                parts.append(_quote(words))
+            continue
+        if word == "OR":
+            if parts and parts[-1] != "OR":
+                parts.append("OR")
+            continue
+        words = _WORD.findall(word)
+        if not words:
+            continue
+        term = _quote(words)
+        if word.endswith("*"):
+            term += "*"
+        parts.append(term)
+    while parts and parts[-1] == "OR":
+        parts.pop()
+    return " ".join(parts) or None
+
+def highlight(snippet: Optional[str]) -> str:
+    """HTML-escape a snippet and wrap the matched terms in <mark> tags."""
+    if not snippet:
+        return ""
+    return html.escape(snippet).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+def search_cases(conn, text: str, filters: Optional[Dict[str, object]] = None,
+                 limit: int = 20, offset: int = 0) -> Tuple[int, List[dict]]:
+    """
+    Search cases, best match first. `filters` maps cases columns to
+    required values. Returns (total matches, page of results), where each
+    result holds the cases columns plus `rank` and an HTML `snippet`.
+    """
+    match_query = build_match_query(text)
+    if match_query is None:
+        return 0, []
+    where = "cases_fts MATCH ?"
+    params: List[object] = [match_query]
+    for column, value in (filters or {}).items():
+        where += f" AND c.{column} = ?"
+        params.append(value)
+    # Without filters the count never has to touch cases
+    count_from = "cases_fts JOIN cases c ON c.rowid = cases_fts.rowid" if filters else "cases_fts"
+
+    try:
+        total = conn.execute(f"SELECT COUNT(*) FROM {count_from} WHERE {where}", params).fetchone()[0]
+        rows = conn.execute(f"""
+            SELECT c.id, c.title, c.date, c.url, c.component, c.classification,
+                   c.mentions_1960, c.mentions_crypto, cases_fts.rank, {SNIPPET} AS snippet
+            FROM cases_fts JOIN cases c ON c.rowid = cases_fts.rowid
+            WHERE {where}
+            ORDER BY cases_fts.rank
+            LIMIT ? OFFSET ?
+        """, params + [limit, offset]).fetchall()
+    except sqlite3.OperationalError as e:
+        logger.error(f"Search for {text!r} failed: {e}")
+        return 0, []
+
+    columns = ['id', 'title', 'date', 'url', 'component', 'classification',
+               'mentions_1960', 'mentions_crypto', 'rank', 'snippet']
+    results = []
+    for row in rows:
+        result = dict(zip(columns, row))
+        result['snippet'] = highlight(result['snippet'])
+        results.append(result)
+    return total, results
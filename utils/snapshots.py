@@ -0,0 +1,235 @@
+"""
+Consistent, compressed snapshots of the Project1960 database.
+
+Copying doj_cases.db while the scraper or an enrichment run is writing can
+produce a torn file, and misses whatever is still in the WAL. Snapshots
+use SQLite's online backup API instead, copying a batch of pages per step:
+
+- Under WAL, the source connection holds one read transaction for the
+  whole copy. The snapshot is the database as of a single commit, and
+  writers keep committing meanwhile (the WAL just cannot be checkpointed
+  past the copy until it finishes).
+- Under a rollback journal, the shared lock is released between steps so
+  writers can commit; a write from another connection restarts the copy.
+
+Each copy is switched to a rollback journal (so it opens read-only without
+a -wal file), checked with PRAGMA integrity_check, gzip-compressed and
+published atomically as `<name>-<UTC timestamp>.db.gz`, with a `.sha256`
+checksum file next to it. Only the newest SNAPSHOT_KEEP snapshots are kept.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SUFFIX = ".db.gz"
+TIMESTAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+
+##################################
+# Naming and retention
+##################################
+def _stem(db_path: str) -> str:
+    return os.path.splitext(os.path.basename(db_path))[0]
+
+def _pattern(db_path: str):
+    return re.compile(re.escape(_stem(db_path)) + r"-(\d{8}T\d{6}Z)" + re.escape(SNAPSHOT_SUFFIX) + "$")
+
+def snapshot_time(path: str, db_path: Optional[str] = None) -> Optional[datetime]:
+    """When a snapshot was taken, from its file name (None if it is not a snapshot)."""
+    match = _pattern(db_path or Config.DATABASE_NAME).match(os.path.basename(path))
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+
+def list_snapshots(directory: Optional[str] = None, db_path: Optional[str] = None) -> List[str]:
+    """Paths of the snapshots of a database, newest first."""
+    directory = directory or Config.SNAPSHOT_DIR
+    pattern = _pattern(db_path or Config.DATABASE_NAME)
+    try:
+        names = [name for name in os.listdir(directory) if pattern.match(name)]
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name) for name in sorted(names, reverse=True)]
+
+def latest_snapshot(directory: Optional[str] = None, db_path: Optional[str] = None) -> Optional[str]:
+    snapshots = list_snapshots(directory, db_path)
+    return snapshots[0] if snapshots else None
+
+def prune_snapshots(directory: Optional[str] = None, keep: Optional[int] = None,
+                    db_path: Optional[str] = None) -> List[str]:
+    """Delete all but the newest `keep` snapshots (and their checksums). Returns the deleted paths."""
+    keep = Config.SNAPSHOT_KEEP if keep is None else keep
+    deleted = list_snapshots(directory, db_path)[max(keep, 1):]
+    for path in deleted:
+        for name in (path, path + ".sha256"):
+            try:
+                os.remove(name)
+            except FileNotFoundError:
+                pass
+    return deleted
+
+##################################
+# Snapshots
+##################################
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _check_integrity(path: str) -> None:
+    conn = sqlite3.connect(path)
+    try:
+        result = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+    finally:
+        conn.close()
+    if result != ['ok']:
+        raise RuntimeError(f"Integrity check of {path} failed: {'; '.join(result[:5])}")
+
+def backup_database(db_path: str, target_path: str, pages_per_step: Optional[int] = None,
+                    step_sleep_ms: Optional[float] = None) -> None:
+    """
+    Copy a live database to `target_path` with the online backup API,
+    `pages_per_step` pages at a time with a pause of `step_sleep_ms` in
+    between, and check the copy's integrity.
+    """
+    pages_per_step = pages_per_step or Config.SNAPSHOT_PAGES_PER_STEP
+    pause = (Config.SNAPSHOT_STEP_SLEEP_MS if step_sleep_ms is None else step_sleep_ms) / 1000
+    source = sqlite3.connect(db_path, isolation_level=None, timeout=Config.SQLITE_BUSY_TIMEOUT_MS / 1000)
+    target = sqlite3.connect(target_path)
+    try:
+        if source.execute("PRAGMA journal_mode").fetchone()[0].lower() == 'wal':
+            # Pin one snapshot: every step then reads the same commit
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+        def between_steps(status, remaining, total):
+            if remaining and pause:
+                time.sleep(pause)
+
+        source.backup(target, pages=pages_per_step, progress=between_steps)
+        target.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        target.close()
+        source.close()
+    _check_integrity(target_path)
+
+def create_snapshot(db_path: Optional[str] = None, directory: Optional[str] = None,
+                    keep: Optional[int] = None, pages_per_step: Optional[int] = None,
+                    step_sleep_ms: Optional[float] = None) -> str:
+    """Take, check, compress and publish a snapshot, then apply retention. Returns its path."""
+    db_path = db_path or Config.DATABASE_NAME
+    directory = directory or Config.SNAPSHOT_DIR
+    if not os.path.isfile(db_path):
+        # sqlite3.connect() would create an empty database and snapshot that
+        raise FileNotFoundError(f"Database {db_path} not found")
+    os.makedirs(directory, exist_ok=True)
+    name = f"{_stem(db_path)}-{datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)}{SNAPSHOT_SUFFIX}"
+    path = os.path.join(directory, name)
+    start = time.perf_counter()
+
+    # Work files are dot-files in the same directory, so publishing is a rename
+    fd, copy_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".db", dir=directory)
+    os.close(fd)
+    partial_path = copy_path + ".gz"
+    try:
+        backup_database(db_path, copy_path, pages_per_step, step_sleep_ms)
+        with open(copy_path, 'rb') as src, gzip.open(partial_path, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        checksum = _sha256(partial_path)
+        os.replace(partial_path, path)
+        with open(path + ".sha256", 'w') as f:
+            f.write(f"{checksum}  {name}\n")
+    finally:
+        for work_file in (copy_path, partial_path):
+            if os.path.exists(work_file):
+                os.remove(work_file)
+
+    logger.info(f"Snapshot {path} ({os.path.getsize(path) / 1e6:.1f} MB) "
+                f"taken in {time.perf_counter() - start:.1f}s")
+    for deleted in prune_snapshots(directory, keep, db_path):
+        logger.info(f"Removed old snapshot {deleted}")
+    return path
+
+def verify_snapshot(path: str) -> None:
+    """Check a snapshot's checksum (if it has one) and the integrity of the database inside. Raises RuntimeError."""
+    checksum_path = path + ".sha256"
+    if os.path.exists(checksum_path):
+        with open(checksum_path) as f:
+            expected = f.read().split()[0]
+        if _sha256(path) != expected:
+            raise RuntimeError(f"Checksum mismatch for {path}")
+    fd, copy_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        with gzip.open(path, 'rb') as src, open(copy_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        _check_integrity(copy_path)
+    except (OSError, EOFError, zlib.error) as e:
+        raise RuntimeError(f"Could not read {path}: {e}")
+    finally:
+        os.remove(copy_path)
+
+##################################
+# Scheduler
+##################################
+class SnapshotScheduler:
+    """
+    Background thread that takes a snapshot every `interval_hours`. It
+    counts from the newest existing snapshot, so a restart neither skips
+    a snapshot nor takes an extra one.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, directory: Optional[str] = None,
+                 interval_hours: Optional[float] = None, keep: Optional[int] = None):
+        self.db_path = db_path or Config.DATABASE_NAME
+        self.directory = directory or Config.SNAPSHOT_DIR
+        self.interval = timedelta(hours=interval_hours if interval_hours is not None
+                                  else Config.SNAPSHOT_INTERVAL_HOURS)
+        self.keep = keep
+        self.snapshots = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def seconds_until_due(self) -> float:
+        latest = latest_snapshot(self.directory, self.db_path)
+        if latest is None:
+            return 0.0
+        due = snapshot_time(latest, self.db_path) + self.interval
+        return max(0.0, (due - datetime.now(timezone.utc)).total_seconds())
+
+    def run(self) -> None:
+        """Take snapshots until stop() is called."""
+        while not self._stop.wait(self.seconds_until_due()):
+            try:
+                create_snapshot(self.db_path, self.directory, self.keep)
+                self.snapshots += 1
+            except (sqlite3.Error, OSError, RuntimeError) as e:
+                logger.error(f"Snapshot of {self.db_path} failed: {e}")
+                # Retry after a tenth of the interval rather than spinning
+                self._stop.wait(self.interval.total_seconds() / 10)
+
+    def start(self) -> 'SnapshotScheduler':
+        """Take snapshots in a daemon thread."""
+        self._thread = threading.Thread(target=self.run, name='db-snapshot', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,170 @@
+"""
+Materialized dashboard statistics for the Project1960 database.
+
+The `stats_counters` table holds one row per statistic the dashboard
+shows. Triggers on the case rows (case_records, see
+utils/case_storage.py) and on every enrichment table keep it exact in the
+same transaction as the write that changes it, so reading the statistics
+costs a handful of primary key lookups however large the corpus grows. reconcile_stats() recounts everything from scratch and
+repairs any drift (e.g. after a manual edit with triggers dropped).
+"""
+import logging
+import re
+import sqlite3
+from typing import Dict, Optional
+
+from .case_storage import case_rows_table
+from .config import Config
+from .database import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+STATS_COUNTERS_TABLE = """
+CREATE TABLE IF NOT EXISTS stats_counters (
+  name               TEXT PRIMARY KEY,
+  value              INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+# Counter name -> expression over a case row that is 1 when the row counts.
+# `{row}` is NEW/OLD in triggers and the table name when recounting.
+CASE_COUNTERS = {
+    'cases': "1",
+    'mentions_1960': "{row}.mentions_1960 IS 1",
+    'mentions_crypto': "{row}.mentions_crypto IS 1",
+    'verified_1960_yes': "{row}.mentions_1960 IS 1 AND {row}.verified_1960 IS 1",
+    'verified_1960_no': "{row}.mentions_1960 IS 1 AND {row}.verified_1960 IS 0",
+}
+
+# Tables whose distinct case_id count is shown as enrichment progress
+ENRICHMENT_TABLES = ['case_metadata', 'participants', 'case_agencies', 'charges',
+                     'financial_actions', 'victims', 'quotes', 'themes']
+
+def enrichment_counter(table: str) -> str:
+    return f"enriched:{table}"
+
+def _counter_columns(expr: str) -> set:
+    return set(re.findall(r"\{row\}\.(\w+)", expr))
+
+def _case_counters(cursor, table: str) -> Dict[str, str]:
+    """The case counters whose columns exist (test and legacy databases can lack some)."""
+    columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    return {name: expr for name, expr in CASE_COUNTERS.items() if _counter_columns(expr) <= columns}
+
+def _case_delta(counters: Dict[str, str], sign: str, row: str) -> str:
+    """`CASE name WHEN ... END` adding (sign '+') or removing (sign '-') one row's contributions."""
+    whens = " ".join(f"WHEN '{name}' THEN ({expr.format(row=row)})" for name, expr in counters.items())
+    return f"{sign} CASE name {whens} ELSE 0 END"
+
+def _case_triggers(table: str, counters: Dict[str, str]):
+    names = ", ".join(f"'{name}'" for name in counters)
+    columns = sorted(set().union(*(_counter_columns(expr) for expr in counters.values())))
+    update = "UPDATE stats_counters SET value = value {delta} WHERE name IN (" + names + ");"
+    yield f"""
+        CREATE TRIGGER stats_cases_insert AFTER INSERT ON {table} BEGIN
+          {update.format(delta=_case_delta(counters, '+', 'NEW'))}
+        END"""
+    yield f"""
+        CREATE TRIGGER stats_cases_delete AFTER DELETE ON {table} BEGIN
+          {update.format(delta=_case_delta(counters, '-', 'OLD'))}
+        END"""
+    if not columns:
+        return
+    yield f"""
+        CREATE TRIGGER stats_cases_update AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN
+          {update.format(delta=_case_delta(counters, '+', 'NEW') + ' ' + _case_delta(counters, '-', 'OLD'))}
+        END"""
+
+def _enrichment_triggers(table: str):
+    """
+    Count a case when its first row arrives and uncount it when its last
+    row goes. The insert trigger runs BEFORE the row exists so that
+    INSERT OR REPLACE (which deletes the old row without firing delete
+    triggers) does not count the same case twice.
+    """
+    counter = enrichment_counter(table)
+    yield f"""
+        CREATE TRIGGER stats_{table}_insert BEFORE INSERT ON {table}
+        WHEN NEW.case_id IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM {table} WHERE case_id = NEW.case_id) BEGIN
+          UPDATE stats_counters SET value = value + 1 WHERE name = '{counter}';
+        END"""
+    yield f"""
+        CREATE TRIGGER stats_{table}_delete AFTER DELETE ON {table}
+        WHEN OLD.case_id IS NOT NULL
+         AND NOT EXISTS (SELECT 1 FROM {table} WHERE case_id = OLD.case_id) BEGIN
+          UPDATE stats_counters SET value = value - 1 WHERE name = '{counter}';
+        END"""
+    yield f"""
+        CREATE TRIGGER stats_{table}_update AFTER UPDATE OF case_id ON {table}
+        WHEN OLD.case_id IS NOT NEW.case_id BEGIN
+          UPDATE stats_counters SET value = value - 1 WHERE name = '{counter}'
+            AND OLD.case_id IS NOT NULL
+            AND NOT EXISTS (SELECT 1 FROM {table} WHERE case_id = OLD.case_id);
+          UPDATE stats_counters SET value = value + 1 WHERE name = '{counter}'
+            AND NEW.case_id IS NOT NULL
+            AND (SELECT COUNT(*) FROM {table} WHERE case_id = NEW.case_id) = 1;
+        END"""
+
+def _existing_tables(cursor) -> set:
+    return {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+def count_stats(cursor) -> Dict[str, int]:
+    """Count every statistic from the base tables (full scans; used to reconcile)."""
+    tables = _existing_tables(cursor)
+    case_table = case_rows_table(cursor)
+    counters = _case_counters(cursor, case_table) if case_table in tables else {}
+    counts = {}
+    for name, expr in counters.items():
+        counts[name] = cursor.execute(
+            f"SELECT COUNT(*) FROM {case_table} WHERE {expr.format(row=case_table)}"
+        ).fetchone()[0]
+    for table in ENRICHMENT_TABLES:
+        counts[enrichment_counter(table)] = cursor.execute(
+            f"SELECT COUNT(DISTINCT case_id) FROM {table}"
+        ).fetchone()[0] if table in tables else 0
+    return counts
+
+def create_stats_counters(cursor) -> None:
+    """(Re)create stats_counters and its triggers, and fill it with exact counts."""
+    cursor.execute(STATS_COUNTERS_TABLE)
+    for (trigger,) in cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'stats\\_%' ESCAPE '\\'").fetchall():
+        cursor.execute(f"DROP TRIGGER {trigger}")
+    tables = _existing_tables(cursor)
+    case_table = case_rows_table(cursor)
+    statements = list(_case_triggers(case_table, _case_counters(cursor, case_table))) \
+        if case_table in tables else []
+    for table in ENRICHMENT_TABLES:
+        if table in tables:
+            statements.extend(_enrichment_triggers(table))
+    for statement in statements:
+        cursor.execute(statement)
+    cursor.executemany("INSERT OR REPLACE INTO stats_counters (name, value) VALUES (?, ?)",
+                       count_stats(cursor).items())
+
+def read_stats(conn) -> Optional[Dict[str, int]]:
+    """All counters as {name: value}, or None if the table does not exist yet."""
+    try:
+        return {row[0]: row[1] for row in conn.execute("SELECT name, value FROM stats_counters")}
+    except sqlite3.OperationalError:
+        return None
+
+def reconcile_stats(db_path: Optional[str] = None) -> Dict[str, tuple]:
+    """
+    Recount every statistic under the write lock and overwrite the stored
+    counters (recreating missing triggers). Returns {name: (stored, actual)}
+    for the counters that had drifted; a first run, which creates the
+    table, reports none.
+    """
+    manager = DatabaseManager(db_path or Config.DATABASE_NAME)
+    with manager.transaction() as cursor:
+        stored = read_stats(cursor)
+        create_stats_counters(cursor)
+        actual = read_stats(cursor)
+    if stored is None:
+        return {}
+    drift = {name: (stored.get(name), value) for name, value in actual.items() if stored.get(name) != value}
+    for name, (before, after) in drift.items():
+        logger.warning(f"Stats counter {name} drifted: stored {before}, actual {after}")
+    return drift